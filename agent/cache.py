@@ -0,0 +1,208 @@
+"""Persistent cache of processed URLs to avoid repeated downloads and OpenAI calls."""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from shared.canonical import canonicalise_url
+
+
+# Stale entries are kept this many TTLs after their last use so they can still be revalidated.
+STALE_TTL_FACTOR = 2
+
+
+class ProcessedURLCache:
+    """SQLite-backed cache addressed by canonical URL and by page content hash.
+
+    ``urls`` maps a canonical URL to the hash of the page it last returned, together with the
+    ``ETag``/``Last-Modified`` validators of that response. After ``ttl`` seconds the mapping is
+    stale and the page is revalidated with a conditional request. ``entries`` stores the extracted
+    fields, summary and image for a content hash, so a changed URL that still serves the same
+    page reuses the previous result. Entries unused for ``ttl`` seconds are only served again
+    after a ``304`` revalidation, which refreshes them; they are dropped once unused for
+    ``STALE_TTL_FACTOR`` times ``ttl``, and the least recently used ones are evicted once the
+    payloads exceed ``max_bytes``.
+    """
+
+    def __init__(self, path: Path, ttl: float = 7 * 24 * 3600, max_bytes: int = 100 * 1024 * 1024) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.content_hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                content_hash TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_accessed_at ON entries (accessed_at);
+            """
+        )
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(urls)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                self._connection.execute(f"ALTER TABLE urls ADD COLUMN {column} TEXT")
+        self._evict(time.time())
+        self._connection.commit()
+
+    def _load(self, content_hash: str, now: float, fresh: bool = True) -> Optional[Dict[str, Any]]:
+        """Return the payload of ``content_hash`` and mark it used.
+
+        With ``fresh`` set, entries unused for ``ttl`` seconds are ignored; a revalidated entry is
+        loaded regardless, as the ``304`` proves it still matches the page.
+        """
+        row = self._connection.execute(
+            "SELECT payload FROM entries WHERE content_hash = ? AND accessed_at >= ?",
+            (content_hash, now - self.ttl if fresh else float("-inf")),
+        ).fetchone()
+        if row is None:
+            return None
+        self._connection.execute("UPDATE entries SET accessed_at = ? WHERE content_hash = ?", (now, content_hash))
+        self._connection.commit()
+        return json.loads(row[0])
+
+    def get_by_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for ``url`` if it was processed less than ``ttl`` seconds ago."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content_hash FROM urls WHERE url = ? AND stored_at >= ?",
+                (canonicalise_url(url), now - self.ttl),
+            ).fetchone()
+            payload = self._load(row[0], now) if row else None
+            if payload is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return payload
+
+    def validators(self, url: str) -> Optional[Dict[str, Optional[str]]]:
+        """Return the stored content hash and HTTP validators of a stale ``url`` mapping.
+
+        Only mappings whose result is still stored are returned, so a ``304`` answer can always
+        be served from the cache.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                """
+                SELECT urls.content_hash, urls.etag, urls.last_modified
+                FROM urls JOIN entries ON entries.content_hash = urls.content_hash
+                WHERE urls.url = ?
+                """,
+                (canonicalise_url(url),),
+            ).fetchone()
+        if row is None or not (row[1] or row[2]):
+            return None
+        return {"content_hash": row[0], "etag": row[1], "last_modified": row[2]}
+
+    def revalidated(self, url: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Refresh ``url`` after the origin answered ``304 Not Modified`` and return its result."""
+        now = time.time()
+        with self._lock:
+            payload = self._load(content_hash, now, fresh=False)
+            if payload is not None:
+                self.revalidations += 1
+                self._connection.execute("UPDATE urls SET stored_at = ? WHERE url = ?", (now, canonicalise_url(url)))
+                self._connection.commit()
+            return payload
+
+    def get_by_content(
+        self,
+        content_hash: str,
+        urls: Iterable[str] = (),
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the result stored for ``content_hash`` and point ``urls`` at it on a hit."""
+        now = time.time()
+        with self._lock:
+            payload = self._load(content_hash, now)
+            if payload is not None:
+                self.content_hits += 1
+                self._link(urls, content_hash, now, etag, last_modified)
+                self._connection.commit()
+            return payload
+
+    def _link(
+        self,
+        urls: Iterable[str],
+        content_hash: str,
+        now: float,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        self._connection.executemany(
+            """
+            INSERT OR REPLACE INTO urls (url, content_hash, stored_at, etag, last_modified)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [(key, content_hash, now, etag, last_modified) for key in {canonicalise_url(url) for url in urls}],
+        )
+
+    def put(
+        self,
+        urls: Iterable[str],
+        content_hash: str,
+        payload: Dict[str, Any],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        now = time.time()
+        encoded = json.dumps(payload, ensure_ascii=False)
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO entries (content_hash, payload, size, stored_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (content_hash, encoded, len(encoded.encode("utf-8")), now, now),
+            )
+            self._link(urls, content_hash, now, etag, last_modified)
+            self._evict(now)
+            self._connection.commit()
+
+    def _evict(self, now: float) -> None:
+        # Stale URL rows are kept while their entry exists so they can still be revalidated.
+        self._connection.execute("DELETE FROM entries WHERE accessed_at < ?", (now - STALE_TTL_FACTOR * self.ttl,))
+        (total,) = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total > self.max_bytes:
+            rows = self._connection.execute("SELECT content_hash, size FROM entries ORDER BY accessed_at").fetchall()
+            evicted = []
+            for content_hash, size in rows:
+                if total <= self.max_bytes:
+                    break
+                evicted.append((content_hash,))
+                total -= size
+            self._connection.executemany("DELETE FROM entries WHERE content_hash = ?", evicted)
+        self._connection.execute("DELETE FROM urls WHERE content_hash NOT IN (SELECT content_hash FROM entries)")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "content_hits": self.content_hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -1,8 +1,9 @@
 """Configuration helpers for the Telegram monitoring agent."""
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseSettings, Field
 
@@ -10,17 +11,64 @@ from pydantic import BaseSettings, Field
 class Settings(BaseSettings):
     """Runtime configuration for the monitoring workflow."""
 
-    telegram_chat_id: str = Field(..., alias="TELEGRAM_CHAT_ID")
+    telegram_chat_id: Optional[str] = Field(default=None, alias="TELEGRAM_CHAT_ID")
+    telegram_chat_ids_list: str = Field("", alias="TELEGRAM_CHAT_IDS")
     telegram_server_url: str = Field(..., alias="TELEGRAM_MCP_SERVER")
     telegram_api_key: Optional[str] = Field(default=None, alias="TELEGRAM_MCP_API_KEY")
+    telegram_concurrency: int = Field(4, alias="TELEGRAM_MCP_CONCURRENCY")
 
     openai_api_key: str = Field(..., alias="OPENAI_API_KEY")
     summary_model: str = Field("gpt-4o-mini", alias="OPENAI_SUMMARY_MODEL")
     image_model: str = Field("gpt-image-1", alias="OPENAI_IMAGE_MODEL")
+    image_size: str = Field("1024x1024", alias="OPENAI_IMAGE_SIZE")
+    image_quality: Optional[str] = Field(default=None, alias="OPENAI_IMAGE_QUALITY")
+    image_min_width: int = Field(300, alias="IMAGE_MIN_WIDTH")
+    image_min_height: int = Field(150, alias="IMAGE_MIN_HEIGHT")
+    image_max_width: int = Field(1280, alias="IMAGE_MAX_WIDTH")
+    image_max_bytes: int = Field(8 * 1024 * 1024, alias="IMAGE_MAX_BYTES")
 
     backend_base_url: str = Field("http://localhost:8000", alias="BACKEND_BASE_URL")
+    review_mode: str = Field("console", alias="REVIEW_MODE")
+    publish_batch_size: int = Field(10, alias="PUBLISH_BATCH_SIZE")
+    publish_retries: int = Field(3, alias="PUBLISH_RETRIES")
     state_file: Path = Field(Path("agent_state.json"), alias="AGENT_STATE_FILE")
     request_timeout: int = Field(20, alias="REQUEST_TIMEOUT")
+    max_download_bytes: int = Field(5 * 1024 * 1024, alias="MAX_DOWNLOAD_BYTES")
+
+    processing_workers: int = Field(4, alias="PROCESSING_WORKERS")
+    openai_concurrency: int = Field(2, alias="OPENAI_MAX_CONCURRENCY")
+    openai_rate_limit: float = Field(2.0, alias="OPENAI_RATE_LIMIT")
+    outbound_host_rate: float = Field(1.0, alias="OUTBOUND_HOST_RATE")
+    outbound_host_concurrency: int = Field(2, alias="OUTBOUND_HOST_CONCURRENCY")
+    outbound_max_retries: int = Field(3, alias="OUTBOUND_MAX_RETRIES")
+    circuit_failure_threshold: int = Field(5, alias="CIRCUIT_FAILURE_THRESHOLD")
+    circuit_reset_timeout: float = Field(300, alias="CIRCUIT_RESET_TIMEOUT")
+    retry_max_attempts: int = Field(5, alias="RETRY_MAX_ATTEMPTS")
+    summary_batch_size: int = Field(4, alias="SUMMARY_BATCH_SIZE")
+    summary_token_budget: int = Field(1500, alias="SUMMARY_TOKEN_BUDGET")
+
+    report_file: Optional[Path] = Field(Path("agent_report.json"), alias="AGENT_REPORT_FILE")
+    push_metrics: bool = Field(True, alias="AGENT_PUSH_METRICS")
+    journal_file: Path = Field(Path("agent_journal.db"), alias="AGENT_JOURNAL_FILE")
+    seen_urls_file: Path = Field(Path("agent_seen.db"), alias="AGENT_SEEN_URLS_FILE")
+    cache_file: Optional[Path] = Field(Path("agent_cache.db"), alias="AGENT_CACHE_FILE")
+    cache_ttl: float = Field(7 * 24 * 3600, alias="AGENT_CACHE_TTL")
+    cache_max_bytes: int = Field(100 * 1024 * 1024, alias="AGENT_CACHE_MAX_BYTES")
+
+    poll_interval: float = Field(300, alias="POLL_INTERVAL")
+    poll_interval_min: float = Field(30, alias="POLL_INTERVAL_MIN")
+    poll_interval_max: float = Field(1800, alias="POLL_INTERVAL_MAX")
+    poll_burst_threshold: int = Field(10, alias="POLL_BURST_THRESHOLD")
+
+    @property
+    def telegram_chat_ids(self) -> List[str]:
+        """Monitored chats: ``TELEGRAM_CHAT_IDS`` (comma separated) plus ``TELEGRAM_CHAT_ID``, without repeats."""
+        chat_ids: List[str] = []
+        for chat_id in [self.telegram_chat_id or ""] + self.telegram_chat_ids_list.split(","):
+            chat_id = chat_id.strip()
+            if chat_id and chat_id not in chat_ids:
+                chat_ids.append(chat_id)
+        return chat_ids
 
     class Config:
         env_file = ".env"
@@ -28,4 +76,7 @@ class Settings(BaseSettings):
         populate_by_name = True
 
 
-settings = Settings()
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Read the configuration from the environment and ``.env`` on first use, not on import."""
+    return Settings()
@@ -0,0 +1,103 @@
+"""Single-pass HTML extraction built on lxml."""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml.etree import ParserError
+from readability import Document
+
+WHITESPACE = re.compile(r"\s+")
+IMAGE_META_KEYS = ("og:image", "twitter:image", "twitter:image:src")
+# Images tried, in order, before paying for a generated one: the declared ones, then the first
+# `<img>` elements of the page.
+MAX_IMAGE_CANDIDATES = 5
+
+
+@dataclass
+class ExtractedPage:
+    title: Optional[str]
+    description: Optional[str]
+    image_url: Optional[str]
+    type: str
+    text: str
+    image_candidates: List[str] = field(default_factory=list)
+
+
+def _normalise_text(text: str) -> str:
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def extract_page(html: str, base_url: str) -> ExtractedPage:
+    """Parse ``html`` once and collect metadata and readable text from the same tree.
+
+    All ``<title>``, ``<meta>``, ``<article>`` and ``<img>`` elements are visited in a single
+    document-order traversal, and the parsed tree is handed to readability so the page is not
+    parsed again.
+    """
+    try:
+        try:
+            tree = lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration.
+            tree = lxml.html.document_fromstring(html.encode("utf-8"))
+    except ParserError:
+        return ExtractedPage(title=None, description=None, image_url=None, type="Noticia", text="")
+
+    page_title: Optional[str] = None
+    meta: Dict[str, str] = {}
+    has_article = False
+    page_images: List[str] = []
+    for element in tree.iter("title", "meta", "article", "img"):
+        tag = element.tag
+        if tag == "meta":
+            content = (element.get("content") or "").strip()
+            key = (element.get("property") or element.get("name") or "").strip().lower()
+            if key and content and key not in meta:
+                meta[key] = content
+        elif tag == "title":
+            if page_title is None and element.text and len(element) == 0:
+                page_title = element.text.strip() or None
+        elif tag == "article":
+            has_article = True
+        elif len(page_images) < MAX_IMAGE_CANDIDATES:
+            src = (element.get("src") or "").strip()
+            if src and not src.startswith("data:"):
+                page_images.append(src)
+
+    try:
+        document = Document(tree)
+        article_html = document.summary(html_partial=True)
+        short_title = document.short_title()
+        fragment = lxml.html.fragment_fromstring(article_html, create_parent="div")
+        text = " ".join(fragment.itertext())
+    except Exception:
+        body = tree.find("body")
+        text = " ".join((body if body is not None else tree).itertext())
+        short_title = None
+
+    title = page_title or meta.get("og:title") or meta.get("twitter:title") or short_title
+
+    images: List[str] = []
+    for image in [meta[key] for key in IMAGE_META_KEYS if key in meta] + page_images:
+        image = urljoin(base_url, image)
+        if image not in images:
+            images.append(image)
+    if has_article:
+        content_type = "Artículo"
+    elif meta.get("og:type"):
+        content_type = meta["og:type"].replace("_", " ").title()
+    else:
+        content_type = "Noticia"
+
+    return ExtractedPage(
+        title=title,
+        description=meta.get("description") or meta.get("og:description"),
+        image_url=images[0] if images else None,
+        type=content_type,
+        text=_normalise_text(text),
+        image_candidates=images[:MAX_IMAGE_CANDIDATES],
+    )
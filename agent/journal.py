@@ -0,0 +1,96 @@
+"""Crash-safe journal of per-URL progress so an interrupted run resumes where it stopped."""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+STAGES = ("fetched", "summarised", "processed", "approved")
+
+
+@dataclass
+class JournalEntry:
+    url: str
+    message_id: Optional[int]
+    stage: str
+    payload: Optional[Dict[str, Any]]
+
+
+class ProgressJournal:
+    """Records every URL taken from Telegram and the furthest stage it reached.
+
+    Stages are ``fetched`` (read from a message), ``summarised`` (summary paid for),
+    ``processed`` (summary and image ready for review) and ``approved`` (waiting to be sent to
+    the backend, as a post or to its review queue). Each update is its own SQLite transaction,
+    so a crash never loses a summary or image that was already paid for. Rows are removed once
+    the URL is sent, discarded or handed to the retry queue.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS progress (
+                url TEXT PRIMARY KEY,
+                message_id INTEGER,
+                stage TEXT NOT NULL,
+                payload TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM progress").fetchone()[0]
+
+    def entries(self) -> List[JournalEntry]:
+        """Unfinished URLs in the order they were first recorded."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT url, message_id, stage, payload FROM progress ORDER BY rowid"
+            ).fetchall()
+        return [
+            JournalEntry(url=url, message_id=message_id, stage=stage, payload=json.loads(payload) if payload else None)
+            for url, message_id, stage, payload in rows
+        ]
+
+    def record_fetched(self, items: Iterable[Tuple[str, Optional[int]]]) -> None:
+        """Record ``(url, message_id)`` pairs read from Telegram; known URLs keep their stage."""
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO progress (url, message_id, stage, payload, updated_at) "
+                "VALUES (?, ?, 'fetched', NULL, ?)",
+                [(url, message_id, now) for url, message_id in items],
+            )
+
+    def advance(self, url: str, stage: str, payload: Dict[str, Any]) -> None:
+        """Move ``url`` to ``stage`` and store what is needed to resume from there."""
+        if stage not in STAGES:
+            raise ValueError(f"Etapa desconocida: {stage}")
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO progress (url, message_id, stage, payload, updated_at) VALUES (?, NULL, ?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET stage = excluded.stage, payload = excluded.payload, "
+                "updated_at = excluded.updated_at",
+                (url, stage, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+
+    def complete(self, urls: Iterable[str]) -> None:
+        """Forget ``urls`` once they no longer need any work from this journal."""
+        with self._lock, self._connection:
+            self._connection.executemany("DELETE FROM progress WHERE url = ?", [(url,) for url in urls])
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -2,19 +2,52 @@
 from __future__ import annotations
 
 import argparse
+import signal
+import threading
+from typing import List, Optional
 
-from .config import settings
-from .workflow import run_workflow
+from .config import get_settings
+from .preview import REVIEW_PROMPT_ACTIVE
+from .workflow import run_workflow, watch_workflow
 
 
-def main() -> None:
+def _install_stop_handlers(stop_event: threading.Event) -> None:
+    def handle(signum, frame) -> None:
+        if stop_event.is_set():
+            raise KeyboardInterrupt
+        if REVIEW_PROMPT_ACTIVE.is_set():
+            # The cycle cannot end while the prompt waits for an answer; the URL under review
+            # stays in the journal and is offered again on the next run.
+            print("\nDeteniendo el agente; la revisión en curso se retomará en la próxima ejecución.")
+            stop_event.set()
+            raise KeyboardInterrupt
+        print("\nDeteniendo el agente al terminar el ciclo actual (repite para forzar la salida)...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle)
+    signal.signal(signal.SIGTERM, handle)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     parser = argparse.ArgumentParser(description="Agente de monitoreo de Telegram")
-    parser.add_argument(
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
         "--once",
         action="store_true",
         help="Ejecuta el flujo una única vez (por defecto)",
     )
-    _ = parser.parse_args()
+    mode.add_argument(
+        "--watch",
+        action="store_true",
+        help="Mantiene el agente en ejecución consultando Telegram con un intervalo adaptativo",
+    )
+    args = parser.parse_args(argv)
+    settings = get_settings()
+    if args.watch:
+        stop_event = threading.Event()
+        _install_stop_handlers(stop_event)
+        watch_workflow(settings, stop_event)
+        return
     run_workflow(settings)
 
 
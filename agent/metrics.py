@@ -0,0 +1,108 @@
+"""Timing spans and counters collected during a monitoring run, exported as a JSON report."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .utils import write_atomic
+
+LabelKey = Tuple[Tuple[str, str], ...]
+# Seconds allowed to push a run report. Reports are best effort, so an unreachable backend must
+# not hold up the end of the run.
+REPORT_TIMEOUT = 3.0
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class RunMetrics:
+    """Thread-safe collector shared by the workflow, the URL processor and their workers.
+
+    ``span(stage)`` times a block; ``increment(name, amount, **labels)`` adds to a counter.
+    ``reset()`` starts a new run and ``report()`` summarises the current one.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = datetime.utcnow()
+            self._started = time.perf_counter()
+            self._spans: Dict[str, List[float]] = {}
+            self._counters: Dict[Tuple[str, LabelKey], float] = {}
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._spans.setdefault(stage, []).append(seconds)
+
+    def increment(self, name: str, amount: float = 1, **labels: Any) -> None:
+        key = (name, tuple(sorted((label, str(value)) for label, value in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def report(self, **extra: Any) -> Dict[str, Any]:
+        """Summarise the run: per-stage timings, counters and any ``extra`` fields."""
+        with self._lock:
+            spans = {stage: sorted(durations) for stage, durations in self._spans.items()}
+            counters = dict(self._counters)
+            duration = time.perf_counter() - self._started
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.utcnow().isoformat(),
+            "duration_seconds": round(duration, 4),
+            **extra,
+            "spans": {
+                stage: {
+                    "count": len(durations),
+                    "total_seconds": round(sum(durations), 4),
+                    "mean_seconds": round(sum(durations) / len(durations), 4),
+                    "p50_seconds": round(_percentile(durations, 0.5), 4),
+                    "p95_seconds": round(_percentile(durations, 0.95), 4),
+                    "max_seconds": round(durations[-1], 4),
+                }
+                for stage, durations in sorted(spans.items())
+            },
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+        }
+
+    @staticmethod
+    def write(path: Path, report: Dict[str, Any]) -> None:
+        write_atomic(path, json.dumps(report, indent=2, ensure_ascii=False))
+
+    @staticmethod
+    def push(base_url: str, report: Dict[str, Any], timeout: float = REPORT_TIMEOUT) -> None:
+        """Send ``report`` to the backend, which exports it on ``/metrics``.
+
+        Sent once with the standard library rather than ``requests``, so runs with nothing to
+        publish do not import it just for this.
+        """
+        request = urllib.request.Request(
+            f"{base_url.rstrip('/')}/api/metrics/agent",
+            data=json.dumps(report).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
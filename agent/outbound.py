@@ -0,0 +1,190 @@
+"""Shared scheduler for outbound requests: rate limits, retries and circuit breaking."""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Mapping, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a host or API is skipped because it failed repeatedly."""
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and lets one probe through after
+    ``reset_timeout`` seconds; a successful probe closes it again."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Read a ``Retry-After`` header (seconds or HTTP date) from the response attached to ``error``."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+class OutboundScheduler:
+    """Runs outbound calls under a per-key token bucket, concurrency limit and circuit breaker.
+
+    Keys are host names for page downloads and API names such as ``openai``. Transient failures
+    (``transient_errors`` or responses with a status in ``RETRYABLE_STATUSES``) are retried with
+    jittered exponential backoff, waiting at least as long as the server's ``Retry-After`` asks.
+    A ``Retry-After`` longer than ``max_delay`` is not waited for; the call fails so the caller
+    can defer it to a later run.
+    """
+
+    def __init__(
+        self,
+        *,
+        rate: float = 1.0,
+        burst: float = 3.0,
+        concurrency: int = 2,
+        key_rates: Optional[Mapping[str, float]] = None,
+        key_concurrency: Optional[Mapping[str, int]] = None,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        max_delay: float = 60.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 300.0,
+        transient_errors: Tuple[Type[BaseException], ...] = (ConnectionError, TimeoutError),
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.key_rates = dict(key_rates or {})
+        self.key_concurrency = dict(key_concurrency or {})
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.transient_errors = transient_errors
+        self._sleep = sleep
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _limits(self, key: str) -> Tuple[TokenBucket, threading.BoundedSemaphore, CircuitBreaker]:
+        with self._lock:
+            if key not in self._buckets:
+                rate = self.key_rates.get(key, self.rate)
+                self._buckets[key] = TokenBucket(rate, max(self.burst, rate))
+                self._slots[key] = threading.BoundedSemaphore(max(1, self.key_concurrency.get(key, self.concurrency)))
+                self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._buckets[key], self._slots[key], self._breakers[key]
+
+    def is_transient(self, error: BaseException) -> bool:
+        if isinstance(error, (CircuitOpenError,) + self.transient_errors):
+            return True
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        return status in RETRYABLE_STATUSES
+
+    def _backoff(self, attempt: int, error: BaseException) -> Optional[float]:
+        delay = random.uniform(0, min(self.max_delay, self.backoff_base * 2**attempt))
+        requested = retry_after_seconds(error)
+        if requested is not None:
+            if requested > self.max_delay:
+                return None
+            delay = max(delay, requested)
+        return delay
+
+    def call(self, key: str, func: Callable[[], T]) -> T:
+        bucket, slots, breaker = self._limits(key)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Se omite {key}: demasiados fallos recientes")
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                with slots:
+                    result = func()
+            except Exception as error:
+                if not self.is_transient(error):
+                    # The remote answered, so it is healthy even if this request was rejected.
+                    breaker.record_success()
+                    raise
+                delay = self._backoff(attempt, error) if attempt < self.max_retries else None
+                if delay is None:
+                    breaker.record_failure()
+                    raise
+                attempt += 1
+                self._sleep(delay)
+                continue
+            breaker.record_success()
+            return result
@@ -0,0 +1,32 @@
+"""Adaptive poll interval used by the long-running watch mode."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass
+class AdaptivePollInterval:
+    """Backs off while the chat is quiet and tightens when traffic picks up.
+
+    Every empty poll doubles the delay up to ``maximum``. Any new message halves it, and a burst
+    of at least ``burst_threshold`` messages drops it straight to ``minimum``.
+    """
+
+    minimum: float
+    maximum: float
+    current: float
+    burst_threshold: int = 10
+
+    def __post_init__(self) -> None:
+        self.minimum = max(1.0, self.minimum)
+        self.maximum = max(self.minimum, self.maximum)
+        self.current = min(max(self.current, self.minimum), self.maximum)
+
+    def update(self, message_count: int) -> float:
+        if message_count <= 0:
+            self.current = min(self.current * 2, self.maximum)
+        elif message_count >= self.burst_threshold:
+            self.current = self.minimum
+        else:
+            self.current = max(self.current / 2, self.minimum)
+        return self.current
@@ -1,10 +1,18 @@
 """Console-based preview and approval workflow."""
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from .url_processor import ProcessedURL
+from shared.images import describe_image
+
+if TYPE_CHECKING:
+    from .url_processor import ProcessedURL
+
+# Set while the console waits for a review answer, so a stop request can interrupt the prompt
+# instead of waiting for an answer.
+REVIEW_PROMPT_ACTIVE = threading.Event()
 
 
 @dataclass
@@ -22,25 +30,29 @@ class PreviewConsole:
         print("Título:", processed.title)
         print("Resumen:", processed.summary)
         print("URL:", processed.source_url)
-        print("Imagen:", processed.image_url or "(no disponible)")
+        print("Imagen:", describe_image(processed.image_url))
         print("Proveedor:", processed.provider)
         print("Fecha de publicación:", processed.release_date)
         print("=" * 80)
 
-        while True:
-            choice = input("¿Aceptar (a), Modificar (m), Regenerar imagen (i) o Descartar (d)? ").strip().lower()
-            if choice in {"a", ""}:
-                return PreviewDecision(status="accepted")
-            if choice == "d":
-                return PreviewDecision(status="discarded")
-            if choice == "i":
-                return PreviewDecision(status="modify", regenerate_image=True)
-            if choice == "m":
-                new_title = input(f"Nuevo título (enter para mantener '{processed.title}'): ").strip()
-                new_summary = input("Nuevo resumen (enter para mantener actual): ").strip()
-                return PreviewDecision(
-                    status="modify",
-                    updated_title=new_title or None,
-                    updated_summary=new_summary or None,
-                )
-            print("Opción no válida. Intenta nuevamente.")
+        REVIEW_PROMPT_ACTIVE.set()
+        try:
+            while True:
+                choice = input("¿Aceptar (a), Modificar (m), Regenerar imagen (i) o Descartar (d)? ").strip().lower()
+                if choice in {"a", ""}:
+                    return PreviewDecision(status="accepted")
+                if choice == "d":
+                    return PreviewDecision(status="discarded")
+                if choice == "i":
+                    return PreviewDecision(status="modify", regenerate_image=True)
+                if choice == "m":
+                    new_title = input(f"Nuevo título (enter para mantener '{processed.title}'): ").strip()
+                    new_summary = input("Nuevo resumen (enter para mantener actual): ").strip()
+                    return PreviewDecision(
+                        status="modify",
+                        updated_title=new_title or None,
+                        updated_summary=new_summary or None,
+                    )
+                print("Opción no válida. Intenta nuevamente.")
+        finally:
+            REVIEW_PROMPT_ACTIVE.clear()
@@ -1,17 +1,112 @@
 """REST client used to send approved posts to the backend."""
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Sequence
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metrics import RunMetrics
 
 
 class PostPublisher:
-    def __init__(self, base_url: str, timeout: int = 20) -> None:
+    """Publishes posts over a pooled keep-alive session, optionally buffering them in batches.
+
+    Connection failures and ``429``/``502``/``503``/``504`` answers are retried with exponential
+    backoff. Read timeouts are not retried because the backend may already have stored the post.
+    ``batch_path`` selects where batches go: ``/api/posts/batch`` publishes them and
+    ``/api/review`` leaves them in the review queue.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: int = 20,
+        batch_size: int = 10,
+        retries: int = 3,
+        batch_path: str = "/api/posts/batch",
+        metrics: Optional[RunMetrics] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        self.batch_path = batch_path
+        self.metrics = metrics or RunMetrics()
+        self._pending: List[Dict[str, Any]] = []
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST", "PATCH"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(max_retries=retry))
+        self.session.mount("https://", HTTPAdapter(max_retries=retry))
 
     def publish(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        response = requests.post(f"{self.base_url}/api/posts", json=payload, timeout=self.timeout)
+        response = self.session.post(f"{self.base_url}/api/posts", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def publish_many(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send ``payloads`` through ``POST <batch_path>`` and return the per-item results."""
+        with self.metrics.span("publish"):
+            response = self.session.post(
+                f"{self.base_url}{self.batch_path}",
+                json={"items": payloads},
+                timeout=self.timeout,
+            )
+        response.raise_for_status()
+        return response.json().get("results", [])
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Buffer ``payload`` and flush once ``batch_size`` posts are waiting.
+
+        Returns the results of the flush, or an empty list while the batch is still filling.
+        """
+        self._pending.append(payload)
+        if len(self._pending) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self) -> List[Dict[str, Any]]:
+        if not self._pending:
+            return []
+        batch, self._pending = self._pending, []
+        return self.publish_many(batch)
+
+    def review_items(self, status: str = "pending", limit: int = 20, after_id: Optional[int] = None) -> Dict[str, Any]:
+        params: Dict[str, Any] = {"status": status, "limit": limit}
+        if after_id is not None:
+            params["after_id"] = after_id
+        response = self.session.get(f"{self.base_url}/api/review", params=params, timeout=self.timeout)
         response.raise_for_status()
         return response.json()
+
+    def update_review_item(self, item_id: int, changes: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.patch(f"{self.base_url}/api/review/{item_id}", json=changes, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def decide(self, approve: Sequence[int] = (), discard: Sequence[int] = ()) -> List[Dict[str, Any]]:
+        """Approve and discard review items in one request and return the per-item results."""
+        response = self.session.post(
+            f"{self.base_url}/api/review/decisions",
+            json={"approve": list(approve), "discard": list(discard)},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json().get("results", [])
+
+    def close(self) -> None:
+        self.session.close()
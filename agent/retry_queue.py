@@ -0,0 +1,58 @@
+"""URLs whose processing failed transiently, persisted next to the agent state."""
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from .utils import write_atomic
+
+
+@dataclass
+class RetryEntry:
+    url: str
+    attempts: int = 0
+    last_error: str = ""
+    last_attempt_at: str = ""
+
+
+class RetryQueue:
+    """Failed URLs retried at the start of the next run, dropped after ``max_attempts``."""
+
+    def __init__(self, path: Path, max_attempts: int = 5) -> None:
+        self.path = path
+        self.max_attempts = max_attempts
+        self.entries: Dict[str, RetryEntry] = {}
+        if path.exists():
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self.entries = {item["url"]: RetryEntry(**item) for item in data.get("urls", [])}
+
+    @staticmethod
+    def path_for(state_file: Path) -> Path:
+        return state_file.with_name(f"{state_file.stem}.retry.json")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def urls(self) -> List[str]:
+        return list(self.entries)
+
+    def add(self, url: str, error: BaseException) -> bool:
+        """Record a failed attempt and return ``False`` once the URL has been given up on."""
+        entry = self.entries.setdefault(url, RetryEntry(url=url))
+        entry.attempts += 1
+        entry.last_error = str(error)[:300]
+        entry.last_attempt_at = datetime.utcnow().isoformat()
+        if entry.attempts >= self.max_attempts:
+            del self.entries[url]
+            return False
+        return True
+
+    def remove(self, url: str) -> None:
+        self.entries.pop(url, None)
+
+    def save(self) -> None:
+        payload = {"urls": [asdict(entry) for entry in self.entries.values()]}
+        write_atomic(self.path, json.dumps(payload, indent=2))
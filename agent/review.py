@@ -0,0 +1,216 @@
+"""Console to work through the backend review queue, approving or discarding posts in bulk."""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .config import get_settings
+from .publisher import PostPublisher
+
+if TYPE_CHECKING:
+    from .url_processor import URLProcessor
+
+PAGE_SIZE = 20
+PROMPT = (
+    "Aprobar (a 1 3-5 | a todo), Descartar (d 2), Modificar (m 4), Regenerar imagen (i 6), "
+    "Recargar (r), Siguiente página (s) o Salir (q): "
+)
+
+
+def parse_selection(text: str, count: int) -> List[int]:
+    """Turn ``"1 3-5,7"`` or ``"todo"`` into positions (0-based) of the ``count`` listed items."""
+    text = text.strip().lower()
+    if text in {"todo", "todos", "*"}:
+        return list(range(count))
+    positions: List[int] = []
+    for part in text.replace(",", " ").split():
+        first, _, last = part.partition("-")
+        try:
+            start, end = int(first), int(last or first)
+        except ValueError:
+            raise ValueError(f"Selección no válida: {part}") from None
+        if start < 1 or end > count or start > end:
+            raise ValueError(f"Selección fuera de rango: {part}")
+        positions.extend(position - 1 for position in range(start, end + 1) if position - 1 not in positions)
+    if not positions:
+        raise ValueError("Indica al menos un número de la lista")
+    return positions
+
+
+class ReviewConsole:
+    """Lists pending review items and applies decisions to many of them at once.
+
+    Image regeneration runs in background threads; the new image is attached to the item as soon
+    as it is ready, so the reviewer can keep deciding on other items meanwhile.
+    """
+
+    def __init__(self, publisher: PostPublisher, processor: Optional[URLProcessor] = None) -> None:
+        self.publisher = publisher
+        self._processor = processor
+        self._images = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image")
+        self._regenerating: Dict[int, Future] = {}
+
+    @property
+    def processor(self) -> URLProcessor:
+        if self._processor is None:
+            from .url_processor import URLProcessor
+
+            settings = get_settings()
+            self._processor = URLProcessor(
+                api_key=settings.openai_api_key,
+                summary_model=settings.summary_model,
+                image_model=settings.image_model,
+                image_size=settings.image_size,
+                image_quality=settings.image_quality,
+                min_image_width=settings.image_min_width,
+                min_image_height=settings.image_min_height,
+                max_image_width=settings.image_max_width,
+                max_image_bytes=settings.image_max_bytes,
+                timeout=settings.request_timeout,
+                max_concurrent_ai_calls=settings.openai_concurrency,
+            )
+        return self._processor
+
+    def _show(self, items: List[Dict[str, Any]], total: int) -> None:
+        print("\n" + "=" * 80)
+        print(f"PUBLICACIONES PENDIENTES DE REVISIÓN ({len(items)} de {total})")
+        for position, item in enumerate(items, start=1):
+            marker = " 🖼️ regenerando imagen" if item["id"] in self._regenerating else ""
+            print(f"\n[{position}] #{item['id']} {item['title']}{marker}")
+            print(f"    {item['summary']}")
+            print(f"    {item['source_url']} · {item.get('provider') or 'Fuente desconocida'}")
+            print(f"    Imagen: {item.get('image_url') or '(no disponible)'}")
+        print("=" * 80)
+
+    def _collect_images(self) -> None:
+        for item_id, future in list(self._regenerating.items()):
+            if not future.done():
+                continue
+            del self._regenerating[item_id]
+            try:
+                image_url = future.result()
+                if not image_url:
+                    raise RuntimeError("OpenAI no devolvió ninguna imagen")
+                self.publisher.update_review_item(item_id, {"image_url": image_url})
+            except Exception as error:
+                print(f"No se pudo regenerar la imagen de #{item_id}: {error}")
+                continue
+            print(f"🖼️ Nueva imagen lista para #{item_id}.")
+
+    def _decide(self, items: List[Dict[str, Any]], selection: str, approve: bool) -> None:
+        chosen = [items[position] for position in parse_selection(selection, len(items))]
+        ids = []
+        for item in chosen:
+            if item["id"] in self._regenerating:
+                print(f"Se omite #{item['id']}: su imagen todavía se está regenerando.")
+                continue
+            ids.append(item["id"])
+        if not ids:
+            return
+        results = self.publisher.decide(approve=ids) if approve else self.publisher.decide(discard=ids)
+        for result in results:
+            if result.get("status") == "approved":
+                print(f"✅ #{result['id']} publicado con ID {result['post'].get('id')}")
+            elif result.get("status") == "discarded":
+                print(f"🗑️ #{result['id']} descartado")
+            else:
+                print(f"Error con #{result.get('id')}: {result.get('details') or result.get('error')}")
+
+    def _modify(self, item: Dict[str, Any]) -> None:
+        title = input(f"Nuevo título (enter para mantener '{item['title']}'): ").strip()
+        summary = input("Nuevo resumen (enter para mantener actual): ").strip()
+        changes = {key: value for key, value in (("title", title), ("summary", summary)) if value}
+        if changes:
+            self.publisher.update_review_item(item["id"], changes)
+            print("Se actualizó la publicación.")
+
+    def _regenerate(self, items: List[Dict[str, Any]], selection: str) -> None:
+        for position in parse_selection(selection, len(items)):
+            item = items[position]
+            if item["id"] in self._regenerating:
+                continue
+            self._regenerating[item["id"]] = self._images.submit(
+                self.processor.generate_image, title=item["title"], description=item["summary"]
+            )
+            print(f"Generando una nueva imagen para #{item['id']} en segundo plano...")
+
+    def run(self) -> None:
+        after_id: Optional[int] = None
+        while True:
+            self._collect_images()
+            page = self.publisher.review_items(limit=PAGE_SIZE, after_id=after_id)
+            items = page.get("items", [])
+            if not items and after_id is not None:
+                after_id = None
+                continue
+            if not items:
+                print("\nNo hay publicaciones pendientes de revisión.")
+            else:
+                self._show(items, page.get("total", len(items)))
+            command, _, argument = input(PROMPT).strip().partition(" ")
+            command = command.lower()
+            try:
+                if command == "q":
+                    return
+                if command == "s":
+                    after_id = page.get("next_after_id")
+                elif command in {"a", "d"}:
+                    self._decide(items, argument, approve=command == "a")
+                elif command == "m":
+                    self._modify(items[parse_selection(argument, len(items))[0]])
+                elif command == "i":
+                    self._regenerate(items, argument)
+                elif command != "r":
+                    print("Opción no válida. Intenta nuevamente.")
+            except ValueError as error:
+                print(error)
+            except Exception as error:
+                print(f"Error al comunicarse con el backend: {error}")
+
+    def approve_all(self) -> int:
+        """Approve every pending item without prompting and return how many were published."""
+        approved = 0
+        while True:
+            items = self.publisher.review_items(limit=PAGE_SIZE).get("items", [])
+            if not items:
+                return approved
+            results = self.publisher.decide(approve=[item["id"] for item in items])
+            approved += sum(1 for result in results if result.get("status") == "approved")
+            if not any(result.get("status") == "approved" for result in results):
+                return approved
+
+    def close(self) -> None:
+        self._images.shutdown(wait=True)
+        self._collect_images()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Revisión de publicaciones pendientes")
+    parser.add_argument(
+        "--approve-all",
+        action="store_true",
+        help="Aprueba todas las publicaciones pendientes sin preguntar",
+    )
+    args = parser.parse_args(argv)
+    settings = get_settings()
+    publisher = PostPublisher(
+        settings.backend_base_url,
+        timeout=settings.request_timeout,
+        retries=settings.publish_retries,
+    )
+    console = ReviewConsole(publisher)
+    try:
+        if args.approve_all:
+            print(f"Se aprobaron {console.approve_all()} publicaciones.")
+        else:
+            console.run()
+    except (KeyboardInterrupt, EOFError):
+        print()
+    finally:
+        console.close()
+        publisher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Persistent index of article URLs that were already published, queued for review or discarded."""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List
+
+from shared.canonical import canonicalise_url
+
+
+class SeenURLIndex:
+    """Remembers canonical URLs across runs so known articles are skipped before any download."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                canonical_url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                seen_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM seen_urls WHERE canonical_url = ?", (canonicalise_url(url),)
+            ).fetchone()
+        return row is not None
+
+    def unseen(self, urls: Iterable[str]) -> List[str]:
+        return [url for url in urls if url not in self]
+
+    def mark(self, urls: Iterable[str], status: str) -> None:
+        """Record ``urls`` with ``status`` (``published``, ``queued``, ``discarded`` or ``duplicate``)."""
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO seen_urls (canonical_url, status, seen_at) VALUES (?, ?, ?)",
+                [(key, status, now) for key in {canonicalise_url(url) for url in urls}],
+            )
+            self._connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
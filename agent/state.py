@@ -1,34 +1,44 @@
-"""Persistence helpers to keep track of the last processed Telegram message."""
+"""Persistence helpers to keep track of the last processed Telegram message of each chat."""
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from .utils import write_atomic
+
 
 @dataclass
 class AgentState:
-    last_message_id: Optional[int] = None
+    cursors: Dict[str, int] = field(default_factory=dict)
     last_run_at: Optional[str] = None
 
     @classmethod
-    def from_file(cls, path: Path) -> "AgentState":
+    def from_file(cls, path: Path, legacy_chat_id: Optional[str] = None) -> "AgentState":
+        """Load the state, attributing the single cursor of older files to ``legacy_chat_id``."""
         if not path.exists():
             return cls()
         data = json.loads(path.read_text(encoding="utf-8"))
-        return cls(
-            last_message_id=data.get("last_message_id"),
-            last_run_at=data.get("last_run_at"),
-        )
+        cursors = {str(chat_id): int(message_id) for chat_id, message_id in (data.get("cursors") or {}).items()}
+        if data.get("last_message_id") is not None and legacy_chat_id and legacy_chat_id not in cursors:
+            cursors[legacy_chat_id] = int(data["last_message_id"])
+        return cls(cursors=cursors, last_run_at=data.get("last_run_at"))
+
+    def cursor(self, chat_id: str) -> Optional[int]:
+        return self.cursors.get(chat_id)
+
+    def advance(self, chat_id: str, message_id: int) -> None:
+        if message_id > self.cursors.get(chat_id, 0):
+            self.cursors[chat_id] = message_id
 
     def to_dict(self) -> Dict[str, Any]:
         return {
-            "last_message_id": self.last_message_id,
+            "cursors": self.cursors,
             "last_run_at": self.last_run_at,
         }
 
     def save(self, path: Path) -> None:
         self.last_run_at = datetime.utcnow().isoformat()
-        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        write_atomic(path, json.dumps(self.to_dict(), indent=2))
@@ -2,9 +2,14 @@
 from __future__ import annotations
 
 import asyncio
+import re
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
 
+from shared.canonical import SCHEME_PATTERN, normalise_url
+
+from .utils import URL_HOST, extract_urls
 
 try:
     from mcp import ClientSession
@@ -12,63 +17,274 @@ except ImportError:  # pragma: no cover - optional dependency
     ClientSession = None  # type: ignore
 
 
+# telegram-mcp exposes `list_messages` by default. The remaining names keep compatibility with
+# alternative servers such as the ones exposing `get_messages`.
+MESSAGE_TOOLS = ("list_messages", "get_messages")
+
+# Entity type names as the Bot API ("url", "text_link"), Telethon ("MessageEntityUrl",
+# "MessageEntityTextUrl") and TDLib ("textEntityTypeUrl", "textEntityTypeTextUrl") spell them,
+# compared lowercase and without separators.
+URL_ENTITY_TYPES = frozenset({"url", "messageentityurl", "textentitytypeurl"})
+TEXT_LINK_ENTITY_TYPES = frozenset({"textlink", "texturl", "messageentitytexturl", "textentitytypetexturl"})
+LINK_SCHEMES = frozenset({"http", "https"})
+
+
 @dataclass
 class TelegramMessage:
     id: int
     date: str
     text: str
     sender: Optional[str]
+    chat_id: str = ""
+    # Links taken from the message entities, or None when the server sent no entities.
+    links: Optional[List[str]] = None
+
+    def urls(self) -> List[str]:
+        """Links of the message: its URL entities when available, otherwise scanned from the text."""
+        return self.links if self.links is not None else extract_urls(self.text)
+
+
+@dataclass
+class MessageBatch:
+    """New messages of a chat that carry text, and the highest message id fetched.
+
+    ``last_id`` also counts photos, stickers and service messages, so the cursor moves past
+    them even though they are not in ``messages``. It is ``None`` when nothing new was fetched.
+    """
+
+    messages: List[TelegramMessage]
+    last_id: Optional[int] = None
+
+
+def _entity_type(entity: Mapping[str, Any]) -> str:
+    kind = entity.get("type") or entity.get("_") or entity.get("@type") or ""
+    if isinstance(kind, Mapping):
+        kind = kind.get("@type") or kind.get("_") or ""
+    return re.sub(r"[^a-z]", "", str(kind).lower())
+
+
+def _is_web_link(url: str) -> bool:
+    """Whether ``url`` is an http(s) link or a bare host such as ``example.com/nota``.
+
+    Checked before :func:`normalise_url`, which would read ``mailto:`` or ``tel:`` links as hosts
+    and give them an https scheme.
+    """
+    if SCHEME_PATTERN.match(url):
+        return urlsplit(url).scheme.lower() in LINK_SCHEMES
+    return URL_HOST.match(url) is not None
+
+
+def entity_urls(text: str, entities: Sequence[Mapping[str, Any]]) -> List[str]:
+    """Return the http(s) links of ``url`` and ``text_link`` entities, normalised, in order.
+
+    Telegram measures entity offsets and lengths in UTF-16 code units, so ``url`` entities are
+    sliced from the UTF-16 encoding of ``text`` instead of the Python string.
+    """
+    encoded: Optional[bytes] = None
+    urls: List[str] = []
+    for entity in entities:
+        kind = _entity_type(entity)
+        if kind in TEXT_LINK_ENTITY_TYPES:
+            nested = entity.get("type")
+            url = entity.get("url") or (nested.get("url") if isinstance(nested, Mapping) else None)
+        elif kind in URL_ENTITY_TYPES:
+            if encoded is None:
+                encoded = text.encode("utf-16-le")
+            start = 2 * int(entity.get("offset", 0))
+            url = encoded[start : start + 2 * int(entity.get("length", 0))].decode("utf-16-le", errors="ignore")
+        else:
+            continue
+        if url:
+            url = url.strip()
+            if _is_web_link(url):
+                urls.append(normalise_url(url))
+    return urls
 
 
 class TelegramMonitor:
-    """High level wrapper around the telegram-mcp server."""
+    """High level wrapper around the telegram-mcp server.
 
-    def __init__(self, server_url: str, api_key: Optional[str], chat_id: str) -> None:
+    A single MCP session is opened lazily and shared by every chat; calls for different chats
+    run concurrently over it, at most ``max_concurrent_calls`` at a time. If the connection
+    drops the session is discarded and re-established once before giving up.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        api_key: Optional[str],
+        chat_ids: Sequence[str],
+        max_concurrent_calls: int = 4,
+    ) -> None:
         if ClientSession is None:
             raise ImportError(
                 "The 'mcp' package is required to connect to the Telegram MCP server. Install it with 'pip install mcp'."
             )
         self.server_url = server_url
         self.api_key = api_key
-        self.chat_id = chat_id
+        self.chat_ids = list(chat_ids)
+        self.max_concurrent_calls = max(1, max_concurrent_calls)
+        self._session_context: Any = None
+        self._session: Any = None
+        self._message_tool: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Created on first use so they belong to the loop that runs the calls.
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._call_slots: Optional[asyncio.Semaphore] = None
+
+    async def _connect(self) -> Any:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._session is None:
+                headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else None
+                context = await ClientSession.connect(self.server_url, extra_headers=headers)
+                self._session = await context.__aenter__()
+                self._session_context = context
+        return self._session
+
+    async def _disconnect(self) -> None:
+        context, self._session_context, self._session = self._session_context, None, None
+        if context is not None:
+            try:
+                await context.__aexit__(None, None, None)
+            except Exception:
+                pass
 
     async def _call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else None
-        async with await ClientSession.connect(self.server_url, extra_headers=headers) as session:
-            response = await session.call_tool(tool_name, arguments)
-            if isinstance(response, dict):
-                return response
-            raise RuntimeError("Unexpected response from MCP server")
-
-    async def fetch_messages(self, since_id: Optional[int] = None, limit: int = 50) -> List[TelegramMessage]:
-        payload = {"chat_id": self.chat_id, "limit": limit}
-        if since_id is not None:
-            payload["offset_id"] = since_id
-
-        # telegram-mcp exposes `list_messages` by default. This block keeps compatibility with
-        # potential alternative tool names such as `get_messages`.
-        try:
-            raw = await self._call_tool("list_messages", payload)
-        except Exception:
-            raw = await self._call_tool("get_messages", payload)
-
-        items = raw.get("messages", raw)
+        if self._call_slots is None:
+            self._call_slots = asyncio.Semaphore(self.max_concurrent_calls)
+        for attempt in range(2):
+            session = await self._connect()
+            try:
+                async with self._call_slots:
+                    response = await session.call_tool(tool_name, arguments)
+                break
+            except (ConnectionError, OSError, asyncio.TimeoutError):
+                # Another chat may already have replaced the broken session.
+                if self._session is session:
+                    await self._disconnect()
+                if attempt:
+                    raise
+        if isinstance(response, dict):
+            return response
+        raise RuntimeError("Unexpected response from MCP server")
+
+    async def _call_message_tool(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self._message_tool is not None:
+            return await self._call_tool(self._message_tool, payload)
+
+        error: Optional[Exception] = None
+        for tool_name in MESSAGE_TOOLS:
+            try:
+                raw = await self._call_tool(tool_name, payload)
+            except Exception as exc:
+                error = exc
+                continue
+            self._message_tool = tool_name
+            return raw
+        assert error is not None
+        raise error
+
+    @staticmethod
+    def _parse_messages(raw: Any, chat_id: str) -> List[TelegramMessage]:
+        items = raw.get("messages", raw) if isinstance(raw, dict) else raw
         messages: List[TelegramMessage] = []
         for item in items:
             message_id = int(item.get("id") or item.get("message_id"))
             text = item.get("text", "") or ""
-            if not text:
-                continue
+            entities = item.get("entities")
             messages.append(
                 TelegramMessage(
                     id=message_id,
                     date=item.get("date", ""),
                     text=text,
                     sender=item.get("sender"),
+                    chat_id=chat_id,
+                    links=entity_urls(text, entities) if isinstance(entities, list) else None,
                 )
             )
         messages.sort(key=lambda message: message.id)
         return messages
 
-    def fetch_messages_sync(self, since_id: Optional[int] = None, limit: int = 50) -> List[TelegramMessage]:
-        return asyncio.run(self.fetch_messages(since_id=since_id, limit=limit))
+    async def iter_messages(
+        self,
+        chat_id: str,
+        since_id: Optional[int] = None,
+        limit: int = 50,
+    ) -> AsyncIterator[Tuple[List[TelegramMessage], int]]:
+        """Yield every message of ``chat_id`` newer than ``since_id`` in pages of at most ``limit`` items.
+
+        Pages are requested until the server returns a short page, so a long outage no longer
+        truncates the backlog to the first ``limit`` messages. Each page comes with the highest
+        id it fetched: messages without text are left out of the page but still advance the
+        cursor, even when none of the page's messages has text.
+        """
+        cursor = since_id
+        while True:
+            payload: Dict[str, Any] = {"chat_id": chat_id, "limit": limit}
+            if cursor is not None:
+                payload["offset_id"] = cursor
+
+            page = self._parse_messages(await self._call_message_tool(payload), chat_id)
+            if cursor is not None:
+                page = [message for message in page if message.id > cursor]
+            if not page:
+                return
+
+            cursor = page[-1].id
+            yield [message for message in page if message.text], cursor
+            if len(page) < limit:
+                return
+
+    async def fetch_messages(
+        self,
+        chat_id: str,
+        since_id: Optional[int] = None,
+        limit: int = 50,
+    ) -> MessageBatch:
+        batch = MessageBatch(messages=[])
+        async for page, last_id in self.iter_messages(chat_id, since_id=since_id, limit=limit):
+            batch.messages.extend(page)
+            batch.last_id = last_id
+        return batch
+
+    async def fetch_all(
+        self,
+        cursors: Mapping[str, Optional[int]],
+        limit: int = 50,
+    ) -> Dict[str, Union[MessageBatch, Exception]]:
+        """Fetch the new messages of every monitored chat concurrently.
+
+        ``cursors`` maps chat ids to the last message already seen. A chat that fails is
+        reported with its exception instead of its batch, so it does not hold back the rest.
+        """
+        results = await asyncio.gather(
+            *(self.fetch_messages(chat_id, since_id=cursors.get(chat_id), limit=limit) for chat_id in self.chat_ids),
+            return_exceptions=True,
+        )
+        return dict(zip(self.chat_ids, results))
+
+    def _run(self, coroutine: Any) -> Any:
+        # The MCP session is bound to the loop that opened it, so every synchronous call goes
+        # through the same long-lived loop instead of `asyncio.run`.
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coroutine)
+
+    def fetch_all_sync(
+        self,
+        cursors: Mapping[str, Optional[int]],
+        limit: int = 50,
+    ) -> Dict[str, Union[MessageBatch, Exception]]:
+        return self._run(self.fetch_all(cursors, limit=limit))
+
+    async def aclose(self) -> None:
+        await self._disconnect()
+
+    def close(self) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.run_until_complete(self.aclose())
+        self._loop.close()
+        self._loop = None
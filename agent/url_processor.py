@@ -1,17 +1,107 @@
 """Utilities to fetch and summarise article content."""
 from __future__ import annotations
 
-import re
-from dataclasses import dataclass
+import base64
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import Optional
-from urllib.parse import urljoin, urlparse
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+from urllib.parse import urlparse
 
+import openai
 import requests
-from bs4 import BeautifulSoup
-from readability import Document
 from openai import OpenAI
 
+from shared.images import can_resize, image_info, resize_to_webp, to_data_uri
+
+from .cache import ProcessedURLCache
+from .metrics import RunMetrics
+from .outbound import OutboundScheduler
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+IMAGE_ACCEPT = "image/webp,image/png,image/jpeg,image/gif;q=0.9,*/*;q=0.1"
+# Rough characters-per-token ratio used to trim article bodies without a tokenizer.
+CHARS_PER_TOKEN = 4
+SUMMARY_SYSTEM_PROMPT = "Eres un asistente que crea resúmenes informativos en español."
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+)
+
+
+class DownloadError(RuntimeError):
+    """Raised when a page is rejected before or while it is being downloaded."""
+
+
+class ImageTooLarge(DownloadError):
+    """Raised when an image is bigger than ``max_image_bytes``."""
+
+
+@dataclass
+class Download:
+    html: str
+    final_url: str
+    content_hash: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+
+
+@dataclass
+class PreparedPage:
+    """A downloaded and extracted page waiting for its summary."""
+
+    url: str
+    final_url: str
+    content_hash: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    title: str
+    description: str
+    image_url: Optional[str]
+    type: str
+    text: str
+    image_candidates: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SummaryResult:
+    summary: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency: float = 0.0
+    batched: bool = False
+
+
+def trim_to_token_budget(text: str, budget: int) -> str:
+    """Cut ``text`` to roughly ``budget`` tokens, ending on a word boundary."""
+    limit = budget * CHARS_PER_TOKEN
+    if budget <= 0 or len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > limit // 2 else cut).rstrip() + " …"
+
+
+def _response_text(response) -> str:
+    text = getattr(response, "output_text", "")
+    if not text:
+        output = getattr(response, "output", [])
+        if output:
+            content = output[0].get("content", [])
+            if content:
+                text = content[0].get("text", "")
+    return text.strip()
+
+
+def _response_usage(response) -> tuple[int, int]:
+    usage = getattr(response, "usage", None)
+    return int(getattr(usage, "input_tokens", 0) or 0), int(getattr(usage, "output_tokens", 0) or 0)
+
 
 @dataclass
 class ProcessedURL:
@@ -24,14 +114,60 @@ class ProcessedURL:
     type: str
 
 
+def _today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def _from_cache(payload: Dict[str, Any]) -> ProcessedURL:
+    """Rebuild a cached result; the release date is the day it is published, not the day it was cached."""
+    return ProcessedURL(**{**payload, "release_date": _today()})
+
+
 class URLProcessor:
     """Fetches HTML pages, extracts relevant data and delegates AI summarisation."""
 
-    def __init__(self, *, api_key: str, summary_model: str, image_model: str, timeout: int = 20) -> None:
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        summary_model: str,
+        image_model: str,
+        timeout: int = 20,
+        max_concurrent_ai_calls: int = 2,
+        max_download_bytes: int = 5 * 1024 * 1024,
+        summary_token_budget: int = 1500,
+        image_size: str = "1024x1024",
+        image_quality: Optional[str] = None,
+        min_image_width: int = 300,
+        min_image_height: int = 150,
+        max_image_width: int = 1280,
+        max_image_bytes: int = 8 * 1024 * 1024,
+        cache: Optional[ProcessedURLCache] = None,
+        scheduler: Optional[OutboundScheduler] = None,
+        metrics: Optional[RunMetrics] = None,
+    ) -> None:
+        # Retries are handled by `scheduler`, which also honours `Retry-After`.
+        self.client = OpenAI(api_key=api_key, max_retries=0)
+        self.cache = cache
         self.summary_model = summary_model
         self.image_model = image_model
         self.timeout = timeout
+        self.max_download_bytes = max_download_bytes
+        self.summary_token_budget = summary_token_budget
+        self.image_size = image_size
+        self.image_quality = image_quality
+        self.min_image_width = min_image_width
+        self.min_image_height = min_image_height
+        self.max_image_width = max_image_width
+        self.max_image_bytes = max_image_bytes
+        # Token usage and latency of the summary of each processed URL, keyed by the requested URL.
+        self.summary_usage: Dict[str, SummaryResult] = {}
+        self.metrics = metrics or RunMetrics()
+        # Shared by every worker thread: per-host and OpenAI rate limits, retries and circuit breakers.
+        self.scheduler = scheduler or OutboundScheduler(
+            key_concurrency={"openai": max_concurrent_ai_calls},
+            transient_errors=TRANSIENT_ERRORS,
+        )
         self.session = requests.Session()
         self.session.headers.update(
             {
@@ -40,121 +176,352 @@ class URLProcessor:
             }
         )
 
-    def _download(self, url: str) -> tuple[str, str]:
-        response = self.session.get(url, timeout=self.timeout)
-        response.raise_for_status()
-        return response.text, response.url
-
-    def _extract_title(self, soup: BeautifulSoup) -> Optional[str]:
-        if soup.title and soup.title.string:
-            return soup.title.string.strip()
-        og_title = soup.find("meta", property="og:title") or soup.find("meta", attrs={"name": "twitter:title"})
-        if og_title and og_title.get("content"):
-            return og_title["content"].strip()
-        return None
+    def _download(self, url: str, validators: Optional[Dict[str, Optional[str]]] = None) -> Download:
+        host = urlparse(url).hostname or url
+        try:
+            with self.metrics.span("download"):
+                download = self.scheduler.call(host, lambda: self._fetch(url, validators))
+        except Exception as error:
+            self.metrics.increment("download_errors", host=host, error=type(error).__name__)
+            raise
+        if download.not_modified:
+            self.metrics.increment("downloads_not_modified")
+        return download
 
-    def _extract_description(self, soup: BeautifulSoup) -> Optional[str]:
-        description = soup.find("meta", attrs={"name": "description"}) or soup.find(
-            "meta", property="og:description"
-        )
-        if description and description.get("content"):
-            return description["content"].strip()
-        return None
+    def _fetch(self, url: str, validators: Optional[Dict[str, Optional[str]]] = None) -> Download:
+        """Stream ``url`` into memory, refusing non-HTML bodies and anything above the byte cap.
+
+        When ``validators`` holds a previous ``ETag``/``Last-Modified`` the request is sent as a
+        conditional GET and a ``304`` answer is reported through ``Download.not_modified``.
+        """
+        headers = {}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        deadline = time.monotonic() + self.timeout
+        with self.session.get(url, timeout=self.timeout, headers=headers, stream=True) as response:
+            if response.status_code == 304 and validators:
+                return Download(html="", final_url=response.url, not_modified=True)
+            response.raise_for_status()
+
+            content_type = response.headers.get("Content-Type", "")
+            mime_type = content_type.split(";", 1)[0].strip().lower()
+            if mime_type and mime_type not in HTML_CONTENT_TYPES:
+                raise DownloadError(f"Tipo de contenido no soportado: {mime_type}")
+            body = self._read_body(response, deadline)
+            encoding = response.encoding if "charset=" in content_type.lower() else "utf-8"
+            return Download(
+                html=body.decode(encoding or "utf-8", errors="replace"),
+                final_url=response.url,
+                content_hash=hashlib.sha256(body).hexdigest(),
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+
+    def _read_body(
+        self,
+        response: requests.Response,
+        deadline: float,
+        limit: Optional[int] = None,
+        error: Type[DownloadError] = DownloadError,
+        what: str = "La página",
+    ) -> bytes:
+        """Read a streamed body, raising ``error`` above ``limit`` bytes or past ``deadline``."""
+        limit = self.max_download_bytes if limit is None else limit
+        declared_length = response.headers.get("Content-Length", "")
+        if declared_length.isdigit() and int(declared_length) > limit:
+            raise error(f"{what} supera el límite de {limit} bytes")
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            received += len(chunk)
+            if received > limit:
+                raise error(f"{what} supera el límite de {limit} bytes")
+            if time.monotonic() > deadline:
+                raise DownloadError(f"La descarga superó {self.timeout} segundos")
+            chunks.append(chunk)
+        body = b"".join(chunks)
+        self.metrics.increment("downloaded_bytes", len(body))
+        return body
+
+    def _fetch_image(self, url: str) -> bytes:
+        deadline = time.monotonic() + self.timeout
+        with self.session.get(url, timeout=self.timeout, headers={"Accept": IMAGE_ACCEPT}, stream=True) as response:
+            response.raise_for_status()
+            return self._read_body(response, deadline, self.max_image_bytes, ImageTooLarge, "La imagen")
+
+    def _embed_image(self, data: bytes) -> Optional[str]:
+        """Check an image and return it as a ``data:`` URI, or ``None`` if it is not usable.
+
+        Formats other than PNG, JPEG, GIF and WebP, and images smaller than ``min_image_width``
+        x ``min_image_height`` (tracking pixels, icons, spacers) are rejected. With Pillow
+        installed the image is also decoded, which rejects broken files, and re-encoded as WebP
+        no wider than ``max_image_width`` when that makes it lighter.
+        """
+        info = image_info(data)
+        if info is None:
+            self.metrics.increment("images", outcome="unsupported")
+            return None
+        if info.width < self.min_image_width or info.height < self.min_image_height:
+            self.metrics.increment("images", outcome="too_small")
+            return None
+        resized = resize_to_webp(data, self.max_image_width)
+        if resized is not None and (len(resized) < len(data) or info.width > self.max_image_width):
+            data, info = resized, image_info(resized) or info
+        elif resized is None and can_resize():
+            self.metrics.increment("images", outcome="broken")
+            return None
+        self.metrics.increment("images", outcome="accepted")
+        return to_data_uri(data, info.mime_type)
+
+    def fetch_image(self, url: str) -> Optional[str]:
+        """Download the image at ``url`` and return it embedded as a ``data:`` URI.
 
-    def _extract_image(self, soup: BeautifulSoup, base_url: str) -> Optional[str]:
-        for attribute in ("og:image", "twitter:image", "twitter:image:src"):
-            meta = soup.find("meta", property=attribute) or soup.find("meta", attrs={"name": attribute})
-            if meta and meta.get("content"):
-                return urljoin(base_url, meta["content"].strip())
-        first_image = soup.find("img")
-        if first_image and first_image.get("src"):
-            return urljoin(base_url, first_image["src"].strip())
+        Returns ``None`` when the image cannot be downloaded, is larger than ``max_image_bytes``
+        or is rejected by the checks of :meth:`_embed_image`, so the next candidate is tried.
+        Oversized images are never linked unchecked.
+        """
+        host = urlparse(url).hostname or url
+        try:
+            with self.metrics.span("download_image"):
+                data = self.scheduler.call(host, lambda: self._fetch_image(url))
+        except ImageTooLarge:
+            self.metrics.increment("images", outcome="too_large")
+            return None
+        except Exception as error:
+            self.metrics.increment("images", outcome="download_error", error=type(error).__name__)
+            return None
+        return self._embed_image(data)
+
+    def choose_image(self, candidates: Sequence[str]) -> Optional[str]:
+        """Return the first usable image among ``candidates``, tried in order."""
+        for url in candidates:
+            image = self.fetch_image(url)
+            if image:
+                return image
         return None
 
-    def _derive_type(self, soup: BeautifulSoup) -> str:
-        article = soup.find("article")
-        if article is not None:
-            return "Artículo"
-        og_type = soup.find("meta", property="og:type")
-        if og_type and og_type.get("content"):
-            return og_type["content"].replace("_", " ").title()
-        return "Noticia"
+    def _summarise_one(self, *, title: str, description: str, body: str) -> SummaryResult:
+        body = trim_to_token_budget(body, self.summary_token_budget)
+        started = time.perf_counter()
+        response = self.scheduler.call(
+            "openai",
+            lambda: self.client.responses.create(
+                model=self.summary_model,
+                input=[
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {
+                        "role": "user",
+                        "content": f"Título: {title}\nDescripción: {description}\nContenido:\n{body}",
+                    },
+                ],
+                max_output_tokens=180,
+            ),
+        )
+        latency = time.perf_counter() - started
+        input_tokens, output_tokens = _response_usage(response)
+        self._record_summary_request(latency, input_tokens, output_tokens, articles=1)
+        return SummaryResult(
+            summary=_response_text(response),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency=latency,
+        )
+
+    def _record_summary_request(self, latency: float, input_tokens: int, output_tokens: int, articles: int) -> None:
+        self.metrics.observe("summarise", latency)
+        self.metrics.increment("openai_requests", kind="summary", model=self.summary_model)
+        self.metrics.increment("openai_tokens", input_tokens, direction="input", model=self.summary_model)
+        self.metrics.increment("openai_tokens", output_tokens, direction="output", model=self.summary_model)
+        self.metrics.increment("summarised_articles", articles)
 
     def summarise(self, *, title: str, description: str, body: str) -> str:
-        prompt = (
-            "Genera un resumen de máximo 3 líneas en español del contenido proporcionado. "
-            "Utiliza un estilo periodístico conciso." 
+        return self._summarise_one(title=title, description=description, body=body).summary
+
+    def summarise_many(self, pages: Sequence[PreparedPage]) -> List[SummaryResult]:
+        """Summarise several pages with a single structured request.
+
+        Each body is trimmed to ``summary_token_budget`` tokens. The model answers with a JSON
+        object holding one summary per article id; articles missing from a malformed or partial
+        answer are summarised individually. Token usage of the batched call is split between the
+        articles in proportion to their prompt and summary lengths.
+        """
+        if len(pages) == 1:
+            page = pages[0]
+            return [self._summarise_one(title=page.title, description=page.description, body=page.text)]
+
+        articles = [
+            "\n".join(
+                (
+                    f"### Artículo {index}",
+                    f"Título: {page.title}",
+                    f"Descripción: {page.description}",
+                    f"Contenido:\n{trim_to_token_budget(page.text, self.summary_token_budget)}",
+                )
+            )
+            for index, page in enumerate(pages)
+        ]
+        instructions = (
+            "Genera para cada artículo un resumen de máximo 3 líneas en español con un estilo periodístico "
+            'conciso. Responde únicamente con JSON de la forma {"summaries": [{"id": <número de artículo>, '
+            '"summary": "<resumen>"}]}.'
         )
-        response = self.client.responses.create(
-            model=self.summary_model,
-            input=[
-                {"role": "system", "content": "Eres un asistente que crea resúmenes informativos en español."},
-                {
-                    "role": "user",
-                    "content": f"Título: {title}\nDescripción: {description}\nContenido:\n{body}",
-                },
-            ],
-            max_output_tokens=180,
+
+        started = time.perf_counter()
+        response = self.scheduler.call(
+            "openai",
+            lambda: self.client.responses.create(
+                model=self.summary_model,
+                input=[
+                    {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                    {"role": "user", "content": instructions + "\n\n" + "\n\n".join(articles)},
+                ],
+                max_output_tokens=180 * len(pages),
+            ),
         )
-        text = getattr(response, "output_text", "")
-        if not text:
-            output = getattr(response, "output", [])
-            if output:
-                content = output[0].get("content", [])
-                if content:
-                    text = content[0].get("text", "")
-        return text.strip()
+        latency = time.perf_counter() - started
+        input_tokens, output_tokens = _response_usage(response)
+        self._record_summary_request(latency, input_tokens, output_tokens, articles=len(pages))
+
+        summaries: Dict[int, str] = {}
+        try:
+            text = _response_text(response)
+            data = json.loads(text[text.find("{") : text.rfind("}") + 1])
+            for item in data.get("summaries", []):
+                index = int(item["id"])
+                summary = str(item.get("summary", "")).strip()
+                if 0 <= index < len(pages) and summary:
+                    summaries[index] = summary
+        except (AttributeError, KeyError, TypeError, ValueError):
+            summaries = {}
+
+        prompt_total = sum(len(article) for article in articles) or 1
+        summary_total = sum(len(summary) for summary in summaries.values()) or 1
+        results: List[SummaryResult] = []
+        for index, page in enumerate(pages):
+            if index not in summaries:
+                results.append(self._summarise_one(title=page.title, description=page.description, body=page.text))
+                continue
+            results.append(
+                SummaryResult(
+                    summary=summaries[index],
+                    input_tokens=round(input_tokens * len(articles[index]) / prompt_total),
+                    output_tokens=round(output_tokens * len(summaries[index]) / summary_total),
+                    latency=latency,
+                    batched=True,
+                )
+            )
+        return results
 
     def generate_image(self, *, title: str, description: str) -> Optional[str]:
         prompt = (
             "Ilustración digital moderna para un artículo titulado '{title}'. "
             "Temática: {description}. Estilo limpio, colores vibrantes, formato 16:9."
         ).format(title=title, description=description[:180])
-        result = self.client.images.generate(model=self.image_model, prompt=prompt, size="1024x1024")
+        options = {"quality": self.image_quality} if self.image_quality else {}
+        with self.metrics.span("generate_image"):
+            result = self.scheduler.call(
+                "openai",
+                lambda: self.client.images.generate(
+                    model=self.image_model, prompt=prompt, size=self.image_size, **options
+                ),
+            )
+        self.metrics.increment("openai_requests", kind="image", model=self.image_model)
         data = getattr(result, "data", [])
         if data:
             first = data[0]
             url = getattr(first, "url", None)
             if url:
-                return url
+                # Links to generated images expire, so the image is kept like any other.
+                return self.fetch_image(url) or url
             b64_json = getattr(first, "b64_json", None)
             if b64_json:
-                return f"data:image/png;base64,{b64_json}"
+                return self._embed_image(base64.b64decode(b64_json)) or f"data:image/png;base64,{b64_json}"
         return None
 
-    def process(self, url: str) -> ProcessedURL:
-        html, final_url = self._download(url)
-        soup = BeautifulSoup(html, "html.parser")
-        try:
-            document = Document(html)
-            article_html = document.summary(html_partial=True)
-            short_title = document.short_title()
-        except Exception:
-            article_html = soup.get_text(separator=" ")
-            short_title = soup.title.string if soup.title and soup.title.string else None
-        article_text = BeautifulSoup(article_html, "html.parser").get_text(separator=" ")
-        article_text = re.sub(r"\s+", " ", article_text).strip()
-
-        title = self._extract_title(soup) or short_title or "Sin título"
-        description = self._extract_description(soup) or article_text[:300]
-        image_url = self._extract_image(soup, final_url)
-        content_type = self._derive_type(soup)
-
-        summary = self.summarise(title=title, description=description, body=article_text)
-        if not summary:
-            summary = (description or article_text)[:240]
-        if not image_url:
-            image_url = self.generate_image(title=title, description=summary)
+    def prepare(self, url: str) -> Union[ProcessedURL, PreparedPage]:
+        """Download and extract ``url``, or return the cached result when there is one."""
+        validators = None
+        if self.cache is not None:
+            cached = self.cache.get_by_url(url)
+            if cached is not None:
+                return _from_cache(cached)
+            validators = self.cache.validators(url)
+
+        download = self._download(url, validators)
+        if download.not_modified and self.cache is not None and validators is not None:
+            cached = self.cache.revalidated(url, validators["content_hash"])
+            if cached is not None:
+                return _from_cache(cached)
+            # The stored result was evicted in the meantime, so fetch the full page again.
+            download = self._download(url)
 
-        parsed = urlparse(final_url)
-        provider = parsed.netloc
+        if self.cache is not None:
+            cached = self.cache.get_by_content(
+                download.content_hash,
+                urls=(url, download.final_url),
+                etag=download.etag,
+                last_modified=download.last_modified,
+            )
+            if cached is not None:
+                return _from_cache(cached)
 
-        return ProcessedURL(
-            title=title,
-            summary=summary,
-            source_url=final_url,
+        # lxml and readability are only loaded once a page actually has to be parsed.
+        from .extraction import extract_page
+
+        with self.metrics.span("parse"):
+            page = extract_page(download.html, download.final_url)
+        return PreparedPage(
+            url=url,
+            final_url=download.final_url,
+            content_hash=download.content_hash,
+            etag=download.etag,
+            last_modified=download.last_modified,
+            title=page.title or "Sin título",
+            description=page.description or page.text[:300],
+            image_url=page.image_url,
+            type=page.type,
+            text=page.text,
+            image_candidates=page.image_candidates,
+        )
+
+    def finish(self, page: PreparedPage, summary: SummaryResult) -> ProcessedURL:
+        """Complete a prepared page with its summary and image.
+
+        The images found on the page are tried in order and the first usable one is embedded;
+        an image is only generated when none of them passes the checks of :meth:`_embed_image`.
+        """
+        self.summary_usage[page.url] = summary
+        text = summary.summary or (page.description or page.text)[:240]
+        image_url = self.choose_image(page.image_candidates or ([page.image_url] if page.image_url else []))
+        if not image_url:
+            image_url = self.generate_image(title=page.title, description=text)
+
+        processed = ProcessedURL(
+            title=page.title,
+            summary=text,
+            source_url=page.final_url,
             image_url=image_url,
-            release_date=datetime.utcnow().strftime("%Y-%m-%d"),
-            provider=provider,
-            type=content_type,
+            release_date=_today(),
+            provider=urlparse(page.final_url).netloc,
+            type=page.type,
         )
+        if self.cache is not None and page.content_hash:
+            self.cache.put(
+                (page.url, page.final_url),
+                page.content_hash,
+                asdict(processed),
+                etag=page.etag,
+                last_modified=page.last_modified,
+            )
+        return processed
+
+    def process(self, url: str) -> ProcessedURL:
+        prepared = self.prepare(url)
+        if isinstance(prepared, ProcessedURL):
+            return prepared
+        summary = self._summarise_one(title=prepared.title, description=prepared.description, body=prepared.text)
+        return self.finish(prepared, summary)
@@ -1,24 +1,115 @@
 """Utility helpers for the monitoring workflow."""
 from __future__ import annotations
 
+import os
 import re
-from typing import Iterable, List
+from pathlib import Path
+from itertools import zip_longest
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
 
-URL_PATTERN = re.compile(
-    r"(https?://(?:www\.|(?!www))[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|www\.[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|https?://(?:www\.|(?!www))[a-zA-Z0-9]+\.[^\s]{2,}|www\.[a-zA-Z0-9]+\.[^\s]{2,})"
-)
+from shared.canonical import canonicalise_url, normalise_url
+
+# A link runs from its scheme (or "www.") to the next whitespace or delimiter, and its host needs
+# at least two non-empty labels (three when it starts with "www.").
+URL_BOUNDARY = re.compile(r"[\s<>\"]")
+URL_HOST = re.compile(r"(?:[A-Za-z]+://)?(?![Ww]{3}\.[^./?#:]+(?:[/?#:]|$))[^./?#:]+(?:\.[^./?#:]+)+(?:[/?#:]|$)")
+TRAILING_PUNCTUATION = frozenset(".,;:!?'\"…»›”’*_~")
+CLOSING_BRACKETS = {")": "(", "]": "[", "}": "{"}
+TRIMMED_CHARACTERS = TRAILING_PUNCTUATION | CLOSING_BRACKETS.keys()
+
+
+def _trim_url(candidate: str) -> str:
+    """Drop sentence punctuation and unbalanced closing brackets from the end of ``candidate``.
+
+    ``https://es.wikipedia.org/wiki/Python_(lenguaje)`` keeps its parenthesis, while
+    ``(ver https://example.com/nota).`` loses ``).``.
+    """
+    brackets: Optional[Dict[str, int]] = None
+    end = len(candidate)
+    while end:
+        char = candidate[end - 1]
+        if char in TRAILING_PUNCTUATION:
+            end -= 1
+            continue
+        if char not in CLOSING_BRACKETS:
+            break
+        if brackets is None:
+            # Counted once, then kept up to date while trimming, so runs of brackets stay linear.
+            brackets = {bracket: candidate.count(bracket) for bracket in "()[]{}"}
+        if brackets[char] <= brackets[CLOSING_BRACKETS[char]]:
+            break
+        brackets[char] -= 1
+        end -= 1
+    return candidate[:end]
+
+
+def scan_urls(text: str) -> List[str]:
+    """Find the links written in ``text``, without normalising them.
+
+    The text is searched for ``://`` and ``www.`` with ``str.find`` and no position is visited
+    more than a bounded number of times, so the cost is linear in the length of the text however
+    it is written.
+    """
+    urls: List[str] = []
+    next_scheme = text.find("://")
+    next_www = text.find("www.")
+    while next_scheme >= 0 or next_www >= 0:
+        if next_www < 0 or 0 <= next_scheme < next_www:
+            separator = next_scheme
+            if text[max(0, separator - 5) : separator].lower() == "https":
+                start = separator - 5
+            elif text[max(0, separator - 4) : separator].lower() == "http":
+                start = separator - 4
+            else:
+                next_scheme = text.find("://", separator + 3)
+                continue
+        else:
+            start = next_www
+        boundary = URL_BOUNDARY.search(text, start)
+        end = boundary.start() if boundary else len(text)
+        url = text[start:end]
+        if url[-1] in TRIMMED_CHARACTERS:
+            url = _trim_url(url)
+        if URL_HOST.match(url):
+            urls.append(url)
+        if 0 <= next_scheme < end:
+            next_scheme = text.find("://", end)
+        if 0 <= next_www < end:
+            next_www = text.find("www.", end)
+    return urls
 
 
 def extract_urls(text: str) -> List[str]:
-    """Extract all URLs from a given string."""
-    return [match.group(0) for match in URL_PATTERN.finditer(text)]
+    """Extract all URLs from a given string, normalised with :func:`normalise_url`."""
+    return [normalise_url(url) for url in scan_urls(text)]
 
 
-def deduplicate(items: Iterable[str]) -> List[str]:
+def deduplicate(items: Iterable[str], key: Callable[[str], str] = canonicalise_url) -> List[str]:
+    """Keep the first occurrence of every item, comparing them through ``key``."""
     seen = set()
     output: List[str] = []
     for item in items:
-        if item not in seen:
+        identity = key(item)
+        if identity not in seen:
             output.append(item)
-            seen.add(item)
+            seen.add(identity)
     return output
+
+
+T = TypeVar("T")
+_MISSING = object()
+
+
+def round_robin(groups: Iterable[Sequence[T]]) -> List[T]:
+    """Interleave ``groups`` one item at a time, so a long group cannot push the others back."""
+    return [item for row in zip_longest(*groups, fillvalue=_MISSING) for item in row if item is not _MISSING]
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Replace ``path`` with ``text`` so readers see either the old or the new file, never half of one."""
+    temporary = path.with_name(f"{path.name}.tmp")
+    with open(temporary, "w", encoding="utf-8") as handle:
+        handle.write(text)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temporary, path)
@@ -1,35 +1,119 @@
 """Main orchestration for the Telegram monitoring agent."""
 from __future__ import annotations
 
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import asdict
-from typing import List, Optional
+from urllib.parse import urlparse
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 
-from .config import Settings
+from .cache import ProcessedURLCache
+from .config import Settings, get_settings
+from .journal import ProgressJournal
+from .metrics import RunMetrics
+from .outbound import OutboundScheduler
+from .polling import AdaptivePollInterval
 from .preview import PreviewConsole
-from .publisher import PostPublisher
+from .retry_queue import RetryQueue
+from .seen import SeenURLIndex
 from .state import AgentState
-from .telegram_monitor import TelegramMonitor
-from .url_processor import ProcessedURL, URLProcessor
-from .utils import deduplicate, extract_urls
+from .telegram_monitor import MessageBatch, TelegramMonitor
+from .utils import deduplicate, round_robin
+
+if TYPE_CHECKING:
+    from .publisher import PostPublisher
+    from .url_processor import PreparedPage, ProcessedURL, SummaryResult, URLProcessor
 
 
 class MonitoringWorkflow:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
+        chat_ids = settings.telegram_chat_ids
+        if not chat_ids:
+            raise ValueError("Configura al menos un chat en TELEGRAM_CHAT_ID o TELEGRAM_CHAT_IDS")
+        # One MCP session serves every chat; the chats are polled concurrently over it.
         self.monitor = TelegramMonitor(
             server_url=settings.telegram_server_url,
             api_key=settings.telegram_api_key,
-            chat_id=settings.telegram_chat_id,
+            chat_ids=chat_ids,
+            max_concurrent_calls=settings.telegram_concurrency,
         )
-        self.processor = URLProcessor(
-            api_key=settings.openai_api_key,
-            summary_model=settings.summary_model,
-            image_model=settings.image_model,
-            timeout=settings.request_timeout,
+        self.metrics = RunMetrics()
+        self.cache = (
+            ProcessedURLCache(settings.cache_file, ttl=settings.cache_ttl, max_bytes=settings.cache_max_bytes)
+            if settings.cache_file
+            else None
         )
-        self.publisher = PostPublisher(settings.backend_base_url, timeout=settings.request_timeout)
+        self._processor: Optional[URLProcessor] = None
+        # In `queue` review mode processed articles go to the backend review queue instead of
+        # waiting for a decision on the console.
+        self.queue_review = settings.review_mode == "queue"
+        self._publisher: Optional[PostPublisher] = None
         self.preview = PreviewConsole()
-        self.state = AgentState.from_file(settings.state_file)
+        self.state = AgentState.from_file(settings.state_file, legacy_chat_id=settings.telegram_chat_id)
+        self.retry_queue = RetryQueue(
+            RetryQueue.path_for(settings.state_file),
+            max_attempts=settings.retry_max_attempts,
+        )
+        self.seen = SeenURLIndex(settings.seen_urls_file)
+        self.journal = ProgressJournal(settings.journal_file)
+        self._publishing: List[str] = []
+
+    @property
+    def processor(self) -> URLProcessor:
+        """Created on first use: runs without new URLs never import OpenAI, lxml or readability."""
+        if self._processor is None:
+            from .url_processor import TRANSIENT_ERRORS, URLProcessor
+
+            settings = self.settings
+            scheduler = OutboundScheduler(
+                rate=settings.outbound_host_rate,
+                concurrency=settings.outbound_host_concurrency,
+                key_rates={"openai": settings.openai_rate_limit},
+                key_concurrency={"openai": settings.openai_concurrency},
+                max_retries=settings.outbound_max_retries,
+                failure_threshold=settings.circuit_failure_threshold,
+                reset_timeout=settings.circuit_reset_timeout,
+                transient_errors=TRANSIENT_ERRORS,
+            )
+            self._processor = URLProcessor(
+                api_key=settings.openai_api_key,
+                summary_model=settings.summary_model,
+                image_model=settings.image_model,
+                image_size=settings.image_size,
+                image_quality=settings.image_quality,
+                min_image_width=settings.image_min_width,
+                min_image_height=settings.image_min_height,
+                max_image_width=settings.image_max_width,
+                max_image_bytes=settings.image_max_bytes,
+                timeout=settings.request_timeout,
+                max_concurrent_ai_calls=settings.openai_concurrency,
+                max_download_bytes=settings.max_download_bytes,
+                summary_token_budget=settings.summary_token_budget,
+                cache=self.cache,
+                scheduler=scheduler,
+                metrics=self.metrics,
+            )
+        return self._processor
+
+    @property
+    def publisher(self) -> PostPublisher:
+        """Created on first use, like :attr:`processor`, so quiet runs never import ``requests``."""
+        if self._publisher is None:
+            from .publisher import PostPublisher
+
+            settings = self.settings
+            self._publisher = PostPublisher(
+                settings.backend_base_url,
+                timeout=settings.request_timeout,
+                batch_size=settings.publish_batch_size,
+                retries=settings.publish_retries,
+                batch_path="/api/review" if self.queue_review else "/api/posts/batch",
+                metrics=self.metrics,
+            )
+        return self._publisher
 
     def _review(self, processed: ProcessedURL) -> Optional[ProcessedURL]:
         while True:
@@ -51,51 +135,413 @@ class MonitoringWorkflow:
                     )
                 print("Se actualizó la previsualización. Vuelve a revisar los datos.")
 
-    def run_once(self) -> None:
-        print("📡 Recuperando mensajes desde Telegram...")
-        messages = self.monitor.fetch_messages_sync(since_id=self.state.last_message_id)
-        if not messages:
-            print("No hay mensajes nuevos.")
-            return
+    def _record_summaries(self, pages: List[PreparedPage], summaries: List[SummaryResult]) -> None:
+        for page, summary in zip(pages, summaries):
+            self.journal.advance(page.url, "summarised", asdict(summary))
 
-        urls_to_process: List[str] = []
-        for message in messages:
-            urls = extract_urls(message.text)
-            urls_to_process.extend(urls)
-            self.state.last_message_id = message.id
+    def _process_one(self, url: str, summary: Optional[SummaryResult]) -> ProcessedURL:
+        from .url_processor import ProcessedURL
 
-        unique_urls = deduplicate(urls_to_process)
-        if not unique_urls:
-            print("Los mensajes nuevos no contienen URLs.")
-            self.state.save(self.settings.state_file)
+        prepared = self.processor.prepare(url)
+        if isinstance(prepared, ProcessedURL):
+            return prepared
+        if summary is None:
+            summary = self.processor.summarise_many([prepared])[0]
+            self._record_summaries([prepared], [summary])
+        return self._finish(prepared, summary)
+
+    def _finish(self, page: PreparedPage, summary: SummaryResult) -> ProcessedURL:
+        # Journaled from the worker thread so the image is kept even if the run stops before
+        # the result is reviewed.
+        processed = self.processor.finish(page, summary)
+        self.journal.advance(page.url, "processed", asdict(processed))
+        return processed
+
+    def _process_urls(
+        self,
+        urls: List[str],
+        summaries: Optional[Dict[str, SummaryResult]] = None,
+    ) -> Iterator[Tuple[str, Optional[ProcessedURL], Optional[Exception]]]:
+        """Process URLs concurrently and yield each result as soon as it is ready.
+
+        Prepared pages are summarised in batches of ``summary_batch_size``; a partial batch is sent
+        as soon as no more downloads are in flight. Pages listed in ``summaries`` were summarised by
+        an interrupted run and skip the summary request. Failures are yielded alongside their URL
+        instead of being raised so a single broken page never interrupts the rest of the batch.
+        """
+        summaries = summaries or {}
+        workers = max(1, self.settings.processing_workers)
+        if workers == 1 or len(urls) <= 1:
+            for url in urls:
+                try:
+                    yield url, self._process_one(url, summaries.get(url)), None
+                except Exception as error:
+                    yield url, None, error
             return
 
-        print(f"Se encontraron {len(unique_urls)} URLs para procesar.")
+        from .url_processor import ProcessedURL
 
-        for url in unique_urls:
+        # Stages: `prepare` downloads and extracts each URL, `summarise` sends up to
+        # `summary_batch_size` prepared pages in one OpenAI request, and `finish` adds the image.
+        # A scheduler thread hands work from one stage to the next and queues finished results,
+        # so the pipeline keeps moving while the consumer is busy (for example in a review).
+        batch_size = max(1, self.settings.summary_batch_size)
+        executor = ThreadPoolExecutor(max_workers=min(workers, len(urls)), thread_name_prefix="url-worker")
+        results: "queue.Queue[Optional[Tuple[str, Optional[ProcessedURL], Optional[Exception]]]]" = queue.Queue()
+        stop = threading.Event()
+        submitting = threading.Lock()
+        failures: List[BaseException] = []
+        pending: Dict[Future, Tuple[str, Any]] = {}
+
+        def submit(stage: str, item: Any, function: Any, *args: Any) -> None:
+            with submitting:
+                if not stop.is_set():
+                    pending[executor.submit(function, *args)] = (stage, item)
+
+        def schedule() -> None:
+            waiting: List[PreparedPage] = []
             try:
-                processed = self.processor.process(url)
-            except Exception as error:
-                print(f"Error procesando {url}: {error}")
-                continue
+                for url in urls:
+                    submit("prepare", url, self.processor.prepare, url)
+                while pending and not stop.is_set():
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    if stop.is_set():
+                        return
+                    for future in done:
+                        stage, item = pending.pop(future)
+                        if stage == "summarise":
+                            try:
+                                summaries_batch = future.result()
+                            except Exception as error:
+                                for page in item:
+                                    results.put((page.url, None, error))
+                                continue
+                            self._record_summaries(item, summaries_batch)
+                            for page, summary in zip(item, summaries_batch):
+                                submit("finish", page.url, self._finish, page, summary)
+                            continue
+                        try:
+                            result = future.result()
+                        except Exception as error:
+                            results.put((item, None, error))
+                            continue
+                        if isinstance(result, ProcessedURL):
+                            results.put((item, result, None))
+                        elif result.url in summaries:
+                            submit("finish", result.url, self._finish, result, summaries[result.url])
+                        else:
+                            waiting.append(result)
+
+                    preparing = any(stage == "prepare" for stage, _ in pending.values())
+                    while waiting and (len(waiting) >= batch_size or not preparing):
+                        batch, waiting = waiting[:batch_size], waiting[batch_size:]
+                        submit("summarise", batch, self.processor.summarise_many, batch)
+            except BaseException as error:
+                failures.append(error)
+            finally:
+                results.put(None)
+
+        scheduler = threading.Thread(target=schedule, name="url-scheduler", daemon=True)
+        scheduler.start()
+        try:
+            while True:
+                item = results.get()
+                if item is None:
+                    break
+                yield item
+            if failures:
+                raise failures[0]
+        finally:
+            with submitting:
+                stop.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+            scheduler.join()
+            executor.shutdown(wait=True)
+
+    def _defer(self, url: str, error: Optional[Exception]) -> None:
+        """Queue ``url`` for the next run when it failed for a transient reason.
 
-            reviewed = self._review(processed)
-            if not reviewed:
-                print("Publicación descartada por el usuario.")
+        The retry queue is saved before the journal entry is completed, so a crash in between
+        leaves the URL in at least one of them.
+        """
+        if error is None or not self.processor.scheduler.is_transient(error):
+            self.retry_queue.remove(url)
+        elif self.retry_queue.add(url, error):
+            print("Se reintentará en la próxima ejecución.")
+        else:
+            print(f"Se descarta {url} tras {self.retry_queue.max_attempts} intentos fallidos.")
+        self.retry_queue.save()
+        self.journal.complete([url])
+
+    def _report_published(self, results: List[Dict[str, Any]]) -> None:
+        # The publisher answers in the order the posts were queued.
+        urls, self._publishing = self._publishing[: len(results)], self._publishing[len(results) :]
+        for url, result in zip(urls, results):
+            status = result.get("status")
+            self.metrics.increment("publish_results", status=status)
+            seen_status = "published"
+            if status == "created":
+                print(f"✅ Publicación creada con ID {result['item'].get('id')}")
+            elif status == "queued":
+                print(f"📝 Enviado a la cola de revisión con ID {result['item'].get('id')}")
+                seen_status = "queued"
+            elif status == "exists" and self.queue_review:
+                print(f"ℹ️ El artículo ya estaba en la cola de revisión con ID {result['item'].get('id')}")
+                seen_status = "queued"
+            elif status in ("exists", "published"):
+                print(f"ℹ️ El artículo ya estaba publicado con ID {result['item'].get('id')}")
+            else:
+                print(f"Error al publicar el contenido: {result.get('details') or result.get('error')}")
+                self.journal.complete([url])
                 continue
+            self.seen.mark([url, result["item"]["source_url"]], seen_status)
+            self.journal.complete([url])
+
+    def _publish_failed(self, error: Exception) -> None:
+        # The approved posts stay in the journal and are sent again on the next run; the backend
+        # ignores the ones that did arrive.
+        print(f"Error al publicar el contenido: {error}")
+        print("Las publicaciones aprobadas se enviarán en la próxima ejecución.")
+        self._publishing = []
 
-            payload = asdict(reviewed)
+    def _publish(self, url: str, payload: Dict[str, Any]) -> None:
+        """Queue an approved post; the publisher sends it once its batch is full."""
+        self.journal.advance(url, "approved", payload)
+        self._publishing.append(url)
+        if self.publisher.pending + 1 >= self.publisher.batch_size:
             print("Publicando en la aplicación web...")
+        try:
+            self._report_published(self.publisher.enqueue(payload))
+        except Exception as error:
+            self._publish_failed(error)
+
+    def _flush_publisher(self) -> None:
+        if self._publisher is None or not self._publisher.pending:
+            return
+        print(f"Publicando {self.publisher.pending} publicaciones pendientes en la aplicación web...")
+        try:
+            self._report_published(self.publisher.flush())
+        except Exception as error:
+            self._publish_failed(error)
+
+    def _checkpoint(self, batches: Dict[str, MessageBatch]) -> None:
+        """Journal the URLs of every chat and only then move each chat's cursor past them.
+
+        URLs are journaled alternating between chats, which is the order they are processed
+        in, so a busy chat cannot hold back the links shared in quieter ones. Cursors move to
+        the highest id fetched, past trailing messages without text.
+        """
+        per_chat = [
+            [(url, message.id) for message in batch.messages for url in deduplicate(message.urls())]
+            for batch in batches.values()
+        ]
+        self.journal.record_fetched(round_robin(per_chat))
+        for chat_id, batch in batches.items():
+            self.state.advance(chat_id, batch.last_id)
+        self.state.save(self.settings.state_file)
+
+    def _fetch_messages(self) -> Dict[str, MessageBatch]:
+        """New messages of every chat that has some; a chat that cannot be read is skipped."""
+        chat_ids = self.monitor.chat_ids
+        print(f"📡 Recuperando mensajes de {len(chat_ids)} chat(s) desde Telegram...")
+        with self.metrics.span("fetch_messages"):
+            results = self.monitor.fetch_all_sync(self.state.cursors)
+        batches: Dict[str, MessageBatch] = {}
+        errors: List[Exception] = []
+        for chat_id, result in results.items():
+            if isinstance(result, Exception):
+                print(f"No se pudieron recuperar los mensajes del chat {chat_id}: {result}")
+                self.metrics.increment("fetch_errors", chat=chat_id, error=type(result).__name__)
+                errors.append(result)
+                continue
+            self.metrics.increment("messages", len(result.messages), chat=chat_id)
+            if result.last_id is not None:
+                batches[chat_id] = result
+                if len(chat_ids) > 1:
+                    print(f"  · {chat_id}: {len(result.messages)} mensajes nuevos")
+        if errors and len(errors) == len(chat_ids):
+            raise errors[0]
+        return batches
+
+    def run_once(self) -> int:
+        """Run a single monitoring cycle and return the number of new messages fetched.
+
+        A run report with stage timings and counters is written to ``AGENT_REPORT_FILE`` and
+        pushed to the backend even when the cycle fails.
+        """
+        self.metrics.reset()
+        cache_before = self.cache.stats() if self.cache is not None else {}
+        try:
+            return self._run_cycle()
+        finally:
+            self._emit_report(cache_before)
+
+    def _emit_report(self, cache_before: Dict[str, int]) -> None:
+        if self.cache is not None:
+            for result, value in self.cache.stats().items():
+                self.metrics.increment("cache_lookups", value - cache_before.get(result, 0), result=result)
+        report = self.metrics.report()
+        if self.settings.report_file:
+            try:
+                RunMetrics.write(self.settings.report_file, report)
+            except OSError as error:
+                print(f"No se pudo guardar el informe de la ejecución: {error}")
+        if self.settings.push_metrics:
+            if not any(counter["value"] for counter in report["counters"]):
+                # Runs that found nothing to do (the usual cron case) only say that they ran, so
+                # the backend still sees the agent alive.
+                report = {key: report[key] for key in ("started_at", "finished_at", "duration_seconds")}
             try:
-                created = self.publisher.publish(payload)
-                print(f"✅ Publicación creada con ID {created.get('id')}")
+                RunMetrics.push(self.settings.backend_base_url, report)
             except Exception as error:
-                print(f"Error al publicar el contenido: {error}")
+                print(f"No se pudieron enviar las métricas al backend: {error}")
 
-        self.state.save(self.settings.state_file)
+    def _run_cycle(self) -> int:
+        interrupted = len(self.journal)
+        if interrupted:
+            print(f"Se reanudan {interrupted} URLs de una ejecución interrumpida.")
+        batches = self._fetch_messages()
+        message_count = sum(len(batch.messages) for batch in batches.values())
+        retry_urls = self.retry_queue.urls()
+        if batches:
+            self._checkpoint(batches)
+        else:
+            print("No hay mensajes nuevos.")
+            if not retry_urls and not interrupted:
+                return 0
+
+        if retry_urls:
+            print(f"Se reintentan {len(retry_urls)} URLs que fallaron en ejecuciones anteriores.")
+        entries = {entry.url: entry for entry in self.journal.entries()}
+        unique_urls = deduplicate(list(entries) + retry_urls)
+        # Links to the same article shared in different messages only need to be handled once.
+        self.journal.complete(set(entries) - set(unique_urls))
+        new_urls = self.seen.unseen(unique_urls)
+        if len(new_urls) < len(unique_urls):
+            print(f"Se omiten {len(unique_urls) - len(new_urls)} URLs ya publicadas o descartadas.")
+            known = set(unique_urls) - set(new_urls)
+            self.journal.complete(known)
+            for url in known:
+                self.retry_queue.remove(url)
+        unique_urls = new_urls
+        if not unique_urls:
+            print("Los mensajes nuevos no contienen URLs nuevas.")
+            self.retry_queue.save()
+            return message_count
+
+        print(f"Se encontraron {len(unique_urls)} URLs para procesar.")
+        from .url_processor import ProcessedURL, SummaryResult
+
+        stages = {url: entries[url].stage if url in entries else "fetched" for url in unique_urls}
+        summaries = {
+            url: SummaryResult(**entries[url].payload) for url, stage in stages.items() if stage == "summarised"
+        }
+        ready = [
+            (url, ProcessedURL(**entries[url].payload), None) for url, stage in stages.items() if stage == "processed"
+        ]
+        to_process = [url for url, stage in stages.items() if stage in ("fetched", "summarised")]
+
+        # Workers keep fetching and summarising in the background while the operator reviews
+        # whichever preview finished first.
+        try:
+            for url, stage in stages.items():
+                if stage == "approved":
+                    self._publish(url, entries[url].payload)
+            for url, processed, error in chain(ready, self._process_urls(to_process, summaries)):
+                if error is not None or processed is None:
+                    print(f"Error procesando {url}: {error}")
+                    self.metrics.increment("url_errors", host=urlparse(url).hostname, error=type(error).__name__)
+                    self._defer(url, error)
+                    continue
+                self.retry_queue.remove(url)
+                usage = self.processor.summary_usage.pop(url, None)
+                if usage is not None:
+                    mode = "en lote" if usage.batched else "individual"
+                    print(
+                        f"Resumen de {url} ({mode}): {usage.input_tokens} tokens de entrada, "
+                        f"{usage.output_tokens} de salida, {usage.latency:.1f} s."
+                    )
+                if processed.source_url != url and processed.source_url in self.seen:
+                    # The link redirected to an article that was already handled.
+                    print(f"Se omite {url}: redirige a un artículo ya publicado o descartado.")
+                    self.seen.mark([url], "duplicate")
+                    self.journal.complete([url])
+                    self.metrics.increment("urls", outcome="duplicate")
+                    continue
+
+                if self.queue_review:
+                    # Reviewers decide later with `python -m agent.review` or the API, so
+                    # processing never waits for them.
+                    self.metrics.increment("urls", outcome="queued")
+                    self._publish(url, asdict(processed))
+                    continue
+
+                with self.metrics.span("review_wait"):
+                    reviewed = self._review(processed)
+                if not reviewed:
+                    print("Publicación descartada por el usuario.")
+                    self.seen.mark([url, processed.source_url], "discarded")
+                    self.journal.complete([url])
+                    self.metrics.increment("urls", outcome="discarded")
+                    continue
+
+                self.metrics.increment("urls", outcome="approved")
+                self._publish(url, asdict(reviewed))
+        finally:
+            self._flush_publisher()
+            self.retry_queue.save()
+
+        if self.cache is not None:
+            stats = self.cache.stats()
+            print(
+                f"Caché: {stats['hits']} aciertos por URL, {stats['content_hits']} por contenido, "
+                f"{stats['revalidations']} revalidadas (304), {stats['misses']} fallos."
+            )
+        return message_count
+
+    def close(self) -> None:
+        self.monitor.close()
+        if self._publisher is not None:
+            self._publisher.close()
+        self.seen.close()
+        self.journal.close()
+        if self.cache is not None:
+            self.cache.close()
 
 
 def run_workflow(settings: Optional[Settings] = None) -> None:
-    settings = settings or Settings()
+    settings = settings or get_settings()
+    workflow = MonitoringWorkflow(settings)
+    try:
+        workflow.run_once()
+    finally:
+        workflow.close()
+
+
+def watch_workflow(settings: Optional[Settings] = None, stop_event: Optional[threading.Event] = None) -> None:
+    """Keep the workflow warm and poll Telegram until ``stop_event`` is set."""
+    settings = settings or get_settings()
+    stop_event = stop_event or threading.Event()
     workflow = MonitoringWorkflow(settings)
-    workflow.run_once()
+    interval = AdaptivePollInterval(
+        minimum=settings.poll_interval_min,
+        maximum=settings.poll_interval_max,
+        current=settings.poll_interval,
+        burst_threshold=settings.poll_burst_threshold,
+    )
+    try:
+        while not stop_event.is_set():
+            try:
+                message_count = workflow.run_once()
+            except Exception as error:
+                print(f"Error en el ciclo de monitoreo: {error}")
+                message_count = 0
+            delay = interval.update(message_count)
+            if stop_event.is_set():
+                break
+            print(f"⏳ Próxima comprobación en {delay:.0f} segundos.")
+            stop_event.wait(delay)
+    finally:
+        workflow.state.save(settings.state_file)
+        workflow.close()
+        print("Agente detenido. Estado guardado.")
@@ -1,46 +1,516 @@
 """Flask REST API exposing the published Telegram posts."""
 from __future__ import annotations
 
+import html
+import re
+import time
+from datetime import date
 from http import HTTPStatus
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, send_file
 from flask_cors import CORS
 
-from .database import get_connection, initialise_database
+from shared.canonical import canonicalise_url
+from shared.images import can_resize
+
+from .blobs import (
+    IMAGE_URL_PREFIX,
+    InlineImage,
+    create_thumbnails,
+    decode_data_uri,
+    find_image,
+    find_thumbnail,
+    is_data_uri,
+    store_data_uri,
+    store_inline_image,
+)
+from .cache import CachedResponse, ResponseCache
+from .compression import compress_response, negotiate
+from .database import get_connection, get_data_version, initialise_database
+from .events import PostBroadcaster
+from .metrics import MetricsRegistry
+from .serialisation import page_body, row_encoder
+from .snapshots import SNAPSHOT_DIR, SnapshotWriter
 
 app = Flask(__name__)
 CORS(app)
 
+REQUIRED_FIELDS = {"title", "summary", "source_url", "release_date"}
+OPTIONAL_FIELDS = ("image_url", "provider", "type")
+POST_COLUMNS = (
+    "id", "title", "summary", "source_url", "image_url", "image_srcset", "release_date", "provider", "type", "created_at"
+)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+MAX_BATCH_SIZE = 100
+SEARCH_TERM = re.compile(r"\w+")
+MAX_SEARCH_TERMS = 12
+# bm25 weights for the `title`, `summary` and `provider` columns of `posts_fts`.
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0)
+# Private-use characters mark matches in SQLite snippets; they become `<mark>` after escaping.
+HIGHLIGHT_START, HIGHLIGHT_END = "\ue000", "\ue001"
+# Seconds between keep-alive comments on idle streams; also bounds how late a post created by
+# another server process shows up.
+STREAM_HEARTBEAT = 15.0
+STREAM_RETRY_MS = 3000
+IMAGE_MAX_AGE = 365 * 24 * 3600
+# A post whose canonical URL already exists is not inserted again; `_insert_post` then returns
+# the stored one, which makes creation idempotent for retries and re-shared links.
+INSERT_POST_SQL = f"""
+    INSERT INTO posts (title, summary, source_url, image_url, image_srcset, release_date, provider, type, canonical_url)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (canonical_url) DO NOTHING
+    RETURNING {', '.join(POST_COLUMNS)}
+"""
+
+REVIEW_STATUSES = ("pending", "approved", "discarded")
+REVIEW_COLUMNS = POST_COLUMNS + ("status", "post_id", "reviewed_at")
+REVIEW_EDITABLE_FIELDS = ("title", "summary", "image_url")
+INSERT_REVIEW_SQL = f"""
+    INSERT INTO review_items (title, summary, source_url, image_url, image_srcset, release_date, provider, type, canonical_url)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (canonical_url) DO NOTHING
+    RETURNING {', '.join(REVIEW_COLUMNS)}
+"""
+
+response_cache = ResponseCache()
+post_events = PostBroadcaster()
+metrics = MetricsRegistry()
+snapshots = SnapshotWriter(
+    SNAPSHOT_DIR, POST_COLUMNS, lambda error: app.logger.error("Could not write post snapshots: %s", error)
+)
+
+
+def externalise_inline_images() -> None:
+    """Move images stored inline as ``data:`` URIs by older versions into the blob store."""
+    with get_connection() as connection:
+        rows = connection.execute("SELECT id, image_url FROM posts WHERE image_url LIKE 'data:%'").fetchall()
+        for row in rows:
+            try:
+                image_url = store_data_uri(row["image_url"])
+            except ValueError:
+                continue
+            connection.execute(
+                "UPDATE posts SET image_url = ?, image_srcset = ? WHERE id = ?",
+                (image_url, create_thumbnails(image_url), row["id"]),
+            )
+        connection.commit()
+
+
+def create_missing_thumbnails() -> None:
+    """Create the thumbnails of stored images that predate them, or Pillow being installed."""
+    if not can_resize():
+        return
+    with get_connection() as connection:
+        for table in ("posts", "review_items"):
+            rows = connection.execute(
+                f"SELECT id, image_url FROM {table} WHERE image_url LIKE '{IMAGE_URL_PREFIX}%' AND image_srcset IS NULL"
+            ).fetchall()
+            for row in rows:
+                srcset = create_thumbnails(row["image_url"])
+                if srcset is not None:
+                    connection.execute(f"UPDATE {table} SET image_srcset = ? WHERE id = ?", (srcset, row["id"]))
+        connection.commit()
+
+
 initialise_database()
+externalise_inline_images()
+create_missing_thumbnails()
+snapshots.write_now()
 
-REQUIRED_FIELDS = {"title", "summary", "source_url", "release_date"}
+
+@app.before_request
+def _start_request_timer() -> None:
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        # The route template (`/api/posts/<int:post_id>`) keeps the number of series bounded.
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.observe_request(route, request.method, response.status_code, time.perf_counter() - started)
+    return response
+
+
+@app.after_request
+def _compress_response(response):
+    return compress_response(response, request.accept_encodings)
 
 
 def serialise_row(row) -> Dict[str, Any]:
     return {key: row[key] for key in row.keys()}
 
 
+def _json_body(payload: Any) -> bytes:
+    return app.json.dumps(payload).encode("utf-8")
+
+
+def _conditional_response(cached: CachedResponse):
+    """Serve a cached body with a strong ETag, answering ``304`` when the client already has it.
+
+    The body is compressed with the encoding negotiated from ``Accept-Encoding``, once per
+    cached entry. Each encoding has its own ETag, as strong validators identify exact bytes.
+    """
+    encoding = negotiate(request.accept_encodings, len(cached.body))
+    response = app.response_class(cached.encoded(encoding), mimetype="application/json")
+    response.set_etag(cached.etag if encoding is None else f"{cached.etag}-{encoding}")
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+def _int_arg(name: str, default: Optional[int] = None, minimum: int = 0, maximum: Optional[int] = None) -> Optional[int]:
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer") from None
+    if value < minimum or (maximum is not None and value > maximum):
+        bounds = f"between {minimum} and {maximum}" if maximum is not None else f">= {minimum}"
+        raise ValueError(f"'{name}' must be {bounds}")
+    return value
+
+
+def _fields_arg() -> List[str]:
+    """Columns requested through ``?fields=``. ``id`` is always included as it is the cursor."""
+    raw = request.args.get("fields")
+    if not raw:
+        return list(POST_COLUMNS)
+    requested = [field.strip() for field in raw.split(",") if field.strip()]
+    unknown = sorted(set(requested).difference(POST_COLUMNS))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [column for column in POST_COLUMNS if column in requested and column != "id"]
+
+
+def _filter_args() -> Tuple[List[str], List[Any], str]:
+    """Conditions for the ``provider``, ``type``, ``date_from`` and ``date_to`` filters.
+
+    Returns the SQL conditions on ``posts``, their parameters and a cache key fragment. Dates are
+    ``YYYY-MM-DD`` and both ends of the range are inclusive.
+    """
+    conditions: List[str] = []
+    parameters: List[Any] = []
+    for name in ("provider", "type"):
+        value = request.args.get(name)
+        if value:
+            conditions.append(f"posts.{name} = ?")
+            parameters.append(value)
+    for name, operator in (("date_from", ">="), ("date_to", "<=")):
+        value = request.args.get(name)
+        if not value:
+            continue
+        try:
+            value = date.fromisoformat(value).isoformat()
+        except ValueError:
+            raise ValueError(f"'{name}' must be a date in YYYY-MM-DD format") from None
+        conditions.append(f"posts.release_date {operator} ?")
+        parameters.append(value)
+    key = ":".join(request.args.get(name, "") for name in ("provider", "type", "date_from", "date_to"))
+    return conditions, parameters, key
+
+
+def _match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix."""
+    terms = SEARCH_TERM.findall(query)[:MAX_SEARCH_TERMS]
+    if not terms:
+        raise ValueError("'q' must contain at least one word")
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlight(text: Optional[str]) -> str:
+    return html.escape(text or "").replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>")
+
+
+def _posts_created() -> None:
+    """Drop cached listings, wake up the clients streaming new posts and refresh the snapshots."""
+    response_cache.clear()
+    post_events.notify()
+    snapshots.schedule()
+
+
+def _prepare_post(payload: Any) -> Tuple[Any, ...]:
+    """Validate a post payload and return the values for ``INSERT_POST_SQL``.
+
+    Inline ``data:`` images are decoded and checked here but only written to the blob store by
+    :func:`_store_image`, once the post is known not to exist yet. Raises ``ValueError`` with a
+    client-facing message when the payload is invalid.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Post payload must be a JSON object")
+    missing = {field for field in REQUIRED_FIELDS if payload.get(field) is None}
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(sorted(missing))}")
+    wrong = sorted(
+        field
+        for field in (*REQUIRED_FIELDS, *OPTIONAL_FIELDS)
+        if payload.get(field) is not None and not isinstance(payload[field], str)
+    )
+    if wrong:
+        raise ValueError(f"Fields must be strings: {', '.join(wrong)}")
+
+    image_url = payload.get("image_url")
+    if is_data_uri(image_url):
+        image_url = decode_data_uri(image_url)
+
+    source_url = payload["source_url"].strip()
+    return (
+        payload["title"].strip(),
+        payload["summary"].strip(),
+        source_url,
+        image_url,
+        None,
+        payload["release_date"].strip(),
+        payload.get("provider"),
+        payload.get("type"),
+        canonicalise_url(source_url),
+    )
+
+
+def _store_image(values: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """Write the inline image of prepared values to the blob store and fill in its ``srcset``.
+
+    Only called for rows about to be inserted, so skipped duplicates leave no orphan files.
+    """
+    title, summary, source_url, image_url, image_srcset, *rest = values
+    if isinstance(image_url, InlineImage):
+        image_url = store_inline_image(image_url)
+    if image_srcset is None:
+        image_srcset = create_thumbnails(image_url)
+    return (title, summary, source_url, image_url, image_srcset, *rest)
+
+
+def _insert_post(connection, values: Tuple[Any, ...]) -> Tuple[Any, bool]:
+    """Insert a prepared post and return ``(row, created)``.
+
+    When the canonical URL is already stored the existing row is returned with ``created`` set
+    to ``False``, without storing the post's image.
+    """
+    select_existing = f"SELECT {', '.join(POST_COLUMNS)} FROM posts WHERE canonical_url = ?"
+    existing = connection.execute(select_existing, (values[-1],)).fetchone()
+    if existing is not None:
+        return existing, False
+    row = connection.execute(INSERT_POST_SQL, _store_image(values)).fetchone()
+    if row is not None:
+        return row, True
+    # Another server process inserted the same article in the meantime.
+    return connection.execute(select_existing, (values[-1],)).fetchone(), False
+
+
+def _prepare_batch() -> Tuple[List[Optional[Dict[str, Any]]], List[Tuple[int, Tuple[Any, ...]]]]:
+    """Validate a ``{"items": [...]}`` request body.
+
+    Returns the result list, already holding an error entry for every invalid item, and the
+    ``(index, values)`` pairs of the valid ones. Raises ``ValueError`` when the body itself is
+    malformed.
+    """
+    if not request.is_json:
+        raise ValueError("Request payload must be JSON")
+    payload = request.get_json(force=True)
+    items = payload.get("items") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError("'items' must be a non-empty list")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"A batch accepts at most {MAX_BATCH_SIZE} items")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    prepared = []
+    for index, item in enumerate(items):
+        try:
+            prepared.append((index, _prepare_post(item)))
+        except ValueError as error:
+            results[index] = {"index": index, "status": "error", "error": "invalid_request", "details": str(error)}
+    return results, prepared
+
+
+def _id_list(payload: Dict[str, Any], name: str) -> List[int]:
+    values = payload.get(name, [])
+    if not isinstance(values, list) or not all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+        raise ValueError(f"'{name}' must be a list of integer ids")
+    return values
+
+
 @app.get("/api/posts")
 def list_posts():
+    """Return one page of posts, newest first.
+
+    ``before_id`` continues after the last item of a previous page (keyset pagination on
+    ``created_at, id``), ``since_id`` only returns posts newer than a known id and ``fields``
+    restricts the serialised columns. ``provider``, ``type``, ``date_from`` and ``date_to``
+    filter the posts.
+    """
+    try:
+        limit = _int_arg("limit", default=DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+        before_id = _int_arg("before_id")
+        since_id = _int_arg("since_id")
+        columns = _fields_arg()
+        conditions, parameters, filter_key = _filter_args()
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
+
+    if before_id is not None:
+        conditions.append("(created_at, id) < (SELECT created_at, id FROM posts WHERE id = ?)")
+        parameters.append(before_id)
+    if since_id is not None:
+        conditions.append("id > ?")
+        parameters.append(since_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cache_key = f"list:{limit}:{before_id}:{since_id}:{','.join(columns)}:{filter_key}"
     with get_connection() as connection:
-        rows = connection.execute(
-            "SELECT id, title, summary, source_url, image_url, release_date, provider, type, created_at FROM posts ORDER BY created_at DESC"
-        ).fetchall()
-    items: List[Dict[str, Any]] = [serialise_row(row) for row in rows]
-    return jsonify({"items": items})
+        version = get_data_version(connection)
+        cached = response_cache.get(cache_key, version)
+        if cached is None:
+            rows = connection.execute(
+                f"SELECT {', '.join(columns)} FROM posts {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+                (*parameters, limit + 1),
+            )
+            body = page_body(rows, columns, limit, "next_before_id")
+            cached = response_cache.store(cache_key, version, body)
+    return _conditional_response(cached)
+
+
+@app.get("/api/posts/search")
+def search_posts():
+    """Full-text search over title, summary and provider, best matches first.
+
+    ``q`` is required; every word must appear and the last one may be a prefix. Accepts the
+    listing filters and ``fields``, paginates with ``offset`` (use ``next_offset``) and adds a
+    ``highlight`` object with the HTML-escaped title and a summary snippet where matches are
+    wrapped in ``<mark>``.
+    """
+    try:
+        match = _match_expression(request.args.get("q", ""))
+        limit = _int_arg("limit", default=DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+        offset = _int_arg("offset", default=0)
+        columns = _fields_arg()
+        conditions, parameters, filter_key = _filter_args()
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
+
+    filters = "".join(f" AND {condition}" for condition in conditions)
+    cache_key = f"search:{match}:{limit}:{offset}:{','.join(columns)}:{filter_key}"
+    with get_connection() as connection:
+        version = get_data_version(connection)
+        cached = response_cache.get(cache_key, version)
+        if cached is None:
+            rows = connection.execute(
+                f"""
+                SELECT {', '.join(f'posts.{column}' for column in columns)},
+                    highlight(posts_fts, 0, ?, ?) AS title_highlight,
+                    snippet(posts_fts, 1, ?, ?, '…', 24) AS summary_highlight
+                FROM posts_fts JOIN posts ON posts.id = posts_fts.rowid
+                WHERE posts_fts MATCH ?{filters}
+                ORDER BY bm25(posts_fts, ?, ?, ?), posts.id DESC
+                LIMIT ? OFFSET ?
+                """,
+                (
+                    HIGHLIGHT_START,
+                    HIGHLIGHT_END,
+                    HIGHLIGHT_START,
+                    HIGHLIGHT_END,
+                    match,
+                    *parameters,
+                    *SEARCH_WEIGHTS,
+                    limit + 1,
+                    offset,
+                ),
+            ).fetchall()
+            items: List[Dict[str, Any]] = []
+            for row in rows[:limit]:
+                item = {column: row[column] for column in columns}
+                item["highlight"] = {
+                    "title": _highlight(row["title_highlight"]),
+                    "summary": _highlight(row["summary_highlight"]),
+                }
+                items.append(item)
+            next_offset = offset + limit if len(rows) > limit else None
+            cached = response_cache.store(cache_key, version, _json_body({"items": items, "next_offset": next_offset}))
+    return _conditional_response(cached)
+
+
+@app.get("/api/posts/stream")
+def stream_posts():
+    """Push newly created posts as Server-Sent Events (``event: post``, ``id`` is the post id).
+
+    The stream starts after the ``Last-Event-ID`` header sent by reconnecting browsers, or after
+    ``since_id``; without either it only sends posts created from now on. ``fields`` restricts
+    the serialised columns. Idle streams only receive a keep-alive comment every
+    ``STREAM_HEARTBEAT`` seconds.
+    """
+    try:
+        columns = _fields_arg()
+        header = request.headers.get("Last-Event-ID", "").strip()
+        if header and not header.isdigit():
+            raise ValueError("'Last-Event-ID' must be a post id")
+        last_id = int(header) if header else _int_arg("since_id")
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
+    if last_id is None:
+        with get_connection() as connection:
+            last_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM posts").fetchone()[0]
+
+    encode = row_encoder(columns)
+
+    def events():
+        cursor = last_id
+        version = None
+        seen = post_events.sequence
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        while True:
+            rows = []
+            with get_connection() as connection:
+                current = get_data_version(connection)
+                if current != version:
+                    version = current
+                    rows = connection.execute(
+                        f"SELECT {', '.join(columns)} FROM posts WHERE id > ? ORDER BY id LIMIT ?",
+                        (cursor, MAX_PAGE_SIZE),
+                    ).fetchall()
+            for row in rows:
+                cursor = row["id"]
+                yield f"id: {cursor}\nevent: post\ndata: {encode(row)}\n\n"
+            if len(rows) == MAX_PAGE_SIZE:
+                version = None
+                continue
+            sequence = post_events.wait(seen, STREAM_HEARTBEAT)
+            if sequence == seen:
+                # The data version checked on the next pass also catches posts written by other
+                # server processes.
+                yield ": keep-alive\n\n"
+            seen = sequence
+
+    response = Response(events(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 
 @app.get("/api/posts/<int:post_id>")
 def retrieve_post(post_id: int):
+    cache_key = f"post:{post_id}"
     with get_connection() as connection:
-        row = connection.execute(
-            "SELECT id, title, summary, source_url, image_url, release_date, provider, type, created_at FROM posts WHERE id = ?",
-            (post_id,),
-        ).fetchone()
-    if row is None:
-        return jsonify({"error": "not_found", "details": "Post not found"}), HTTPStatus.NOT_FOUND
-    return jsonify(serialise_row(row))
+        version = get_data_version(connection)
+        cached = response_cache.get(cache_key, version)
+        if cached is None:
+            row = connection.execute(
+                f"SELECT {', '.join(POST_COLUMNS)} FROM posts WHERE id = ?",
+                (post_id,),
+            ).fetchone()
+            if row is None:
+                return jsonify({"error": "not_found", "details": "Post not found"}), HTTPStatus.NOT_FOUND
+            cached = response_cache.store(cache_key, version, row_encoder(POST_COLUMNS)(row).encode("ascii"))
+    return _conditional_response(cached)
 
 
 @app.post("/api/posts")
@@ -49,40 +519,264 @@ def create_post():
         return jsonify({"error": "invalid_request", "details": "Request payload must be JSON"}), HTTPStatus.BAD_REQUEST
     payload: Dict[str, Any] = request.get_json(force=True)
 
-    missing = REQUIRED_FIELDS.difference(payload)
-    if missing:
-        return (
-            jsonify({"error": "invalid_request", "details": f"Missing required fields: {', '.join(sorted(missing))}"}),
-            HTTPStatus.BAD_REQUEST,
-        )
-
-    values = (
-        payload.get("title", "").strip(),
-        payload.get("summary", "").strip(),
-        payload.get("source_url", "").strip(),
-        payload.get("image_url"),
-        payload.get("release_date", "").strip(),
-        payload.get("provider"),
-        payload.get("type"),
-    )
+    try:
+        values = _prepare_post(payload)
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
 
     with get_connection() as connection:
-        cursor = connection.execute(
-            """
-            INSERT INTO posts (title, summary, source_url, image_url, release_date, provider, type)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            values,
-        )
+        row, created = _insert_post(connection, values)
         connection.commit()
-        new_id = cursor.lastrowid
+    if not created:
+        return jsonify(serialise_row(row)), HTTPStatus.OK
+    _posts_created()
+
+    return jsonify(serialise_row(row)), HTTPStatus.CREATED
+
+
+@app.post("/api/posts/batch")
+def create_posts_batch():
+    """Validate and insert many posts in a single transaction.
 
+    Accepts ``{"items": [...]}`` and answers with one result per item, in request order. Invalid
+    items are reported individually and do not prevent the valid ones from being stored.
+    """
+    try:
+        results, prepared = _prepare_batch()
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
+
+    if prepared:
+        any_created = False
+        with get_connection() as connection:
+            for index, values in prepared:
+                row, created = _insert_post(connection, values)
+                any_created = any_created or created
+                results[index] = {
+                    "index": index,
+                    "status": "created" if created else "exists",
+                    "item": serialise_row(row),
+                }
+            connection.commit()
+        if any_created:
+            _posts_created()
+
+    return jsonify({"results": results})
+
+
+@app.post("/api/review")
+def enqueue_for_review():
+    """Queue processed articles until a reviewer approves or discards them.
+
+    Accepts ``{"items": [...]}`` with the same fields as a post. Each result has the status
+    ``queued``, ``exists`` (the article is already in the queue, ``item`` shows its current
+    state), ``published`` (``item`` is the existing post) or ``error``.
+    """
+    try:
+        results, prepared = _prepare_batch()
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
+
+    with get_connection() as connection:
+        for index, values in prepared:
+            post = connection.execute(
+                f"SELECT {', '.join(POST_COLUMNS)} FROM posts WHERE canonical_url = ?", (values[-1],)
+            ).fetchone()
+            if post is not None:
+                results[index] = {"index": index, "status": "published", "item": serialise_row(post)}
+                continue
+            select_existing = f"SELECT {', '.join(REVIEW_COLUMNS)} FROM review_items WHERE canonical_url = ?"
+            row = connection.execute(select_existing, (values[-1],)).fetchone()
+            status = "exists"
+            if row is None:
+                row = connection.execute(INSERT_REVIEW_SQL, _store_image(values)).fetchone()
+                status = "queued"
+                if row is None:
+                    # Another server process queued the same article in the meantime.
+                    status = "exists"
+                    row = connection.execute(select_existing, (values[-1],)).fetchone()
+            results[index] = {"index": index, "status": status, "item": serialise_row(row)}
+        connection.commit()
+
+    return jsonify({"results": results})
+
+
+@app.get("/api/review")
+def list_review_items():
+    """Return review items with a given ``status`` (``pending`` by default), oldest first.
+
+    Paginated with ``after_id``; ``total`` counts every item with that status.
+    """
+    status = request.args.get("status", "pending")
+    try:
+        if status not in REVIEW_STATUSES:
+            raise ValueError(f"'status' must be one of {', '.join(REVIEW_STATUSES)}")
+        limit = _int_arg("limit", default=DEFAULT_PAGE_SIZE, minimum=1, maximum=MAX_PAGE_SIZE)
+        after_id = _int_arg("after_id", default=0)
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
+
+    with get_connection() as connection:
+        rows = connection.execute(
+            f"SELECT {', '.join(REVIEW_COLUMNS)} FROM review_items WHERE status = ? AND id > ? ORDER BY id LIMIT ?",
+            (status, after_id, limit + 1),
+        ).fetchall()
+        total = connection.execute("SELECT COUNT(*) FROM review_items WHERE status = ?", (status,)).fetchone()[0]
+    items = [serialise_row(row) for row in rows[:limit]]
+    next_after_id = items[-1]["id"] if len(rows) > limit else None
+    return jsonify({"items": items, "next_after_id": next_after_id, "total": total})
+
+
+@app.patch("/api/review/<int:item_id>")
+def update_review_item(item_id: int):
+    """Edit the title, summary or image of a pending review item."""
+    payload = request.get_json(silent=True)
+    try:
+        if not isinstance(payload, dict):
+            raise ValueError("Request payload must be a JSON object")
+        changes = {field: payload[field] for field in REVIEW_EDITABLE_FIELDS if field in payload}
+        if not changes:
+            raise ValueError(f"Provide at least one of: {', '.join(REVIEW_EDITABLE_FIELDS)}")
+        for field in ("title", "summary"):
+            if field in changes:
+                changes[field] = str(changes[field] or "").strip()
+                if not changes[field]:
+                    raise ValueError(f"'{field}' cannot be empty")
+        if changes.get("image_url") is not None and not isinstance(changes["image_url"], str):
+            raise ValueError("'image_url' must be a string")
+        if is_data_uri(changes.get("image_url")):
+            changes["image_url"] = store_data_uri(changes["image_url"])
+        if "image_url" in changes:
+            changes["image_srcset"] = create_thumbnails(changes["image_url"])
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
+
+    assignments = ", ".join(f"{field} = ?" for field in changes)
+    with get_connection() as connection:
         row = connection.execute(
-            "SELECT id, title, summary, source_url, image_url, release_date, provider, type, created_at FROM posts WHERE id = ?",
-            (new_id,),
+            f"UPDATE review_items SET {assignments} WHERE id = ? AND status = 'pending' "
+            f"RETURNING {', '.join(REVIEW_COLUMNS)}",
+            (*changes.values(), item_id),
         ).fetchone()
+        connection.commit()
+        if row is None:
+            exists = connection.execute("SELECT 1 FROM review_items WHERE id = ?", (item_id,)).fetchone()
+    if row is None:
+        if exists is None:
+            return jsonify({"error": "not_found", "details": "Review item not found"}), HTTPStatus.NOT_FOUND
+        return jsonify({"error": "conflict", "details": "Review item was already reviewed"}), HTTPStatus.CONFLICT
+    return jsonify(serialise_row(row))
 
-    return jsonify(serialise_row(row)), HTTPStatus.CREATED
+
+@app.post("/api/review/decisions")
+def decide_review_items():
+    """Approve and discard many review items in one transaction.
+
+    Accepts ``{"approve": [ids], "discard": [ids]}``. Approved items are published as posts.
+    Each result has the status ``approved`` (with the created or existing ``post``),
+    ``discarded`` or ``error``.
+    """
+    payload = request.get_json(silent=True)
+    try:
+        if not isinstance(payload, dict):
+            raise ValueError("Request payload must be a JSON object")
+        approve = _id_list(payload, "approve")
+        discard = _id_list(payload, "discard")
+        if set(approve) & set(discard):
+            raise ValueError("An item cannot be approved and discarded at once")
+        if not approve and not discard:
+            raise ValueError("Provide 'approve' and/or 'discard' ids")
+        if len(approve) + len(discard) > MAX_BATCH_SIZE:
+            raise ValueError(f"A batch accepts at most {MAX_BATCH_SIZE} items")
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
+
+    results: List[Dict[str, Any]] = []
+    published = False
+    with get_connection() as connection:
+        for decision, ids in (("approved", approve), ("discarded", discard)):
+            for item_id in ids:
+                row = connection.execute(
+                    "SELECT title, summary, source_url, image_url, image_srcset, release_date, provider, type, canonical_url, status "
+                    "FROM review_items WHERE id = ?",
+                    (item_id,),
+                ).fetchone()
+                if row is None:
+                    details = "Review item not found"
+                    results.append({"id": item_id, "status": "error", "error": "not_found", "details": details})
+                    continue
+                if row["status"] != "pending":
+                    details = f"Review item was already {row['status']}"
+                    results.append({"id": item_id, "status": "error", "error": "conflict", "details": details})
+                    continue
+                result: Dict[str, Any] = {"id": item_id, "status": decision}
+                post_id = None
+                if decision == "approved":
+                    post, created = _insert_post(connection, tuple(row)[:-1])
+                    published = published or created
+                    post_id = post["id"]
+                    result["post"] = serialise_row(post)
+                connection.execute(
+                    "UPDATE review_items SET status = ?, post_id = ?, reviewed_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (decision, post_id, item_id),
+                )
+                results.append(result)
+        connection.commit()
+    if published:
+        _posts_created()
+
+    return jsonify({"results": results})
+
+
+@app.post("/api/metrics/agent")
+def receive_agent_report():
+    """Accumulate a run report pushed by the agent so ``/metrics`` exports it."""
+    report = request.get_json(silent=True)
+    if not isinstance(report, dict):
+        return jsonify({"error": "invalid_request", "details": "Request payload must be a JSON object"}), HTTPStatus.BAD_REQUEST
+    try:
+        metrics.record_agent_report(report)
+    except ValueError as error:
+        return jsonify({"error": "invalid_request", "details": str(error)}), HTTPStatus.BAD_REQUEST
+    return "", HTTPStatus.NO_CONTENT
+
+
+@app.get("/metrics")
+def export_metrics():
+    """Prometheus scrape endpoint: request latencies, agent run metrics and table sizes."""
+    with get_connection() as connection:
+        posts = connection.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        pending = connection.execute("SELECT COUNT(*) FROM review_items WHERE status = 'pending'").fetchone()[0]
+    body = metrics.render(
+        {
+            "posts_stored": ("Posts stored in the database.", posts),
+            "review_items_pending": ("Review items waiting for a decision.", pending),
+        }
+    )
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+@app.get("/api/images/<string:image_hash>")
+def retrieve_image(image_hash: str):
+    found = find_image(image_hash)
+    if found is None:
+        return jsonify({"error": "not_found", "details": "Image not found"}), HTTPStatus.NOT_FOUND
+    path, mime_type = found
+    response = send_file(path, mimetype=mime_type, etag=image_hash, max_age=IMAGE_MAX_AGE, conditional=True)
+    # The URL is derived from the content, so it can be cached forever.
+    response.headers["Cache-Control"] = f"public, max-age={IMAGE_MAX_AGE}, immutable"
+    return response
+
+
+@app.get("/api/images/<string:image_hash>/<int:width>")
+def retrieve_thumbnail(image_hash: str, width: int):
+    """WebP thumbnail of a stored image, as listed in the ``image_srcset`` of its post."""
+    path = find_thumbnail(image_hash, width)
+    if path is None:
+        return jsonify({"error": "not_found", "details": "Thumbnail not found"}), HTTPStatus.NOT_FOUND
+    response = send_file(path, mimetype="image/webp", etag=f"{image_hash}-{width}", max_age=IMAGE_MAX_AGE, conditional=True)
+    response.headers["Cache-Control"] = f"public, max-age={IMAGE_MAX_AGE}, immutable"
+    return response
 
 
 if __name__ == "__main__":
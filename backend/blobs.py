@@ -0,0 +1,167 @@
+"""Content-addressed file store for images that arrive inline as ``data:`` URIs.
+
+Every stored image also gets WebP thumbnails at ``POSTS_THUMBNAIL_WIDTHS`` when Pillow is
+installed, stored next to it as ``<digest>-<width>.webp``.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+from shared.images import image_info, resize_to_webp
+
+IMAGES_DIR = Path(os.environ.get("POSTS_IMAGES_DIR") or Path(__file__).resolve().parent / "images")
+IMAGE_URL_PREFIX = "/api/images/"
+IMAGE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+DATA_URI = re.compile(r"^data:(?P<mime>[\w.+-]+/[\w.+-]+)?(?P<params>(?:;[^,;]*)*),(?P<data>.*)$", re.DOTALL)
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+THUMBNAIL_WIDTHS = tuple(
+    sorted({int(width) for width in (os.environ.get("POSTS_THUMBNAIL_WIDTHS") or "320,640,960").split(",") if width.strip()})
+)
+THUMBNAIL_QUALITY = int(os.environ.get("POSTS_THUMBNAIL_QUALITY") or 80)
+MAX_IMAGE_BYTES = int(os.environ.get("POSTS_MAX_IMAGE_BYTES") or 8 * 1024 * 1024)
+
+
+@dataclass(frozen=True)
+class InlineImage:
+    """A decoded ``data:`` image that is only written to the store once its post is inserted."""
+
+    data: bytes
+    mime_type: str
+
+
+def is_data_uri(value: object) -> bool:
+    return isinstance(value, str) and value.startswith("data:")
+
+
+def store_image(data: bytes, mime_type: str) -> str:
+    """Write ``data`` under its SHA-256 digest and return the digest."""
+    extension = IMAGE_EXTENSIONS.get(mime_type)
+    if extension is None:
+        raise ValueError(f"Unsupported image type: {mime_type}")
+    digest = hashlib.sha256(data).hexdigest()
+    _write_once(IMAGES_DIR / f"{digest}.{extension}", data)
+    return digest
+
+
+def _write_once(path: Path, data: bytes) -> None:
+    if path.exists():
+        return
+    IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    # A temporary file of its own per writer: concurrent requests storing the same image must
+    # not write into, or move away, each other's file.
+    descriptor, temporary = tempfile.mkstemp(dir=IMAGES_DIR, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(data)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def decode_data_uri(value: str) -> InlineImage:
+    """Decode and check a base64 ``data:image/...`` URI without storing it.
+
+    The image may not exceed ``POSTS_MAX_IMAGE_BYTES`` and its header must describe an image of
+    the declared type; anything else raises :class:`ValueError`.
+    """
+    match = DATA_URI.match(value.strip())
+    if match is None or ";base64" not in match.group("params"):
+        raise ValueError("image_url must be a base64 encoded data URI")
+    mime_type = (match.group("mime") or "").lower()
+    if mime_type not in IMAGE_EXTENSIONS:
+        raise ValueError(f"Unsupported image type: {mime_type}")
+    encoded = match.group("data")
+    # Checked on the encoded length so an oversized image is never decoded.
+    if len(encoded) // 4 * 3 > MAX_IMAGE_BYTES + 2:
+        raise ValueError(f"image_url exceeds {MAX_IMAGE_BYTES} bytes")
+    try:
+        data = base64.b64decode(encoded, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("image_url contains invalid base64 data") from None
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError(f"image_url exceeds {MAX_IMAGE_BYTES} bytes")
+    info = image_info(data)
+    if info is None or info.mime_type != mime_type:
+        raise ValueError(f"image_url does not contain a valid {mime_type} image")
+    return InlineImage(data, mime_type)
+
+
+def store_inline_image(image: InlineImage) -> str:
+    """Store a decoded image and return its ``/api/images/`` URL."""
+    return f"{IMAGE_URL_PREFIX}{store_image(image.data, image.mime_type)}"
+
+
+def store_data_uri(value: str) -> str:
+    """Decode a base64 ``data:image/...`` URI, store it and return its ``/api/images/`` URL."""
+    return store_inline_image(decode_data_uri(value))
+
+
+def find_image(digest: str) -> Optional[Tuple[Path, str]]:
+    """Return the stored file and MIME type for ``digest`` if it exists."""
+    if not HASH_PATTERN.match(digest):
+        return None
+    for mime_type, extension in IMAGE_EXTENSIONS.items():
+        path = IMAGES_DIR / f"{digest}.{extension}"
+        if path.exists():
+            return path, mime_type
+    return None
+
+
+def thumbnail_path(digest: str, width: int) -> Path:
+    return IMAGES_DIR / f"{digest}-{width}.webp"
+
+
+def find_thumbnail(digest: str, width: int) -> Optional[Path]:
+    if not HASH_PATTERN.match(digest) or width not in THUMBNAIL_WIDTHS:
+        return None
+    path = thumbnail_path(digest, width)
+    return path if path.exists() else None
+
+
+def create_thumbnails(image_url: Optional[str]) -> Optional[str]:
+    """Create the WebP thumbnails of a stored image and return its ``srcset``.
+
+    Only widths smaller than the original are created; the original closes the ``srcset`` with
+    its own width. Returns ``None`` for images that are not in the store, that are narrower than
+    every thumbnail width, or when Pillow is not installed.
+    """
+    if not image_url or not image_url.startswith(IMAGE_URL_PREFIX):
+        return None
+    digest = image_url[len(IMAGE_URL_PREFIX) :]
+    found = find_image(digest)
+    if found is None:
+        return None
+    data = found[0].read_bytes()
+    info = image_info(data)
+    if info is None:
+        return None
+    candidates = []
+    for width in THUMBNAIL_WIDTHS:
+        if width >= info.width:
+            break
+        path = thumbnail_path(digest, width)
+        if not path.exists():
+            thumbnail = resize_to_webp(data, width, THUMBNAIL_QUALITY)
+            if thumbnail is None:
+                return None
+            _write_once(path, thumbnail)
+        candidates.append(f"{IMAGE_URL_PREFIX}{digest}/{width} {width}w")
+    if not candidates:
+        return None
+    candidates.append(f"{image_url} {info.width}w")
+    return ", ".join(candidates)
@@ -0,0 +1,60 @@
+"""In-process cache of serialised API responses, keyed by the posts data version."""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from .compression import compress
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes
+    # Compressed copies of ``body`` by content encoding, made the first time a client asks.
+    _encoded: Dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data
+
+
+class ResponseCache:
+    """LRU of response bodies that are only valid for the data version they were built from.
+
+    Every write to ``posts`` bumps the version stored in the database, so entries built before it
+    are never served again even if this process did not perform the write itself.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, CachedResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: int) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def store(self, key: str, version: int, body: bytes) -> CachedResponse:
+        cached = CachedResponse(etag=hashlib.sha256(body).hexdigest()[:32], body=body)
+        with self._lock:
+            self._entries[key] = (version, cached)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
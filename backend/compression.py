@@ -0,0 +1,71 @@
+"""Response compression negotiated through ``Accept-Encoding``.
+
+gzip is always available; brotli is used when the optional ``brotli`` package is installed and
+the client prefers it or ranks it equal to gzip. Bodies smaller than ``POSTS_COMPRESS_MIN_BYTES``
+are sent as they are, since the headers would outweigh the saving.
+"""
+from __future__ import annotations
+
+import gzip
+import importlib.util
+import os
+from typing import Optional, Tuple
+
+MIN_SIZE = int(os.environ.get("POSTS_COMPRESS_MIN_BYTES") or 512)
+# Levels for bodies compressed per request; precomputed files use the maximum levels instead.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_TYPES = frozenset(
+    {"application/json", "application/rss+xml", "application/atom+xml", "text/plain", "text/html"}
+)
+HAS_BROTLI = importlib.util.find_spec("brotli") is not None
+# Preference order when the client ranks several encodings equally.
+ENCODINGS: Tuple[str, ...] = ("br", "gzip") if HAS_BROTLI else ("gzip",)
+EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+
+def negotiate(accept_encodings, size: int) -> Optional[str]:
+    """Pick the encoding for a body of ``size`` bytes from the request's ``Accept-Encoding``.
+
+    ``accept_encodings`` is Werkzeug's parsed header (``request.accept_encodings``); encodings
+    the client rejects with ``q=0`` are never chosen. Returns ``None`` for an uncompressed body.
+    """
+    if size < MIN_SIZE:
+        return None
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress(data: bytes, encoding: str, best: bool = False) -> bytes:
+    """Compress ``data`` with ``encoding``; ``best`` trades CPU for size in files written once."""
+    if encoding == "gzip":
+        # mtime=0 keeps the output, and so the ETag of precomputed files, deterministic.
+        return gzip.compress(data, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(data, quality=11 if best else BROTLI_QUALITY)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_response(response, accept_encodings):
+    """Compress a finished Flask response in place when the client accepts it.
+
+    Streamed responses (Server-Sent Events), files, error and ``304`` responses and bodies that
+    are already encoded are left untouched.
+    """
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_TYPES
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    encoding = negotiate(accept_encodings, len(data))
+    if encoding is None:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
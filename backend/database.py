@@ -1,18 +1,138 @@
 """Database utilities for the Flask backend."""
 from __future__ import annotations
 
+import os
+import queue
 import sqlite3
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Iterator
 
+from shared.canonical import canonicalise_url
+
 DB_FILENAME = "posts.db"
-DB_PATH = Path(__file__).resolve().parent / DB_FILENAME
+DB_PATH = Path(os.environ.get("POSTS_DB_PATH") or Path(__file__).resolve().parent / DB_FILENAME)
+POOL_SIZE = int(os.environ.get("POSTS_DB_POOL_SIZE", "8"))
+
+# WAL lets readers proceed while the agent writes; NORMAL sync is durable under WAL except on
+# power loss, which only costs the last transactions.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+def _connect() -> sqlite3.Connection:
+    connection = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    connection.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        connection.execute(pragma)
+    return connection
+
+
+class ConnectionPool:
+    """Keeps up to ``size`` idle connections so requests reuse open files and prepared statements.
+
+    A connection is only used by one thread at a time: it is taken out of the pool for the
+    duration of a request and handed back afterwards. When the pool is empty a new connection is
+    opened, and surplus connections are closed on release.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=max(1, size))
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _connect()
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        if connection.in_transaction:
+            connection.rollback()
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+pool = ConnectionPool(POOL_SIZE)
+
+
+def _migrate_canonical_urls(connection: sqlite3.Connection) -> None:
+    """Add and backfill ``canonical_url`` on databases created before it existed.
+
+    Older duplicates keep a ``NULL`` canonical URL so the unique index can be created; the
+    oldest post of each article owns the canonical URL.
+    """
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(posts)")}
+    if "canonical_url" not in columns:
+        connection.execute("ALTER TABLE posts ADD COLUMN canonical_url TEXT")
+        connection.create_function("canonicalise_url", 1, canonicalise_url, deterministic=True)
+        connection.execute("UPDATE posts SET canonical_url = canonicalise_url(source_url) WHERE canonical_url IS NULL")
+        connection.execute(
+            """
+            UPDATE posts SET canonical_url = NULL
+            WHERE id NOT IN (SELECT MIN(id) FROM posts WHERE canonical_url IS NOT NULL GROUP BY canonical_url)
+            """
+        )
+    connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_posts_canonical_url ON posts (canonical_url)")
+
+
+def _add_missing_column(connection: sqlite3.Connection, table: str, column: str, definition: str) -> None:
+    """Add ``column`` to ``table`` on databases created before it existed."""
+    columns = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _create_search_index(connection: sqlite3.Connection) -> None:
+    """Create the ``posts_fts`` full-text index, kept in sync with ``posts`` by triggers.
+
+    The index stores no copy of the text (``content='posts'``); it is rebuilt from ``posts``
+    the first time it is created on an existing database.
+    """
+    exists = connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'posts_fts'").fetchone()
+    connection.executescript(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+            title, summary, provider,
+            content = 'posts', content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+        CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+            INSERT INTO posts_fts (rowid, title, summary, provider) VALUES (new.id, new.title, new.summary, new.provider);
+        END;
+        CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+            INSERT INTO posts_fts (posts_fts, rowid, title, summary, provider)
+            VALUES ('delete', old.id, old.title, old.summary, old.provider);
+        END;
+        CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, summary, provider ON posts BEGIN
+            INSERT INTO posts_fts (posts_fts, rowid, title, summary, provider)
+            VALUES ('delete', old.id, old.title, old.summary, old.provider);
+            INSERT INTO posts_fts (rowid, title, summary, provider) VALUES (new.id, new.title, new.summary, new.provider);
+        END;
+        """
+    )
+    if exists is None:
+        connection.execute("INSERT INTO posts_fts (posts_fts) VALUES ('rebuild')")
 
 
 def initialise_database() -> None:
     """Create the database schema if it does not exist."""
-    with sqlite3.connect(DB_PATH) as connection:
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with get_connection() as connection:
         connection.execute(
             """
             CREATE TABLE IF NOT EXISTS posts (
@@ -24,19 +144,83 @@ def initialise_database() -> None:
                 release_date TEXT NOT NULL,
                 provider TEXT,
                 type TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                canonical_url TEXT,
+                image_srcset TEXT
             )
             """
         )
+        _migrate_canonical_urls(connection)
+        # `posts_version` changes on every write to `posts`; it drives ETags and response caching.
+        connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('posts_version', 0);
+            CREATE TRIGGER IF NOT EXISTS posts_version_insert AFTER INSERT ON posts BEGIN
+                UPDATE meta SET value = value + 1 WHERE key = 'posts_version';
+            END;
+            CREATE TRIGGER IF NOT EXISTS posts_version_update AFTER UPDATE ON posts BEGIN
+                UPDATE meta SET value = value + 1 WHERE key = 'posts_version';
+            END;
+            CREATE TRIGGER IF NOT EXISTS posts_version_delete AFTER DELETE ON posts BEGIN
+                UPDATE meta SET value = value + 1 WHERE key = 'posts_version';
+            END;
+            """
+        )
+        # Processed articles waiting for a human decision. Approving one copies it into `posts`.
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS review_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                source_url TEXT NOT NULL,
+                image_url TEXT,
+                release_date TEXT NOT NULL,
+                provider TEXT,
+                type TEXT,
+                canonical_url TEXT NOT NULL UNIQUE,
+                status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'approved', 'discarded')),
+                post_id INTEGER REFERENCES posts (id),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                reviewed_at TIMESTAMP,
+                image_srcset TEXT
+            )
+            """
+        )
+        _add_missing_column(connection, "posts", "image_srcset", "TEXT")
+        _add_missing_column(connection, "review_items", "image_srcset", "TEXT")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_review_items_status_id ON review_items (status, id)")
+        # Serves the newest-first listing and its `(created_at, id)` keyset pagination.
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_posts_created_at_id ON posts (created_at DESC, id DESC)"
+        )
+        # Listing filters: each keeps the newest-first order so filtered pages need no sort.
+        connection.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_posts_provider ON posts (provider, created_at DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_posts_type ON posts (type, created_at DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_posts_release_date ON posts (release_date);
+            """
+        )
+        _create_search_index(connection)
         connection.commit()
 
 
+def get_data_version(connection: sqlite3.Connection) -> int:
+    """Return the counter bumped by every insert, update or delete on ``posts``."""
+    row = connection.execute("SELECT value FROM meta WHERE key = 'posts_version'").fetchone()
+    return int(row[0]) if row else 0
+
+
 @contextmanager
 def get_connection() -> Iterator[sqlite3.Connection]:
-    """Context manager that yields a SQLite connection with row factory set."""
-    connection = sqlite3.connect(DB_PATH)
-    connection.row_factory = sqlite3.Row
+    """Context manager that borrows a pooled SQLite connection with row factory set."""
+    connection = pool.acquire()
     try:
         yield connection
     finally:
-        connection.close()
+        pool.release(connection)
@@ -0,0 +1,32 @@
+"""Wake-up signal shared by the request threads that stream new posts to browsers."""
+from __future__ import annotations
+
+import threading
+
+
+class PostBroadcaster:
+    """Counts post creations and wakes every streaming request waiting for the next one.
+
+    Streams read the new rows themselves (``id > last sent id``). SQLite serialises writers, so
+    once a post id is visible every lower id is committed too and no post can be skipped, even
+    when notifications from concurrent requests arrive out of order.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._sequence = 0
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    def notify(self) -> None:
+        with self._condition:
+            self._sequence += 1
+            self._condition.notify_all()
+
+    def wait(self, seen: int, timeout: float) -> int:
+        """Block until a notification newer than ``seen`` arrives or ``timeout`` expires."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence != seen, timeout)
+            return self._sequence
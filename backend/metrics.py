@@ -0,0 +1,195 @@
+"""In-process metrics registry rendered in the Prometheus text exposition format."""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INVALID_NAME_CHARACTERS = re.compile(r"[^a-zA-Z0-9_]")
+# What the agent reports. Anything else in a pushed report is ignored, so a client cannot create
+# arbitrary metric names on /metrics.
+AGENT_STAGES = frozenset(
+    {"fetch_messages", "download", "download_image", "parse", "summarise", "generate_image", "review_wait", "publish"}
+)
+AGENT_COUNTERS = frozenset(
+    {
+        "messages",
+        "fetch_errors",
+        "urls",
+        "url_errors",
+        "download_errors",
+        "downloads_not_modified",
+        "downloaded_bytes",
+        "images",
+        "openai_requests",
+        "openai_tokens",
+        "summarised_articles",
+        "cache_lookups",
+        "publish_results",
+    }
+)
+# Labels such as the host of a failed URL are unbounded, so the counter series kept are capped.
+MAX_AGENT_SERIES = 500
+MAX_LABELS = 4
+MAX_LABEL_LENGTH = 64
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def metric_name(name: str) -> str:
+    name = INVALID_NAME_CHARACTERS.sub("_", name)
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: LabelKey, **extra: str) -> str:
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{metric_name(key)}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _key(labels: Mapping[str, Any]) -> LabelKey:
+    return tuple(sorted((str(key), str(value)) for key, value in labels.items()))
+
+
+def _agent_labels(labels: Mapping[str, Any]) -> LabelKey:
+    if len(labels) > MAX_LABELS:
+        raise ValueError(f"counters may have at most {MAX_LABELS} labels")
+    return tuple(sorted((str(key)[:MAX_LABEL_LENGTH], str(value)[:MAX_LABEL_LENGTH]) for key, value in labels.items()))
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+
+class MetricsRegistry:
+    """Request latency histograms per route plus the run reports pushed by the agent.
+
+    Values live in the memory of the serving process; with several worker processes each one
+    exports its own series.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests: Dict[LabelKey, Histogram] = {}
+        self._responses: Dict[LabelKey, int] = {}
+        self._agent_counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._agent_stages: Dict[str, Tuple[int, float]] = {}
+        self._agent_last: Dict[str, float] = {}
+        self._agent_last_p95: Dict[str, float] = {}
+        self._agent_runs = 0
+
+    def observe_request(self, route: str, method: str, status: int, seconds: float) -> None:
+        with self._lock:
+            histogram = self._requests.setdefault(_key({"route": route, "method": method}), Histogram())
+            histogram.observe(seconds)
+            responses = _key({"route": route, "method": method, "status": status})
+            self._responses[responses] = self._responses.get(responses, 0) + 1
+
+    def record_agent_report(self, report: Mapping[str, Any]) -> None:
+        """Accumulate the stage timings and counters of one agent run.
+
+        Only the stages and counters in ``AGENT_STAGES`` and ``AGENT_COUNTERS`` are kept; label
+        values are cut to ``MAX_LABEL_LENGTH`` characters and counter series beyond
+        ``MAX_AGENT_SERIES`` are dropped. Raises ``ValueError`` when the report does not have the
+        expected shape.
+        """
+        spans = report.get("spans", {})
+        counters = report.get("counters", [])
+        if not isinstance(spans, dict) or not isinstance(counters, list):
+            raise ValueError("'spans' must be an object and 'counters' a list")
+        try:
+            stages = {
+                stage: (int(span["count"]), float(span["total_seconds"]), float(span.get("p95_seconds", 0)))
+                for stage, span in spans.items()
+                if stage in AGENT_STAGES
+            }
+            values = [
+                (item["name"], _agent_labels(item.get("labels") or {}), float(item["value"]))
+                for item in counters
+                if item["name"] in AGENT_COUNTERS
+            ]
+            duration = float(report.get("duration_seconds", 0))
+        except (KeyError, TypeError, ValueError, AttributeError) as error:
+            raise ValueError(f"Malformed run report: {error}") from None
+
+        with self._lock:
+            self._agent_runs += 1
+            self._agent_last = {"timestamp": time.time(), "duration": duration}
+            for stage, (count, total, p95) in stages.items():
+                previous_count, previous_total = self._agent_stages.get(stage, (0, 0.0))
+                self._agent_stages[stage] = (previous_count + count, previous_total + total)
+                self._agent_last_p95[stage] = p95
+            for name, labels, value in values:
+                series = (name, labels)
+                if series in self._agent_counters:
+                    self._agent_counters[series] += value
+                elif len(self._agent_counters) < MAX_AGENT_SERIES:
+                    self._agent_counters[series] = value
+
+    def render(self, gauges: Optional[Mapping[str, Tuple[str, float]]] = None) -> str:
+        """Return every metric in the Prometheus text format; ``gauges`` maps name to (help, value)."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str, description: str) -> None:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            header("http_request_duration_seconds", "histogram", "Time spent handling HTTP requests, by route.")
+            for labels, histogram in sorted(self._requests.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"http_request_duration_seconds_bucket{_labels(labels, le=le)} {cumulative}")
+                lines.append(f"http_request_duration_seconds_sum{_labels(labels)} {histogram.total}")
+                lines.append(f"http_request_duration_seconds_count{_labels(labels)} {cumulative}")
+
+            header("http_responses_total", "counter", "HTTP responses, by route and status code.")
+            for labels, count in sorted(self._responses.items()):
+                lines.append(f"http_responses_total{_labels(labels)} {count}")
+
+            header("agent_runs_total", "counter", "Run reports received from the agent.")
+            lines.append(f"agent_runs_total {self._agent_runs}")
+            if self._agent_last:
+                header("agent_last_run_timestamp_seconds", "gauge", "When the last agent run report arrived.")
+                lines.append(f"agent_last_run_timestamp_seconds {self._agent_last['timestamp']}")
+                header("agent_last_run_duration_seconds", "gauge", "Duration of the last agent run.")
+                lines.append(f"agent_last_run_duration_seconds {self._agent_last['duration']}")
+
+            header("agent_stage_seconds", "summary", "Time spent in each agent pipeline stage.")
+            for stage, (count, total) in sorted(self._agent_stages.items()):
+                labels = _key({"stage": stage})
+                lines.append(f"agent_stage_seconds_sum{_labels(labels)} {total}")
+                lines.append(f"agent_stage_seconds_count{_labels(labels)} {count}")
+            header("agent_stage_last_p95_seconds", "gauge", "95th percentile of each stage in the last agent run.")
+            for stage, p95 in sorted(self._agent_last_p95.items()):
+                lines.append(f"agent_stage_last_p95_seconds{_labels(_key({'stage': stage}))} {p95}")
+
+            described = set()
+            for (name, labels), value in sorted(self._agent_counters.items()):
+                full_name = f"agent_{name}_total"
+                if full_name not in described:
+                    header(full_name, "counter", f"Agent counter '{name}' accumulated over all runs.")
+                    described.add(full_name)
+                lines.append(f"{full_name}{_labels(labels)} {value}")
+
+        for name, (description, value) in (gauges or {}).items():
+            header(name, "gauge", description)
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
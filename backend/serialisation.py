@@ -0,0 +1,67 @@
+"""JSON encoding of query results read straight from the SQLite cursor.
+
+Rows are written as JSON text column by column, without building a dictionary per row or a list
+of them, and pages are produced as a stream of text chunks. The output is the same JSON the
+Flask encoder produces for the same values (ASCII only), with keys in column order.
+"""
+from __future__ import annotations
+
+import sqlite3
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+# SQLite only returns these types; BLOB columns are never selected by the API.
+_ENCODERS: dict = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: float.__repr__,
+    type(None): lambda value: "null",
+}
+
+
+def encode_value(value: Any) -> str:
+    return _ENCODERS[type(value)](value)
+
+
+def row_encoder(columns: Sequence[str]) -> Callable[[Sequence[Any]], str]:
+    """Return a function that encodes a row holding ``columns``, in that order, as a JSON object."""
+    prefixes = [("{" if index == 0 else ",") + encode_basestring_ascii(column) + ":" for index, column in enumerate(columns)]
+    pairs = list(enumerate(prefixes))
+    encoders = _ENCODERS
+
+    def encode(row: Sequence[Any]) -> str:
+        parts = []
+        for index, prefix in pairs:
+            value = row[index]
+            parts.append(prefix)
+            parts.append(encoders[type(value)](value))
+        parts.append("}")
+        return "".join(parts)
+
+    return encode
+
+
+def iter_page(rows: Iterable[sqlite3.Row], columns: Sequence[str], limit: int, cursor_name: str) -> Iterator[str]:
+    """Yield the JSON text of ``{"items": [...], <cursor_name>: ...}`` one row at a time.
+
+    ``rows`` is normally the cursor itself, queried with ``LIMIT limit + 1``: the extra row only
+    tells that another page exists, in which case the cursor is the id of the last item
+    (``columns[0]`` must be ``id``). Otherwise it is ``null``.
+    """
+    encode = row_encoder(columns)
+    yield '{"items":['
+    count = 0
+    last_id = None
+    more = False
+    for row in rows:
+        if count == limit:
+            more = True
+            break
+        yield encode(row) if count == 0 else "," + encode(row)
+        last_id = row[0]
+        count += 1
+    yield f'],{encode_basestring_ascii(cursor_name)}:{encode_value(last_id if more else None)}}}'
+
+
+def page_body(rows: Iterable[sqlite3.Row], columns: Sequence[str], limit: int, cursor_name: str) -> bytes:
+    return "".join(iter_page(rows, columns, limit, cursor_name)).encode("ascii")
@@ -0,0 +1,165 @@
+"""Precomputed JSON, RSS and Atom files of the newest posts for a static file server.
+
+When ``POSTS_SNAPSHOT_DIR`` is set, every post creation schedules a rewrite of ``posts.json``
+(the first page of ``GET /api/posts``), ``feed.rss`` and ``feed.atom`` in that directory, each
+next to ``.gz`` and, with the ``brotli`` package installed, ``.br`` copies compressed at the
+highest level. A web server can then answer read traffic from those files (for example nginx
+with ``gzip_static``/``brotli_static``) without reaching Flask.
+
+Files are written by a background thread, so creating a post does not wait for them, and
+replaced atomically, so readers never see a partial file. Creations that arrive while a write is
+in progress are covered by a single extra write.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import xml.etree.ElementTree as ElementTree
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+from .compression import ENCODINGS, EXTENSIONS, compress
+from .database import get_connection, get_data_version
+from .serialisation import page_body
+
+SNAPSHOT_DIR = Path(os.environ["POSTS_SNAPSHOT_DIR"]) if os.environ.get("POSTS_SNAPSHOT_DIR") else None
+SNAPSHOT_SIZE = int(os.environ.get("POSTS_SNAPSHOT_SIZE") or 50)
+FEED_TITLE = os.environ.get("POSTS_FEED_TITLE") or "Telegram Monitor"
+SITE_URL = os.environ.get("POSTS_SITE_URL") or "http://localhost:3000/"
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+
+
+def _timestamp(row) -> datetime:
+    """When a post was published: ``created_at`` (UTC), else its release date."""
+    for value in (row["created_at"], row["release_date"]):
+        try:
+            return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            continue
+    return datetime.now(timezone.utc)
+
+
+def _element(parent: ElementTree.Element, tag: str, text: Optional[str] = None, **attributes: str) -> ElementTree.Element:
+    element = ElementTree.SubElement(parent, tag, attributes)
+    element.text = text
+    return element
+
+
+def render_rss(rows: Sequence) -> bytes:
+    rss = ElementTree.Element("rss", version="2.0")
+    channel = _element(rss, "channel")
+    _element(channel, "title", FEED_TITLE)
+    _element(channel, "link", SITE_URL)
+    _element(channel, "description", f"Últimas publicaciones de {FEED_TITLE}")
+    if rows:
+        _element(channel, "lastBuildDate", format_datetime(_timestamp(rows[0])))
+    for row in rows:
+        item = _element(channel, "item")
+        _element(item, "title", row["title"])
+        _element(item, "link", row["source_url"])
+        _element(item, "guid", row["source_url"], isPermaLink="true")
+        _element(item, "description", row["summary"])
+        _element(item, "pubDate", format_datetime(_timestamp(row)))
+        if row["provider"]:
+            _element(item, "source", row["provider"], url=row["source_url"])
+        if row["type"]:
+            _element(item, "category", row["type"])
+    return ElementTree.tostring(rss, encoding="utf-8", xml_declaration=True)
+
+
+def render_atom(rows: Sequence) -> bytes:
+    feed = ElementTree.Element("feed", xmlns=ATOM_NAMESPACE)
+    _element(feed, "title", FEED_TITLE)
+    _element(feed, "id", SITE_URL)
+    _element(feed, "link", href=SITE_URL)
+    _element(feed, "updated", (_timestamp(rows[0]) if rows else datetime.now(timezone.utc)).isoformat())
+    for row in rows:
+        entry = _element(feed, "entry")
+        _element(entry, "title", row["title"])
+        _element(entry, "id", row["source_url"])
+        _element(entry, "link", href=row["source_url"])
+        _element(entry, "updated", _timestamp(row).isoformat())
+        _element(entry, "summary", row["summary"])
+        author = _element(entry, "author")
+        _element(author, "name", row["provider"] or FEED_TITLE)
+        if row["type"]:
+            _element(entry, "category", term=row["type"])
+    return ElementTree.tostring(feed, encoding="utf-8", xml_declaration=True)
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(data)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def write_snapshot(directory: Path, columns: Sequence[str], size: int = SNAPSHOT_SIZE) -> List[Path]:
+    """Write the JSON, RSS and Atom files of the ``size`` newest posts and return their paths."""
+    with get_connection() as connection:
+        query = f"SELECT {', '.join(columns)} FROM posts ORDER BY created_at DESC, id DESC LIMIT ?"
+        # The JSON is encoded straight from the cursor; the feeds read the rows again.
+        body = page_body(connection.execute(query, (size + 1,)), columns, size, "next_before_id")
+        rows = connection.execute(query, (size,)).fetchall()
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name, data in (("posts.json", body), ("feed.rss", render_rss(rows)), ("feed.atom", render_atom(rows))):
+        path = directory / name
+        for encoding in ENCODINGS:
+            _write_atomically(path.with_name(name + EXTENSIONS[encoding]), compress(data, encoding, best=True))
+        _write_atomically(path, data)
+        written.append(path)
+    return written
+
+
+class SnapshotWriter:
+    """Rewrites the snapshot files in a background thread after posts are created."""
+
+    def __init__(self, directory: Optional[Path], columns: Sequence[str], on_error: Callable[[Exception], None]) -> None:
+        self.directory = directory
+        self.columns = tuple(columns)
+        self._on_error = on_error
+        self._pending = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._written_version: Optional[int] = None
+
+    def schedule(self) -> None:
+        """Ask for a rewrite; returns at once. Does nothing when snapshots are disabled."""
+        if self.directory is None:
+            return
+        self._pending.set()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="post-snapshots", daemon=True)
+                self._thread.start()
+
+    def write_now(self) -> None:
+        """Write the files in the calling thread unless they already match the stored posts."""
+        if self.directory is None:
+            return
+        with self._write_lock:
+            with get_connection() as connection:
+                version = get_data_version(connection)
+            if version == self._written_version:
+                return
+            write_snapshot(self.directory, self.columns)
+            self._written_version = version
+
+    def _run(self) -> None:
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            try:
+                self.write_now()
+            except Exception as error:  # noqa: BLE001 - a failed write must not stop later ones
+                self._on_error(error)
@@ -0,0 +1,228 @@
+"""Load test of the Flask backend with concurrent clients on a seeded temporary database.
+
+Usage::
+
+    python -m benchmarks.backend [--posts 2000] [--clients 8] [--duration 15]
+                                 [--baseline base.json] [--save-baseline base.json]
+
+The backend runs in a child process (Flask development server with threads), is seeded with
+``--posts`` posts through ``POST /api/posts/batch`` and then receives a weighted mix of list,
+pagination, detail, search, filtered and conditional requests, plus a fraction of writes.
+Clients send ``--accept-encoding`` (``identity`` disables compression) and the mean size of the
+response bodies as transferred is reported next to the latencies.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import requests
+
+from .harness import BackendProcess, Metric, add_baseline_arguments, peak_rss_mib, percentile, report
+
+PROVIDERS = ("elpais.com", "xataka.com", "eldiario.es", "genbeta.com", "expansion.com", "nature.com")
+TYPES = ("Noticia", "Artículo", "Informe")
+TOPICS = (
+    "inteligencia artificial", "economía digital", "mercado laboral", "energía solar", "ciberseguridad",
+    "vivienda", "educación", "salud pública", "movilidad eléctrica", "telecomunicaciones",
+)
+SEARCH_TERMS = ("inteligencia", "economía digital", "energía", "ciberseg", "salud", "vivienda alquiler")
+
+Request = Callable[[requests.Session, random.Random], requests.Response]
+
+
+def synthetic_post(number: int, generator: random.Random) -> Dict[str, str]:
+    topic = generator.choice(TOPICS)
+    return {
+        "title": f"Novedades sobre {topic}: análisis número {number}",
+        "summary": (
+            f"Un repaso a los cambios recientes en {topic} y a {generator.choice(TOPICS)}, con datos del "
+            f"último trimestre y la opinión de expertos del sector."
+        ),
+        "source_url": f"https://{generator.choice(PROVIDERS)}/articulos/{number}",
+        "release_date": (date(2024, 1, 1) + timedelta(days=number % 365)).isoformat(),
+        "provider": generator.choice(PROVIDERS),
+        "type": generator.choice(TYPES),
+    }
+
+
+class Scenarios:
+    """The request mix; each scenario reads what it needs (ids, ETags) from shared state."""
+
+    def __init__(self, base_url: str, post_ids: List[int], write_start: int) -> None:
+        self.base_url = base_url
+        self.post_ids = post_ids
+        self._next_write = write_start
+        self._lock = threading.Lock()
+        self._etag = ""
+
+    def list_first_page(self, session: requests.Session, generator: random.Random) -> requests.Response:
+        return session.get(f"{self.base_url}/api/posts", params={"limit": 50})
+
+    def list_next_page(self, session: requests.Session, generator: random.Random) -> requests.Response:
+        before_id = generator.choice(self.post_ids)
+        return session.get(f"{self.base_url}/api/posts", params={"limit": 50, "before_id": before_id})
+
+    def list_since(self, session: requests.Session, generator: random.Random) -> requests.Response:
+        since_id = self.post_ids[-min(len(self.post_ids), 20)]
+        return session.get(f"{self.base_url}/api/posts", params={"since_id": since_id})
+
+    def list_filtered(self, session: requests.Session, generator: random.Random) -> requests.Response:
+        params = {"limit": 50, "provider": generator.choice(PROVIDERS), "date_from": "2024-03-01"}
+        return session.get(f"{self.base_url}/api/posts", params=params)
+
+    def detail(self, session: requests.Session, generator: random.Random) -> requests.Response:
+        return session.get(f"{self.base_url}/api/posts/{generator.choice(self.post_ids)}")
+
+    def search(self, session: requests.Session, generator: random.Random) -> requests.Response:
+        return session.get(f"{self.base_url}/api/posts/search", params={"q": generator.choice(SEARCH_TERMS)})
+
+    def conditional(self, session: requests.Session, generator: random.Random) -> requests.Response:
+        response = session.get(
+            f"{self.base_url}/api/posts", params={"limit": 50}, headers={"If-None-Match": self._etag}
+        )
+        self._etag = response.headers.get("ETag", self._etag)
+        return response
+
+    def create(self, session: requests.Session, generator: random.Random) -> requests.Response:
+        with self._lock:
+            number, self._next_write = self._next_write, self._next_write + 1
+        return session.post(f"{self.base_url}/api/posts", json=synthetic_post(number, generator))
+
+    def mix(self, write_ratio: float) -> Tuple[List[str], List[float]]:
+        reads = {
+            "list_first_page": 30,
+            "list_next_page": 15,
+            "list_since": 5,
+            "list_filtered": 10,
+            "detail": 20,
+            "search": 15,
+            "conditional": 5,
+        }
+        total = sum(reads.values())
+        names = list(reads) + ["create"]
+        weights = [weight / total * (1 - write_ratio) for weight in reads.values()] + [write_ratio]
+        return names, weights
+
+
+def seed(base_url: str, posts: int, generator: random.Random) -> Tuple[List[int], float]:
+    """Insert ``posts`` posts in batches and return their ids and the insert rate (posts/s)."""
+    ids: List[int] = []
+    started = time.perf_counter()
+    with requests.Session() as session:
+        for first in range(0, posts, 100):
+            items = [synthetic_post(number, generator) for number in range(first, min(posts, first + 100))]
+            response = session.post(f"{base_url}/api/posts/batch", json={"items": items}, timeout=60)
+            response.raise_for_status()
+            ids.extend(result["item"]["id"] for result in response.json()["results"] if "item" in result)
+    elapsed = time.perf_counter() - started
+    return ids, posts / elapsed if elapsed else 0.0
+
+
+def run_client(
+    scenarios: Scenarios,
+    names: List[str],
+    weights: List[float],
+    deadline: float,
+    seed_value: int,
+    accept_encoding: str,
+) -> Tuple[Dict[str, List[float]], int, int]:
+    generator = random.Random(seed_value)
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors = 0
+    transferred = 0
+    with requests.Session() as session:
+        session.headers["Accept-Encoding"] = accept_encoding
+        while time.perf_counter() < deadline:
+            name = generator.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = getattr(scenarios, name)(session, generator)
+                ok = response.status_code < 400
+                transferred += int(response.headers.get("Content-Length") or len(response.content))
+            except requests.RequestException:
+                ok = False
+            latencies[name].append(time.perf_counter() - started)
+            errors += not ok
+    return latencies, errors, transferred
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga del backend Flask")
+    parser.add_argument("--posts", type=int, default=2000, help="Posts con los que se llena la base de datos")
+    parser.add_argument("--clients", type=int, default=8, help="Clientes concurrentes")
+    parser.add_argument("--duration", type=float, default=15.0, help="Segundos de carga")
+    parser.add_argument("--write-ratio", type=float, default=0.02, help="Fracción de peticiones que crean un post")
+    parser.add_argument("--seed", type=int, default=7, help="Semilla de los datos y de la mezcla de peticiones")
+    parser.add_argument(
+        "--accept-encoding", default="gzip, br", help="Cabecera Accept-Encoding de los clientes (identity: sin compresión)"
+    )
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    generator = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="backend-benchmark-") as directory:
+        with BackendProcess(Path(directory)) as backend:
+            print(f"Insertando {args.posts} posts...")
+            post_ids, insert_rate = seed(backend.base_url, args.posts, generator)
+            scenarios = Scenarios(backend.base_url, sorted(post_ids), write_start=args.posts)
+            names, weights = scenarios.mix(args.write_ratio)
+
+            print(f"{args.clients} clientes durante {args.duration:.0f} s...")
+            deadline = time.perf_counter() + args.duration
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.clients) as executor:
+                futures = [
+                    executor.submit(
+                        run_client, scenarios, names, weights, deadline, args.seed + client, args.accept_encoding
+                    )
+                    for client in range(args.clients)
+                ]
+                results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - started
+            backend_rss = peak_rss_mib(backend.pid)
+
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    for client_latencies, _, _ in results:
+        for name, samples in client_latencies.items():
+            latencies[name].extend(samples)
+    requests_total = sum(len(samples) for samples in latencies.values())
+    errors = sum(client_errors for _, client_errors, _ in results)
+    transferred = sum(client_bytes for _, _, client_bytes in results)
+
+    print(f"\n{'escenario':<18} {'peticiones':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+    for name, samples in latencies.items():
+        print(
+            f"{name:<18} {len(samples):>10} {percentile(samples, 0.5) * 1000:>9.1f} "
+            f"{percentile(samples, 0.95) * 1000:>9.1f} {percentile(samples, 0.99) * 1000:>9.1f}"
+        )
+
+    if requests_total:
+        print(f"\nTamaño medio de respuesta ({args.accept_encoding}): {transferred / requests_total / 1024:.1f} KiB")
+
+    metrics: List[Metric] = [
+        Metric("requests_per_second", requests_total / elapsed if elapsed else 0.0, "req/s", higher_is_better=True),
+        Metric("seed_posts_per_second", insert_rate, "posts/s", higher_is_better=True),
+        Metric("error_rate", errors / requests_total if requests_total else 0.0, "fracción"),
+        Metric("mean_response_kib", transferred / requests_total / 1024 if requests_total else 0.0, "KiB"),
+    ]
+    for name, samples in latencies.items():
+        if samples:
+            metrics.append(Metric(f"{name}_p50_ms", percentile(samples, 0.5) * 1000, "ms"))
+            metrics.append(Metric(f"{name}_p95_ms", percentile(samples, 0.95) * 1000, "ms"))
+    if backend_rss is not None:
+        metrics.append(Metric("backend_peak_rss_mib", backend_rss, "MiB"))
+
+    parameters = {key: value for key, value in vars(args).items() if key not in {"baseline", "save_baseline"}}
+    report("backend", metrics, parameters, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compare CPU time per page of the legacy BeautifulSoup extraction and the lxml single pass.
+
+Usage::
+
+    python -m benchmarks.extraction [--corpus benchmarks/pages] [--repeat 20]
+
+Any saved ``*.html`` page can be dropped into the corpus directory (for example with
+``curl -L -o benchmarks/pages/site.html https://...``).
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from readability import Document
+
+from agent.extraction import extract_page
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "pages"
+BASE_URL = "https://example.com/noticia"
+
+
+def legacy_extract(html: str, base_url: str) -> Dict[str, Optional[str]]:
+    """Extraction as implemented before the lxml engine: three parses plus repeated finds."""
+    soup = BeautifulSoup(html, "html.parser")
+    try:
+        document = Document(html)
+        article_html = document.summary(html_partial=True)
+        short_title = document.short_title()
+    except Exception:
+        article_html = soup.get_text(separator=" ")
+        short_title = soup.title.string if soup.title and soup.title.string else None
+    article_text = BeautifulSoup(article_html, "html.parser").get_text(separator=" ")
+    article_text = re.sub(r"\s+", " ", article_text).strip()
+
+    title = None
+    if soup.title and soup.title.string:
+        title = soup.title.string.strip()
+    else:
+        og_title = soup.find("meta", property="og:title") or soup.find("meta", attrs={"name": "twitter:title"})
+        if og_title and og_title.get("content"):
+            title = og_title["content"].strip()
+
+    description = None
+    meta = soup.find("meta", attrs={"name": "description"}) or soup.find("meta", property="og:description")
+    if meta and meta.get("content"):
+        description = meta["content"].strip()
+
+    image = None
+    for attribute in ("og:image", "twitter:image", "twitter:image:src"):
+        meta = soup.find("meta", property=attribute) or soup.find("meta", attrs={"name": attribute})
+        if meta and meta.get("content"):
+            image = urljoin(base_url, meta["content"].strip())
+            break
+    if image is None:
+        first_image = soup.find("img")
+        if first_image and first_image.get("src"):
+            image = urljoin(base_url, first_image["src"].strip())
+
+    content_type = "Noticia"
+    if soup.find("article") is not None:
+        content_type = "Artículo"
+    else:
+        og_type = soup.find("meta", property="og:type")
+        if og_type and og_type.get("content"):
+            content_type = og_type["content"].replace("_", " ").title()
+
+    return {
+        "title": title or short_title,
+        "description": description,
+        "image_url": image,
+        "type": content_type,
+        "text": article_text,
+    }
+
+
+def measure(extractor: Callable[[str, str], object], html: str, repeat: int) -> float:
+    """Return the median CPU seconds spent extracting ``html`` once."""
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.process_time()
+        extractor(html, BASE_URL)
+        samples.append(time.process_time() - started)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de extracción HTML")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="Directorio con páginas *.html guardadas")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones por página")
+    args = parser.parse_args()
+
+    pages = sorted(args.corpus.glob("*.html"))
+    if not pages:
+        raise SystemExit(f"No se encontraron páginas HTML en {args.corpus}")
+
+    print(f"{'página':<32} {'KiB':>7} {'antes (ms)':>11} {'después (ms)':>13} {'mejora':>7}")
+    totals = [0.0, 0.0]
+    for path in pages:
+        html = path.read_text(encoding="utf-8", errors="replace")
+        before = measure(legacy_extract, html, args.repeat)
+        after = measure(extract_page, html, args.repeat)
+        totals[0] += before
+        totals[1] += after
+        print(
+            f"{path.name:<32} {len(html) / 1024:>7.1f} {before * 1000:>11.2f} {after * 1000:>13.2f} "
+            f"{before / after if after else float('inf'):>6.1f}x"
+        )
+    count = len(pages)
+    print(
+        f"{'media por página':<32} {'':>7} {totals[0] / count * 1000:>11.2f} {totals[1] / count * 1000:>13.2f} "
+        f"{totals[0] / totals[1] if totals[1] else float('inf'):>6.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
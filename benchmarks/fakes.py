@@ -0,0 +1,307 @@
+"""Local stand-ins for the Telegram MCP server, the linked web pages and the OpenAI API.
+
+They let the real agent code run end to end without network access or API keys while keeping
+the latency of each external service configurable.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 1x1 GIF served for tracking pixels (any image whose name contains "pixel").
+PIXEL_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+IMAGE_PATH = re.compile(r"\.(?:png|jpe?g|gif|webp)$", re.IGNORECASE)
+# Image links to other hosts in the saved pages are rewritten to the corpus server.
+REMOTE_IMAGE_URL = re.compile(r"https?://[^/\"'\s]+(/[^\"'\s]*\.(?:png|jpe?g|gif|webp))", re.IGNORECASE)
+IMAGE_MARKUP = re.compile(
+    r"<img\b[^>]*>|<meta\b[^>]*(?:og:image|twitter:image)[^>]*>",
+    re.IGNORECASE,
+)
+
+
+def solid_png(width: int, height: int, colour: Tuple[int, int, int] = (30, 90, 120)) -> bytes:
+    """A valid PNG of one colour, built without an imaging library."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    row = b"\x00" + bytes(colour) * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height, 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+ARTICLE_IMAGE = solid_png(1200, 630)
+GENERATED_IMAGE_B64 = base64.b64encode(solid_png(1024, 1024)).decode("ascii")
+TRACKING_SUFFIXES = ("", "", "", "?utm_source=telegram", "?utm_medium=social&fbclid=abc")
+
+
+def synthetic_history(
+    urls: List[str],
+    messages: int,
+    *,
+    urls_per_message: int = 3,
+    seed: int = 7,
+) -> List[Dict[str, Any]]:
+    """Build a chat history with ``messages`` messages linking to ``urls``.
+
+    Messages carry between zero and ``urls_per_message`` links; some links repeat an earlier one
+    with tracking parameters so deduplication is exercised too.
+    """
+    generator = random.Random(seed)
+    history: List[Dict[str, Any]] = []
+    shared: List[str] = []
+    remaining = list(urls)
+    for message_id in range(1, messages + 1):
+        sender = f"usuario{generator.randint(1, 12)}"
+        if generator.random() < 0.05:
+            # Media without text; it still advances the cursor.
+            history.append({"id": message_id, "date": "", "text": "", "sender": sender})
+            continue
+        links = []
+        for _ in range(generator.randint(0, urls_per_message)):
+            if shared and (not remaining or generator.random() < 0.1):
+                links.append(generator.choice(shared) + generator.choice(TRACKING_SUFFIXES))
+            elif remaining:
+                url = remaining.pop(0)
+                shared.append(url)
+                links.append(url)
+        text, entities = _with_url_entities(["Mirad esto:"] + [f"{link} interesante" for link in links])
+        history.append(
+            {
+                "id": message_id,
+                "date": f"2024-05-01T08:{message_id // 60 % 60:02d}:{message_id % 60:02d}",
+                "text": text if links else "¡Buenos días!",
+                "entities": entities,
+                "sender": sender,
+            }
+        )
+    if remaining:
+        # Links that did not fit in the random layout go in a final message.
+        text, entities = _with_url_entities(remaining)
+        history.append({"id": messages + 1, "date": "", "text": text, "entities": entities, "sender": "usuario1"})
+    return history
+
+
+def _with_url_entities(words: List[str]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Join ``words`` with spaces and describe the links among them as Telegram ``url`` entities."""
+    entities: List[Dict[str, Any]] = []
+    offset = 0
+    for word in words:
+        link = word.split(" ", 1)[0]
+        if link.startswith(("http://", "https://")):
+            entities.append({"type": "url", "offset": offset, "length": len(link.encode("utf-16-le")) // 2})
+        offset += len(word.encode("utf-16-le")) // 2 + 1
+    return " ".join(words), entities
+
+
+class FakeMCPServer:
+    """Replaces ``mcp.ClientSession`` and answers ``list_messages`` from in-memory histories.
+
+    ``histories`` maps each chat id to its messages. Each tool call waits ``latency`` seconds
+    to simulate the round trip to telegram-mcp; calls for different chats overlap.
+    """
+
+    def __init__(self, histories: Dict[str, List[Dict[str, Any]]], latency: float = 0.0) -> None:
+        self.histories = {
+            chat_id: sorted(history, key=lambda message: message["id"]) for chat_id, history in histories.items()
+        }
+        self.latency = latency
+        self.calls = 0
+        self.connections = 0
+
+    @property
+    def message_count(self) -> int:
+        return sum(len(history) for history in self.histories.values())
+
+    async def connect(self, server_url: str, extra_headers: Optional[Dict[str, str]] = None) -> "_FakeConnection":
+        self.connections += 1
+        return _FakeConnection(self)
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if name != "list_messages":
+            raise RuntimeError(f"Unknown tool: {name}")
+        history = self.histories.get(str(arguments.get("chat_id")))
+        if history is None:
+            raise RuntimeError(f"Unknown chat: {arguments.get('chat_id')}")
+        offset_id = arguments.get("offset_id") or 0
+        limit = int(arguments.get("limit", 50))
+        return {"messages": [message for message in history if message["id"] > offset_id][:limit]}
+
+    @contextmanager
+    def installed(self) -> Iterator["FakeMCPServer"]:
+        """Make ``TelegramMonitor`` connect to this server instead of a real MCP session."""
+        from agent import telegram_monitor
+
+        original = telegram_monitor.ClientSession
+        telegram_monitor.ClientSession = self
+        try:
+            yield self
+        finally:
+            telegram_monitor.ClientSession = original
+
+
+class _FakeConnection:
+    def __init__(self, server: FakeMCPServer) -> None:
+        self.server = server
+
+    async def __aenter__(self) -> FakeMCPServer:
+        return self.server
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+
+class CorpusServer:
+    """Serves the saved HTML pages at ``/articulo/<n>`` on a loopback address.
+
+    Article ``n`` is page ``n % len(pages)`` with a unique paragraph appended, so every article
+    has its own content hash. A fraction ``without_image`` of the articles is served without
+    images to make the agent generate one. The images of the pages are served by the same
+    server: tracking pixels as 1x1 GIFs and every other image as a 1200x630 PNG. Each response
+    waits ``latency`` seconds first.
+    """
+
+    def __init__(
+        self,
+        pages: List[Path],
+        host: str = "127.0.0.1",
+        latency: float = 0.0,
+        without_image: float = 0.25,
+    ) -> None:
+        if not pages:
+            raise ValueError("El corpus no contiene páginas")
+        self.pages = [page.read_text(encoding="utf-8", errors="replace") for page in pages]
+        self.latency = latency
+        self.without_image = without_image
+        self.requests = 0
+        self.image_requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def article_url(self, number: int) -> str:
+        return f"{self.base_url}/articulo/{number}"
+
+    def render(self, number: int) -> bytes:
+        html = self.pages[number % len(self.pages)]
+        # Spread the articles without image evenly instead of sampling them.
+        if int((number + 1) * self.without_image) > int(number * self.without_image):
+            html = IMAGE_MARKUP.sub("", html)
+        html = REMOTE_IMAGE_URL.sub(lambda match: self.base_url + match.group(1), html)
+        marker = f"<p>Referencia del artículo de prueba número {number}.</p>"
+        position = html.lower().rfind("</body>")
+        html = html + marker if position < 0 else html[:position] + marker + html[position:]
+        return html.encode("utf-8")
+
+    def _handler(self) -> type:
+        corpus = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                with corpus._lock:
+                    corpus.requests += 1
+                if corpus.latency:
+                    time.sleep(corpus.latency)
+                path = self.path.partition("?")[0]
+                prefix, _, number = path.rpartition("/")
+                if IMAGE_PATH.search(path):
+                    with corpus._lock:
+                        corpus.image_requests += 1
+                    pixel = "pixel" in number
+                    body, content_type = (PIXEL_GIF, "image/gif") if pixel else (ARTICLE_IMAGE, "image/png")
+                elif prefix == "/articulo" and number.isdigit():
+                    body, content_type = corpus.render(int(number)), "text/html; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return None
+
+        return Handler
+
+    def __enter__(self) -> "CorpusServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class StubOpenAI:
+    """Drop-in for the parts of ``openai.OpenAI`` used by ``URLProcessor``.
+
+    Summary requests take ``latency`` seconds and image requests ``image_latency`` seconds,
+    each varied by up to ``jitter`` (a fraction). Batched summary prompts are answered with
+    the JSON the agent asks for, and token usage is estimated from the prompt length.
+    """
+
+    def __init__(self, latency: float = 0.8, image_latency: float = 2.0, jitter: float = 0.2, seed: int = 7) -> None:
+        self.latency = latency
+        self.image_latency = image_latency
+        self.jitter = jitter
+        self.summary_requests = 0
+        self.image_requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.responses = SimpleNamespace(create=self._create_response)
+        self.images = SimpleNamespace(generate=self._generate_image)
+
+    def _wait(self, seconds: float) -> None:
+        with self._lock:
+            factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, seconds * factor))
+
+    def _create_response(self, *, model: str, input: List[Dict[str, str]], max_output_tokens: int) -> Any:
+        with self._lock:
+            self.summary_requests += 1
+        self._wait(self.latency)
+        prompt = "\n".join(message["content"] for message in input)
+        articles = len(re.findall(r"^### Artículo \d+", prompt, re.MULTILINE))
+        summary = "Resumen sintético del artículo: los datos principales, su contexto y por qué importan."
+        if articles:
+            text = json.dumps(
+                {"summaries": [{"id": index, "summary": f"{summary} ({index})"} for index in range(articles)]},
+                ensure_ascii=False,
+            )
+        else:
+            text = summary
+        usage = SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=len(text) // 4)
+        return SimpleNamespace(output_text=text, output=[], usage=usage)
+
+    def _generate_image(self, *, model: str, prompt: str, size: str, **options: Any) -> Any:
+        with self._lock:
+            self.image_requests += 1
+        self._wait(self.image_latency)
+        return SimpleNamespace(data=[SimpleNamespace(url=None, b64_json=GENERATED_IMAGE_B64)])
@@ -0,0 +1,182 @@
+"""Shared pieces of the benchmarks: backend process, percentiles, peak RSS and baselines."""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+# Differences below these amounts are timer noise and never count as a regression.
+NOISE_FLOOR = {"s": 0.02, "ms": 2.0}
+
+
+@dataclass
+class Metric:
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool = False
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of ``samples`` (0 when there are none)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mib(pid: Optional[int] = None) -> Optional[float]:
+    """Peak resident memory of this process, or of ``pid`` on Linux, in MiB."""
+    if pid is not None:
+        try:
+            status = Path(f"/proc/{pid}/status").read_text()
+        except OSError:
+            return None
+        for line in status.splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+        return None
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class BackendProcess:
+    """Runs the Flask backend in a child process on an empty database inside ``directory``.
+
+    A separate process keeps its memory and GIL apart from the agent being measured.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    def __enter__(self) -> "BackendProcess":
+        environment = dict(
+            os.environ,
+            POSTS_DB_PATH=str(self.directory / "posts.db"),
+            POSTS_IMAGES_DIR=str(self.directory / "images"),
+        )
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "flask", "--app", "backend.app", "run", "--port", str(self.port), "--with-threads"],
+            cwd=ROOT,
+            env=environment,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        # Imported here so benchmarks that never start a backend do not load ``requests``.
+        import requests
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError("El backend terminó al arrancar")
+            try:
+                requests.get(f"{self.base_url}/api/posts", params={"limit": 1}, timeout=1)
+                return self
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError("El backend no respondió a tiempo")
+
+    def __exit__(self, *exc_info: object) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+
+
+def add_baseline_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--baseline", type=Path, help="Compara el resultado con una línea base guardada")
+    parser.add_argument("--save-baseline", type=Path, help="Guarda el resultado como línea base en este fichero")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Empeoramiento relativo permitido respecto a la línea base (por defecto 0.10)",
+    )
+
+
+def save_baseline(path: Path, benchmark: str, metrics: List[Metric], parameters: Dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "benchmark": benchmark,
+        "created_at": datetime.utcnow().isoformat(),
+        "parameters": parameters,
+        "metrics": {metric.name: asdict(metric) for metric in metrics},
+    }
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nLínea base guardada en {path}")
+
+
+def compare_with_baseline(path: Path, benchmark: str, metrics: List[Metric], tolerance: float) -> List[str]:
+    """Print each metric next to its baseline value and return the names that regressed."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("benchmark") != benchmark:
+        raise SystemExit(f"{path} es una línea base de '{data.get('benchmark')}', no de '{benchmark}'")
+    baseline = data.get("metrics", {})
+    regressions: List[str] = []
+    print(f"\nComparación con {path} (tolerancia {tolerance:.0%})")
+    print(f"{'métrica':<40} {'base':>12} {'actual':>12} {'cambio':>9}")
+    for metric in metrics:
+        previous = baseline.get(metric.name, {}).get("value")
+        if previous is None:
+            print(f"{metric.name:<40} {'-':>12} {metric.value:>12.3f} {'nueva':>9}")
+            continue
+        change = (metric.value - previous) / previous if previous else 0.0
+        worse = -change if metric.higher_is_better else change
+        verdict = ""
+        if abs(metric.value - previous) < NOISE_FLOOR.get(metric.unit, 0.0):
+            worse = 0.0
+        if worse > tolerance:
+            regressions.append(metric.name)
+            verdict = "  ← peor"
+        elif worse < -tolerance:
+            verdict = "  mejor"
+        print(f"{metric.name:<40} {previous:>12.3f} {metric.value:>12.3f} {change:>+8.1%}{verdict}")
+    return regressions
+
+
+def report(benchmark: str, metrics: List[Metric], parameters: Dict[str, object], args: argparse.Namespace) -> None:
+    """Print ``metrics``, then save and/or compare them with a baseline as ``args`` requests.
+
+    Exits with status 1 when a metric is worse than the baseline by more than the tolerance.
+    """
+    print(f"\n{'métrica':<40} {'valor':>12}  unidad")
+    for metric in metrics:
+        print(f"{metric.name:<40} {metric.value:>12.3f}  {metric.unit}")
+    regressions: List[str] = []
+    if args.baseline:
+        regressions = compare_with_baseline(args.baseline, benchmark, metrics, args.tolerance)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, benchmark, metrics, parameters)
+    if regressions:
+        raise SystemExit(f"\nEmpeoran respecto a la línea base: {', '.join(regressions)}")
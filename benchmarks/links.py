@@ -0,0 +1,166 @@
+"""Microbenchmark of link extraction over a large synthetic corpus of Telegram messages.
+
+Usage::
+
+    python -m benchmarks.links [--messages 5000] [--long-posts 0.1] [--repeat 3]
+                               [--baseline base.json] [--save-baseline base.json]
+
+Compares the alternation regex the agent used to run over message text with the linear
+scanner of ``agent.utils.scan_urls`` and with reading the ``url``/``text_link`` entities sent
+by the MCP server. The corpus mixes short chat messages, long forwarded posts, links wrapped in
+parentheses or followed by punctuation, emoji (which shift UTF-16 entity offsets) and
+``http://`` prefixes followed by long runs without a dot, the worst case of the old pattern.
+Since the corpus knows which links each message really holds, the accuracy of every method is
+reported next to its speed.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from agent.telegram_monitor import entity_urls
+from agent.utils import extract_urls
+from shared.canonical import normalise_url
+
+from .harness import Metric, add_baseline_arguments, report
+
+# The pattern `extract_urls` used before the scanner, kept here as the reference.
+LEGACY_URL_PATTERN = re.compile(
+    r"(https?://(?:www\.|(?!www))[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|www\.[a-zA-Z0-9][a-zA-Z0-9-]+[a-zA-Z0-9]\.[^\s]{2,}|https?://(?:www\.|(?!www))[a-zA-Z0-9]+\.[^\s]{2,}|www\.[a-zA-Z0-9]+\.[^\s]{2,})"
+)
+HOSTS = ("elpais.com", "www.xataka.com", "eldiario.es", "es.wikipedia.org", "t.co", "nature.com")
+WORDS = (
+    "el", "la", "de", "que", "inteligencia", "artificial", "mercado", "según", "informe", "datos",
+    "años", "gobierno", "empresas", "https", "www", "http", "enlace", "vía", "nuevo", "análisis",
+)
+EMOJI = ("🚀", "📰", "👉", "🇪🇸", "✅")
+# How a link is written in the text: (prefix, suffix) around it.
+WRAPPERS = (("", ""), ("", "."), ("", ","), ("(", ")"), ("(ver ", ")."), ("«", "»"), ("", "!!"), ("<", ">"))
+
+Message = Dict[str, Any]
+
+
+def _utf16_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _link(generator: random.Random, number: int) -> Tuple[str, str]:
+    """Return a link as written in a message and the URL it should be extracted as."""
+    host = generator.choice(HOSTS)
+    if host == "es.wikipedia.org":
+        path = f"/wiki/Tema_{number}_(desambiguación)"
+    else:
+        path = f"/articulos/{number}" + generator.choice(("", "/", "?id=3&ref=tg", "#seccion"))
+    scheme = "" if host.startswith("www.") and generator.random() < 0.5 else "https://"
+    written = f"{scheme}{host}{path}"
+    return written, normalise_url(written)
+
+
+def synthetic_message(generator: random.Random, message_id: int, long_post: bool) -> Tuple[Message, List[str]]:
+    """Build one message with its ``url`` entities and the links it really contains."""
+    parts: List[str] = []
+    entities: List[Dict[str, Any]] = []
+    expected: List[str] = []
+    offset = 0
+    words = generator.randint(1500, 4000) if long_post else generator.randint(3, 40)
+    links = generator.randint(5, 40) if long_post else generator.randint(0, 3)
+    positions = set(generator.sample(range(words), min(links, words)))
+    for index in range(words):
+        if index in positions:
+            prefix, suffix = generator.choice(WRAPPERS)
+            written, url = _link(generator, message_id * 100 + index)
+            entities.append({"type": "url", "offset": offset + _utf16_length(prefix), "length": _utf16_length(written)})
+            expected.append(url)
+            token = f"{prefix}{written}{suffix}"
+        elif generator.random() < 0.002:
+            # A scheme followed by a long run without a dot is not a link; the old pattern
+            # backtracks over the whole run before giving up.
+            token = "http://" + "a" * generator.randint(50, 500)
+        elif generator.random() < 0.05:
+            token = generator.choice(EMOJI)
+        else:
+            token = generator.choice(WORDS)
+        parts.append(token)
+        offset += _utf16_length(token) + 1
+    return {"id": message_id, "text": " ".join(parts), "entities": entities}, expected
+
+
+def synthetic_corpus(messages: int, long_posts: float, seed: int) -> Tuple[List[Message], List[List[str]]]:
+    generator = random.Random(seed)
+    corpus = [synthetic_message(generator, number, generator.random() < long_posts) for number in range(messages)]
+    return [message for message, _ in corpus], [expected for _, expected in corpus]
+
+
+def legacy_extract(message: Message) -> List[str]:
+    return [normalise_url(match.group(0)) for match in LEGACY_URL_PATTERN.finditer(message["text"])]
+
+
+def scanner_extract(message: Message) -> List[str]:
+    return extract_urls(message["text"])
+
+
+def entities_extract(message: Message) -> List[str]:
+    return entity_urls(message["text"], message["entities"])
+
+
+METHODS: Dict[str, Callable[[Message], List[str]]] = {
+    "legacy_regex": legacy_extract,
+    "scanner": scanner_extract,
+    "entities": entities_extract,
+}
+
+
+def measure(
+    method: Callable[[Message], List[str]], corpus: List[Message], repeat: int
+) -> Tuple[float, float, List[List[str]]]:
+    """Return the median total seconds, the slowest single message (s) and the extracted links."""
+    totals = []
+    slowest = 0.0
+    results: List[List[str]] = []
+    for _ in range(repeat):
+        results = []
+        started = time.perf_counter()
+        for message in corpus:
+            before = time.perf_counter()
+            results.append(method(message))
+            slowest = max(slowest, time.perf_counter() - before)
+        totals.append(time.perf_counter() - started)
+    return statistics.median(totals), slowest, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmark de la extracción de enlaces")
+    parser.add_argument("--messages", type=int, default=5000, help="Mensajes del corpus sintético")
+    parser.add_argument("--long-posts", type=float, default=0.1, help="Fracción de reenvíos largos")
+    parser.add_argument("--repeat", type=int, default=3, help="Pasadas por método")
+    parser.add_argument("--seed", type=int, default=7, help="Semilla del corpus")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    corpus, expected = synthetic_corpus(args.messages, args.long_posts, args.seed)
+    megabytes = sum(len(message["text"].encode("utf-8")) for message in corpus) / 1024 / 1024
+    links = sum(len(urls) for urls in expected)
+    print(f"{len(corpus)} mensajes, {megabytes:.1f} MiB de texto, {links} enlaces")
+
+    print(f"\n{'método':<14} {'total (ms)':>11} {'MiB/s':>8} {'peor mensaje (ms)':>18} {'exactos':>8}")
+    metrics: List[Metric] = []
+    for name, method in METHODS.items():
+        elapsed, slowest, results = measure(method, corpus, args.repeat)
+        exact = sum(found == wanted for found, wanted in zip(results, expected)) / len(corpus)
+        print(
+            f"{name:<14} {elapsed * 1000:>11.1f} {megabytes / elapsed:>8.1f} "
+            f"{slowest * 1000:>18.2f} {exact:>8.1%}"
+        )
+        metrics.append(Metric(f"{name}_ms", elapsed * 1000, "ms"))
+        metrics.append(Metric(f"{name}_exact_fraction", exact, "fracción", higher_is_better=True))
+
+    parameters = {key: value for key, value in vars(args).items() if key not in {"baseline", "save_baseline"}}
+    report("links", metrics, parameters, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""End-to-end benchmark of one agent run against local stand-ins for every external service.
+
+Usage::
+
+    python -m benchmarks.pipeline [--urls 120] [--hosts 4] [--openai-latency 0.8]
+                                  [--baseline base.json] [--save-baseline base.json]
+
+A fake MCP session serves a synthetic chat history to ``TelegramMonitor``, loopback HTTP
+servers serve the saved pages of ``benchmarks/pages`` to ``URLProcessor``, a stub replaces the
+OpenAI client and the real backend runs in a child process on a temporary database. The run
+uses ``REVIEW_MODE=queue`` so nobody has to approve anything; every other agent setting
+(``PROCESSING_WORKERS``, ``SUMMARY_BATCH_SIZE``, ``OUTBOUND_HOST_RATE``...) is read from the
+environment as usual, which makes it easy to measure the effect of changing one of them.
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, List
+
+from .fakes import CorpusServer, FakeMCPServer, StubOpenAI, synthetic_history
+from .harness import BackendProcess, Metric, add_baseline_arguments, peak_rss_mib, report
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "pages"
+
+
+def _counter(run_report: Dict, name: str, **labels: str) -> float:
+    return sum(
+        item["value"]
+        for item in run_report["counters"]
+        if item["name"] == name and all(item["labels"].get(key) == value for key, value in labels.items())
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de una ejecución completa del agente")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="Directorio con páginas *.html guardadas")
+    parser.add_argument("--urls", type=int, default=120, help="Artículos distintos enlazados en el chat")
+    parser.add_argument("--messages", type=int, default=100, help="Mensajes del historial sintético")
+    parser.add_argument("--chats", type=int, default=1, help="Chats monitorizados entre los que se reparten")
+    parser.add_argument("--hosts", type=int, default=4, help="Sitios simulados (127.0.0.1, 127.0.0.2...)")
+    parser.add_argument("--page-latency", type=float, default=0.05, help="Segundos que tarda cada página")
+    parser.add_argument("--mcp-latency", type=float, default=0.02, help="Segundos por llamada al servidor MCP")
+    parser.add_argument("--openai-latency", type=float, default=0.8, help="Segundos por petición de resumen")
+    parser.add_argument("--image-latency", type=float, default=2.0, help="Segundos por imagen generada")
+    parser.add_argument("--without-image", type=float, default=0.25, help="Fracción de páginas sin imagen")
+    parser.add_argument("--seed", type=int, default=7, help="Semilla del historial y de la latencia simulada")
+    parser.add_argument("--verbose", action="store_true", help="Muestra la salida del agente")
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    pages = sorted(args.corpus.glob("*.html"))
+    if not pages:
+        raise SystemExit(f"No se encontraron páginas HTML en {args.corpus}")
+
+    from agent.config import Settings
+    from agent.workflow import MonitoringWorkflow
+
+    with ExitStack() as stack:
+        directory = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="agent-benchmark-")))
+        # Every loopback address is a different host for the per-host rate limits (Linux routes
+        # the whole 127.0.0.0/8 range to the loopback interface).
+        servers = [
+            stack.enter_context(
+                CorpusServer(pages, host=f"127.0.0.{index + 1}", latency=args.page_latency, without_image=args.without_image)
+            )
+            for index in range(args.hosts)
+        ]
+        urls = [servers[number % len(servers)].article_url(number) for number in range(args.urls)]
+        chat_ids = [f"canal{index + 1}" for index in range(args.chats)]
+        histories = {
+            chat_id: synthetic_history(urls[index :: args.chats], args.messages // args.chats, seed=args.seed + index)
+            for index, chat_id in enumerate(chat_ids)
+        }
+        mcp = FakeMCPServer(histories, latency=args.mcp_latency)
+        backend = stack.enter_context(BackendProcess(directory))
+        stack.enter_context(mcp.installed())
+
+        settings = Settings(
+            _env_file=None,
+            TELEGRAM_CHAT_ID=None,
+            TELEGRAM_CHAT_IDS=",".join(chat_ids),
+            TELEGRAM_MCP_SERVER="fake://telegram-mcp",
+            OPENAI_API_KEY="sk-benchmark",
+            BACKEND_BASE_URL=backend.base_url,
+            REVIEW_MODE="queue",
+            AGENT_STATE_FILE=directory / "agent_state.json",
+            AGENT_JOURNAL_FILE=directory / "agent_journal.db",
+            AGENT_SEEN_URLS_FILE=directory / "agent_seen.db",
+            AGENT_CACHE_FILE=directory / "agent_cache.db",
+            AGENT_REPORT_FILE=directory / "agent_report.json",
+        )
+        workflow = MonitoringWorkflow(settings)
+        openai = StubOpenAI(latency=args.openai_latency, image_latency=args.image_latency, seed=args.seed)
+        workflow.processor.client = openai
+
+        output = io.StringIO()
+        started = time.perf_counter()
+        try:
+            with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(output):
+                workflow.run_once()
+        finally:
+            elapsed = time.perf_counter() - started
+            run_report = workflow.metrics.report()
+            workflow.close()
+        backend_rss = peak_rss_mib(backend.pid)
+
+    queued = _counter(run_report, "urls", outcome="queued")
+    failed = _counter(run_report, "url_errors")
+    print(
+        f"{len(urls)} artículos en {mcp.message_count} mensajes de {args.chats} chat(s), {args.hosts} sitios, "
+        f"PROCESSING_WORKERS={settings.processing_workers}, SUMMARY_BATCH_SIZE={settings.summary_batch_size}"
+    )
+    print(
+        f"{queued:.0f} URLs enviadas a revisión y {failed:.0f} con error en {elapsed:.1f} s; "
+        f"{openai.summary_requests} peticiones de resumen, {openai.image_requests} imágenes, "
+        f"{mcp.calls} llamadas MCP."
+    )
+    if queued + failed < len(urls):
+        print(f"Aviso: {len(urls) - queued - failed:.0f} URLs no llegaron al final del flujo.")
+
+    metrics: List[Metric] = [
+        Metric("throughput_urls_per_min", queued / elapsed * 60 if elapsed else 0.0, "URLs/min", higher_is_better=True),
+        Metric("wall_seconds", elapsed, "s"),
+    ]
+    for stage, span in run_report["spans"].items():
+        metrics.append(Metric(f"{stage}_p50_seconds", span["p50_seconds"], "s"))
+        metrics.append(Metric(f"{stage}_p95_seconds", span["p95_seconds"], "s"))
+    metrics.append(Metric("openai_summary_requests", openai.summary_requests, "peticiones"))
+    agent_rss = peak_rss_mib()
+    if agent_rss is not None:
+        metrics.append(Metric("agent_peak_rss_mib", agent_rss, "MiB"))
+    if backend_rss is not None:
+        metrics.append(Metric("backend_peak_rss_mib", backend_rss, "MiB"))
+
+    parameters = {key: value for key, value in vars(args).items() if key not in {"baseline", "save_baseline"}}
+    parameters.update(
+        corpus=str(args.corpus),
+        processing_workers=settings.processing_workers,
+        summary_batch_size=settings.summary_batch_size,
+        openai_concurrency=settings.openai_concurrency,
+        outbound_host_rate=settings.outbound_host_rate,
+        cpu_count=os.cpu_count(),
+    )
+    report("pipeline", metrics, parameters, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Startup cost of the agent CLI, measured in fresh interpreters.
+
+Usage::
+
+    python -m benchmarks.startup [--repeat 5] [--baseline base.json] [--save-baseline base.json]
+
+Reports the import time of ``agent.main`` taken from ``python -X importtime`` (with the modules
+that cost the most), and the wall time of a complete ``python -m agent.main --once`` run that
+finds no new messages, the usual cron case, against a fake MCP session. It also checks which
+heavy dependencies that run loaded even though it had nothing to process.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .harness import ROOT, Metric, add_baseline_arguments, report
+
+# Only needed once there is a page to parse, an article to summarise or a post to publish.
+HEAVY_MODULES = ("openai", "lxml", "readability", "bs4", "requests")
+IMPORT_LINE = re.compile(r"^import time:\s*(\d+) \|\s*(\d+) \| ( *)(\S+)$")
+CHILD_CHAT = "startup"
+
+
+def import_profile() -> Tuple[float, List[Tuple[str, float]]]:
+    """Import ``agent.main`` in a new interpreter; return its total ms and the costliest packages."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import agent.main"],
+        cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=str(ROOT)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0.0
+    packages: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        if name == "agent.main":
+            total = int(cumulative_us) / 1000
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1000
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:8]
+    return total, heaviest
+
+
+def _child_environment(directory: Path) -> Dict[str, str]:
+    return dict(
+        os.environ,
+        PYTHONPATH=str(ROOT),
+        TELEGRAM_CHAT_ID=CHILD_CHAT,
+        TELEGRAM_MCP_SERVER="fake://telegram-mcp",
+        OPENAI_API_KEY="sk-startup",
+        REVIEW_MODE="queue",
+        AGENT_PUSH_METRICS="false",
+        AGENT_STATE_FILE=str(directory / "agent_state.json"),
+        AGENT_JOURNAL_FILE=str(directory / "agent_journal.db"),
+        AGENT_SEEN_URLS_FILE=str(directory / "agent_seen.db"),
+        AGENT_CACHE_FILE=str(directory / "agent_cache.db"),
+        AGENT_REPORT_FILE=str(directory / "agent_report.json"),
+    )
+
+
+def quiet_run() -> Tuple[float, List[str]]:
+    """Run the agent once with no new messages in a new interpreter; return wall ms and heavy modules."""
+    with tempfile.TemporaryDirectory(prefix="agent-startup-") as directory:
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--child"],
+            cwd=directory,
+            env=_child_environment(Path(directory)),
+            capture_output=True,
+            text=True,
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise SystemExit(f"La ejecución del agente falló:\n{completed.stderr}")
+    loaded = json.loads(completed.stdout.strip().splitlines()[-1])["heavy_modules"]
+    return elapsed, loaded
+
+
+def child() -> None:
+    """Entry point of the measured interpreter: `python -m agent.main --once` over a fake MCP session."""
+    from .fakes import FakeMCPServer
+
+    output = io.StringIO()
+    with FakeMCPServer({CHILD_CHAT: []}).installed(), redirect_stdout(output):
+        from agent.main import main as agent_main
+
+        agent_main(["--once"])
+    print(json.dumps({"heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules]}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark del arranque del agente")
+    parser.add_argument("--repeat", type=int, default=5, help="Intérpretes lanzados por medida")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    interpreter = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        interpreter.append((time.perf_counter() - started) * 1000)
+    imports = [import_profile() for _ in range(args.repeat)]
+    runs = [quiet_run() for _ in range(args.repeat)]
+
+    print(f"Intérprete vacío: {statistics.median(interpreter):.0f} ms")
+    print("Paquetes con más tiempo de importación (última medida):")
+    for package, milliseconds in imports[-1][1]:
+        print(f"  {package:<24} {milliseconds:>8.1f} ms")
+    loaded = runs[-1][1]
+    print(
+        "Dependencias pesadas cargadas sin mensajes nuevos: "
+        + (", ".join(loaded) if loaded else "ninguna")
+    )
+
+    metrics = [
+        Metric("import_agent_main_ms", statistics.median(total for total, _ in imports), "ms"),
+        Metric("no_messages_run_ms", statistics.median(elapsed for elapsed, _ in runs), "ms"),
+        Metric("heavy_modules_loaded", len(loaded), "módulos"),
+    ]
+    report("startup", metrics, {"repeat": args.repeat, "python": sys.version.split()[0]}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,42 @@
 const API_BASE_URL = window.API_BASE_URL || "http://localhost:8000";
 const POSTS_ENDPOINT = `${API_BASE_URL}/api/posts`;
+const SEARCH_ENDPOINT = `${POSTS_ENDPOINT}/search`;
+const STREAM_ENDPOINT = `${POSTS_ENDPOINT}/stream`;
 const REFRESH_INTERVAL_MS = 5 * 60 * 1000;
+const PAGE_SIZE = 24;
+const POST_FIELDS = "id,title,summary,source_url,image_url,image_srcset,release_date,provider";
+// Card widths of the `.posts-grid` layout, so the browser picks the smallest sufficient thumbnail.
+const IMAGE_SIZES = "(max-width: 640px) 100vw, (max-width: 1100px) 50vw, 420px";
 
 const postsContainer = document.querySelector("#postsContainer");
 const postTemplate = document.querySelector("#postTemplate");
 const refreshButton = document.querySelector("#refreshButton");
+const loadMoreButton = document.querySelector("#loadMoreButton");
+const searchForm = document.querySelector("#searchForm");
+const searchInput = document.querySelector("#searchInput");
 
-async function fetchPosts() {
+let newestId = null;
+let nextBeforeId = null;
+let listLoaded = false;
+let searchQuery = "";
+let nextOffset = null;
+
+async function fetchPosts(params = {}, endpoint = POSTS_ENDPOINT) {
+  const query = new URLSearchParams({ limit: PAGE_SIZE, fields: POST_FIELDS, ...params });
   try {
-    const response = await fetch(POSTS_ENDPOINT);
+    const response = await fetch(`${endpoint}?${query}`);
     if (!response.ok) {
       throw new Error(`API responded with ${response.status}`);
     }
     const data = await response.json();
-    return Array.isArray(data.items) ? data.items : [];
+    return {
+      items: Array.isArray(data.items) ? data.items : [],
+      nextBeforeId: data.next_before_id ?? null,
+      nextOffset: data.next_offset ?? null,
+    };
   } catch (error) {
     console.error("Unable to fetch posts", error);
-    return [];
+    return null;
   }
 }
 
@@ -31,51 +51,184 @@ function getProvider(post) {
   }
 }
 
-function renderPosts(posts) {
-  postsContainer.innerHTML = "";
-  if (posts.length === 0) {
-    postsContainer.innerHTML = '<p class="empty-state">No hay publicaciones disponibles todavía.</p>';
-    return;
-  }
+function createPostElement(post) {
+  const element = postTemplate.content.firstElementChild.cloneNode(true);
 
-  const fragment = document.createDocumentFragment();
-  posts.forEach((post) => {
-    const element = postTemplate.content.firstElementChild.cloneNode(true);
-
-    const imageWrapper = element.querySelector(".image-wrapper");
-    imageWrapper.innerHTML = "";
-
-    if (post.image_url) {
-      const image = document.createElement("img");
-      image.src = post.image_url;
-      image.alt = post.title || "Imagen destacada";
-      image.loading = "lazy";
-      imageWrapper.appendChild(image);
-    } else {
-      imageWrapper.classList.add("no-image");
-      imageWrapper.textContent = "Sin imagen";
+  const imageWrapper = element.querySelector(".image-wrapper");
+  imageWrapper.innerHTML = "";
+
+  if (post.image_url) {
+    const image = document.createElement("img");
+    // Images kept by the backend are returned as `/api/images/<hash>` paths.
+    image.src = new URL(post.image_url, API_BASE_URL).href;
+    if (post.image_srcset) {
+      // `image_srcset` lists the WebP thumbnails as "<path> <width>w" candidates.
+      image.srcset = post.image_srcset
+        .split(", ")
+        .map((candidate) => {
+          const [path, descriptor] = candidate.split(" ");
+          return `${new URL(path, API_BASE_URL).href} ${descriptor}`;
+        })
+        .join(", ");
+      image.sizes = IMAGE_SIZES;
     }
+    image.alt = post.title || "Imagen destacada";
+    image.loading = "lazy";
+    imageWrapper.appendChild(image);
+  } else {
+    imageWrapper.classList.add("no-image");
+    imageWrapper.textContent = "Sin imagen";
+  }
 
+  if (post.highlight) {
+    // Search results come with HTML-escaped text where only the matches are wrapped in <mark>.
+    element.querySelector(".post-title").innerHTML = post.highlight.title;
+    element.querySelector(".post-summary").innerHTML = post.highlight.summary;
+  } else {
     element.querySelector(".post-title").textContent = post.title;
     element.querySelector(".post-summary").textContent = post.summary;
-    element.querySelector(".post-link").href = post.source_url;
-    element.querySelector(".post-link").setAttribute("aria-label", `Abrir ${post.title}`);
+  }
+  element.querySelector(".post-link").href = post.source_url;
+  element.querySelector(".post-link").setAttribute("aria-label", `Abrir ${post.title}`);
 
-    element.querySelector(".provider").textContent = getProvider(post);
-    element.querySelector(".release-date").textContent = post.release_date || "Fecha desconocida";
+  element.querySelector(".provider").textContent = getProvider(post);
+  element.querySelector(".release-date").textContent = post.release_date || "Fecha desconocida";
 
-    fragment.appendChild(element);
-  });
+  return element;
+}
 
-  postsContainer.appendChild(fragment);
+function buildFragment(posts) {
+  const fragment = document.createDocumentFragment();
+  posts.forEach((post) => fragment.appendChild(createPostElement(post)));
+  return fragment;
+}
+
+function renderPosts(posts, emptyMessage = "No hay publicaciones disponibles todavía.") {
+  postsContainer.innerHTML = "";
+  if (posts.length === 0) {
+    const empty = document.createElement("p");
+    empty.className = "empty-state";
+    empty.textContent = emptyMessage;
+    postsContainer.appendChild(empty);
+    return;
+  }
+  postsContainer.appendChild(buildFragment(posts));
+}
+
+function updateLoadMore() {
+  if (loadMoreButton) {
+    loadMoreButton.hidden = searchQuery ? nextOffset === null : nextBeforeId === null;
+  }
+}
+
+async function loadFirstPage() {
+  const page = await fetchPosts();
+  if (!page) {
+    return;
+  }
+  renderPosts(page.items);
+  listLoaded = true;
+  newestId = page.items.length > 0 ? page.items[0].id : null;
+  nextBeforeId = page.nextBeforeId;
+  updateLoadMore();
+}
+
+async function runSearch(query) {
+  searchQuery = query.trim();
+  if (!searchQuery) {
+    await loadFirstPage();
+    return;
+  }
+  const page = await fetchPosts({ q: searchQuery }, SEARCH_ENDPOINT);
+  if (!page || searchQuery !== query.trim()) {
+    return;
+  }
+  renderPosts(page.items, `No se encontraron publicaciones para «${searchQuery}».`);
+  nextOffset = page.nextOffset;
+  updateLoadMore();
+}
+
+async function loadMore() {
+  if (searchQuery) {
+    if (nextOffset === null) {
+      return;
+    }
+    const page = await fetchPosts({ q: searchQuery, offset: nextOffset }, SEARCH_ENDPOINT);
+    if (!page) {
+      return;
+    }
+    postsContainer.appendChild(buildFragment(page.items));
+    nextOffset = page.nextOffset;
+    updateLoadMore();
+    return;
+  }
+  if (nextBeforeId === null) {
+    return;
+  }
+  const page = await fetchPosts({ before_id: nextBeforeId });
+  if (!page) {
+    return;
+  }
+  postsContainer.appendChild(buildFragment(page.items));
+  nextBeforeId = page.nextBeforeId;
+  updateLoadMore();
 }
 
 async function refresh() {
-  const posts = await fetchPosts();
-  renderPosts(posts);
+  if (searchQuery) {
+    await runSearch(searchQuery);
+    return;
+  }
+  if (newestId === null) {
+    await loadFirstPage();
+    return;
+  }
+  const page = await fetchPosts({ since_id: newestId });
+  if (!page || page.items.length === 0) {
+    return;
+  }
+  if (page.nextBeforeId !== null) {
+    // More new posts than fit in one page: start over instead of leaving a gap.
+    await loadFirstPage();
+    return;
+  }
+  prependPosts(page.items);
+}
+
+function prependPosts(posts) {
+  postsContainer.querySelector(".empty-state")?.remove();
+  postsContainer.prepend(buildFragment(posts));
+  newestId = posts[0].id;
+}
+
+function connectStream() {
+  // The browser reconnects on its own and resumes with `Last-Event-ID`.
+  // Without a loaded list the stream starts at the posts created from now on.
+  const query = new URLSearchParams({ fields: POST_FIELDS });
+  if (listLoaded) {
+    query.set("since_id", newestId ?? 0);
+  }
+  const source = new EventSource(`${STREAM_ENDPOINT}?${query}`);
+  source.addEventListener("post", (event) => {
+    const post = JSON.parse(event.data);
+    if (searchQuery || (newestId !== null && post.id <= newestId)) {
+      return;
+    }
+    prependPosts([post]);
+  });
 }
 
 refreshButton?.addEventListener("click", refresh);
+loadMoreButton?.addEventListener("click", loadMore);
+searchForm?.addEventListener("submit", (event) => {
+  event.preventDefault();
+  runSearch(searchInput.value);
+});
 
-refresh();
-setInterval(refresh, REFRESH_INTERVAL_MS);
+loadFirstPage().then(() => {
+  if ("EventSource" in window) {
+    connectStream();
+  } else {
+    setInterval(refresh, REFRESH_INTERVAL_MS);
+  }
+});
@@ -4,45 +4,76 @@ from __future__ import annotations
 
 import argparse
 import os
-import subprocess
 import sys
+from functools import partial
 from pathlib import Path
+from typing import List
 
 ROOT = Path(__file__).resolve().parent
 
+# Every component runs inside this interpreter instead of a child process, and each one only
+# imports its own dependencies.
 
-def run_backend() -> int:
-    env = os.environ.copy()
-    env.setdefault("FLASK_APP", "backend.app")
-    command = [sys.executable, "-m", "flask", "run", "--host", "0.0.0.0", "--port", "8000"]
-    return subprocess.call(command, cwd=ROOT, env=env)
 
+def run_backend(host: str, port: int) -> int:
+    from backend.app import app
 
-def run_agent() -> int:
-    command = [sys.executable, "-m", "agent.main"]
-    return subprocess.call(command, cwd=ROOT)
+    app.run(host=host, port=port, threaded=True)
+    return 0
+
+
+def run_agent(argv: List[str]) -> int:
+    from agent.main import main as agent_main
+
+    agent_main(argv)
+    return 0
+
+
+def run_review(argv: List[str]) -> int:
+    from agent.review import main as review_main
+
+    review_main(argv)
+    return 0
 
 
 def run_frontend(port: int) -> int:
-    command = [sys.executable, "-m", "http.server", str(port), "--directory", str(ROOT / "frontend")]
-    return subprocess.call(command)
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    handler = partial(SimpleHTTPRequestHandler, directory=str(ROOT / "frontend"))
+    with ThreadingHTTPServer(("", port), handler) as server:
+        print(f"Sirviendo la interfaz web en http://localhost:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Launcher para Telegram Monitor Agent")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
-    subparsers.add_parser("backend", help="Inicia el API Flask")
-    subparsers.add_parser("agent", help="Ejecuta el agente IA una vez")
+    backend_parser = subparsers.add_parser("backend", help="Inicia el API Flask")
+    backend_parser.add_argument("--host", default="0.0.0.0")
+    backend_parser.add_argument("--port", type=int, default=8000)
+    agent_parser = subparsers.add_parser("agent", help="Ejecuta el agente IA (acepta --once y --watch)")
+    agent_parser.add_argument("options", nargs=argparse.REMAINDER)
+    review_parser = subparsers.add_parser("review", help="Revisa las publicaciones pendientes de aprobación")
+    review_parser.add_argument("options", nargs=argparse.REMAINDER)
     frontend_parser = subparsers.add_parser("frontend", help="Sirve la interfaz web estática")
     frontend_parser.add_argument("--port", type=int, default=3000)
 
     args = parser.parse_args()
+    # `.env` and the agent state files are looked up in the project root, as before.
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
 
     if args.command == "backend":
-        sys.exit(run_backend())
+        sys.exit(run_backend(args.host, args.port))
     if args.command == "agent":
-        sys.exit(run_agent())
+        sys.exit(run_agent(args.options))
+    if args.command == "review":
+        sys.exit(run_review(args.options))
     if args.command == "frontend":
         sys.exit(run_frontend(args.port))
 
@@ -0,0 +1 @@
+"""Helpers used by both the agent and the backend, with no dependency on either."""
@@ -0,0 +1,72 @@
+"""URL normalisation shared by the agent and the backend to recognise the same article."""
+from __future__ import annotations
+
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+SCHEME_PATTERN = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*://")
+TRACKING_PREFIXES = ("utm_",)
+TRACKING_PARAMETERS = frozenset(
+    {
+        "fbclid",
+        "gclid",
+        "dclid",
+        "gclsrc",
+        "msclkid",
+        "yclid",
+        "igshid",
+        "mc_cid",
+        "mc_eid",
+        "_ga",
+        "_hsenc",
+        "_hsmi",
+        "mkt_tok",
+        "ref_src",
+    }
+)
+
+
+def _is_tracking(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMETERS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalise_url(url: str) -> str:
+    """Clean a URL without changing the resource it points to, so it is still safe to fetch.
+
+    Adds a missing scheme, lowercases scheme and host, drops default ports, fragments and
+    tracking parameters (``utm_*``, ``fbclid``...).
+    """
+    url = url.strip()
+    if not SCHEME_PATTERN.match(url):
+        url = f"https://{url}"
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = parts.query
+    pairs = parse_qsl(query, keep_blank_values=True)
+    kept = [(name, value) for name, value in pairs if not _is_tracking(name)]
+    if len(kept) != len(pairs):
+        # Only re-encode when something was removed so untouched query strings stay byte-identical.
+        query = urlencode(kept, doseq=True)
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def canonicalise_url(url: str) -> str:
+    """Return the identity key of an article URL.
+
+    On top of :func:`normalise_url` it folds ``http``/``https`` and ``www.``/bare host, removes
+    trailing slashes and sorts the query string. The result identifies a page but is not meant
+    to be fetched.
+    """
+    parts = urlsplit(normalise_url(url))
+    host = parts.netloc[4:] if parts.netloc.startswith("www.") else parts.netloc
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)), doseq=True)
+    return urlunsplit(("https", host, path, query, ""))
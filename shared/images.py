@@ -0,0 +1,134 @@
+"""Image inspection and resizing shared by the agent and the backend.
+
+Formats and dimensions are read from the file headers, so checking an image needs no extra
+dependency. Resizing needs Pillow, which is optional and only imported when an image has to be
+resized: without it images are kept at their original size.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import importlib.util
+import io
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG start-of-frame markers, the segments that carry the image size (C4, C8 and CC are not frames).
+JPEG_FRAME_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    mime_type: str
+    width: int
+    height: int
+
+
+def _jpeg_info(data: bytes) -> Optional[ImageInfo]:
+    position = 2
+    while position + 9 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker.
+            position += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Markers without a length field.
+            position += 2
+            continue
+        if marker in JPEG_FRAME_MARKERS:
+            height, width = struct.unpack(">HH", data[position + 5 : position + 9])
+            return ImageInfo("image/jpeg", width, height)
+        (length,) = struct.unpack(">H", data[position + 2 : position + 4])
+        position += 2 + length
+    return None
+
+
+def _webp_info(data: bytes) -> Optional[ImageInfo]:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30 and data[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", data[26:30])
+        return ImageInfo("image/webp", width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L" and len(data) >= 25 and data[20] == 0x2F:
+        bits = int.from_bytes(data[21:25], "little")
+        return ImageInfo("image/webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return ImageInfo("image/webp", width, height)
+    return None
+
+
+def image_info(data: bytes) -> Optional[ImageInfo]:
+    """Read the format and size of a PNG, GIF, JPEG or WebP image from its header.
+
+    Returns ``None`` for any other format (SVG, HTML error pages...) and for truncated or
+    corrupt headers.
+    """
+    info: Optional[ImageInfo] = None
+    if data.startswith(PNG_SIGNATURE) and data[12:16] == b"IHDR" and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        info = ImageInfo("image/png", width, height)
+    elif data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        width, height = struct.unpack("<HH", data[6:10])
+        info = ImageInfo("image/gif", width, height)
+    elif data.startswith(b"\xff\xd8"):
+        info = _jpeg_info(data)
+    elif data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        info = _webp_info(data)
+    if info is None or not info.width or not info.height:
+        return None
+    return info
+
+
+def can_resize() -> bool:
+    """Whether Pillow is installed, without importing it."""
+    return importlib.util.find_spec("PIL") is not None
+
+
+def resize_to_webp(data: bytes, width: int, quality: int = 80) -> Optional[bytes]:
+    """Scale ``data`` down to ``width`` pixels wide, keeping its aspect ratio, as WebP.
+
+    Returns ``None`` when Pillow is not installed or the image cannot be decoded.
+    """
+    try:
+        from PIL import Image, UnidentifiedImageError
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, format="WEBP", quality=quality, method=4)
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError):
+        return None
+    return output.getvalue()
+
+
+def to_data_uri(data: bytes, mime_type: str) -> str:
+    return f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def describe_image(image_url: Optional[str]) -> str:
+    """Short console description of an image: the URL, or format, size and weight of a ``data:`` URI."""
+    if not image_url:
+        return "(no disponible)"
+    if not image_url.startswith("data:"):
+        return image_url
+    try:
+        data = base64.b64decode(image_url.split(",", 1)[1], validate=True)
+    except (IndexError, binascii.Error, ValueError):
+        return "(imagen incrustada no válida)"
+    info = image_info(data)
+    size = f"{len(data) / 1024:.0f} KB"
+    if info is None:
+        return f"(imagen incrustada, {size})"
+    return f"(imagen incrustada {info.mime_type.split('/')[1].upper()}, {info.width}x{info.height}, {size})"
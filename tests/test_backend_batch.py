@@ -0,0 +1,63 @@
+"""A malformed item in a batch is reported on its own and does not lose the rest."""
+import importlib
+import os
+import sys
+
+import pytest
+
+
+@pytest.fixture()
+def client(tmp_path, monkeypatch):
+    # The backend reads its paths from the environment when it is imported.
+    monkeypatch.setenv("POSTS_DB_PATH", str(tmp_path / "posts.db"))
+    monkeypatch.setenv("POSTS_IMAGES_DIR", str(tmp_path / "images"))
+    monkeypatch.delenv("POSTS_SNAPSHOT_DIR", raising=False)
+    for name in [name for name in sys.modules if name == "backend" or name.startswith("backend.")]:
+        del sys.modules[name]
+    app = importlib.import_module("backend.app").app
+    yield app.test_client()
+    importlib.import_module("backend.database").pool.close()
+
+
+def _post(number: int, **fields):
+    post = {
+        "title": f"Post {number}",
+        "summary": "Resumen",
+        "source_url": f"https://example.com/articulos/{number}",
+        "release_date": "2024-05-01",
+    }
+    post.update(fields)
+    return post
+
+
+@pytest.mark.parametrize(
+    "malformed",
+    [{"title": 5}, {"source_url": None}, {"image_url": 123}, {"provider": ["a"]}],
+)
+def test_batch_keeps_valid_items_when_one_is_malformed(client, malformed):
+    response = client.post("/api/posts/batch", json={"items": [_post(1), _post(2, **malformed), _post(3)]})
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == ["created", "error", "created"]
+    assert results[1]["error"] == "invalid_request"
+    titles = {item["title"] for item in client.get("/api/posts").get_json()["items"]}
+    assert titles == {"Post 1", "Post 3"}
+
+
+def test_single_post_with_wrong_type_is_rejected(client):
+    response = client.post("/api/posts", json=_post(1, summary={"text": "x"}))
+
+    assert response.status_code == 400
+    assert "summary" in response.get_json()["details"]
+
+
+def test_duplicate_post_does_not_store_its_inline_image(client, tmp_path):
+    image = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+    assert client.post("/api/posts", json=_post(1)).status_code == 201
+
+    response = client.post("/api/posts/batch", json={"items": [_post(1, image_url=image), _post(2, image_url="data:x")]})
+
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == ["exists", "error"]
+    assert not (tmp_path / "images").exists() or not any((tmp_path / "images").iterdir())
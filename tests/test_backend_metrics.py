@@ -0,0 +1,53 @@
+"""Agent run reports exported on the backend's ``/metrics``."""
+import pytest
+
+from backend import metrics
+from backend.metrics import MetricsRegistry
+
+
+def _report(counters=(), spans=None):
+    return {"duration_seconds": 1.5, "spans": spans or {}, "counters": list(counters)}
+
+
+def test_known_counters_and_stages_are_exported():
+    registry = MetricsRegistry()
+    registry.record_agent_report(
+        _report(
+            [{"name": "urls", "labels": {"outcome": "approved"}, "value": 2}],
+            {"parse": {"count": 2, "total_seconds": 0.5, "p95_seconds": 0.3}},
+        )
+    )
+
+    text = registry.render()
+    assert 'agent_urls_total{outcome="approved"} 2.0' in text
+    assert 'agent_stage_seconds_count{stage="parse"} 2' in text
+    assert "agent_runs_total 1" in text
+
+
+def test_unknown_counters_and_stages_are_ignored():
+    registry = MetricsRegistry()
+    registry.record_agent_report(
+        _report([{"name": "made_up", "labels": {}, "value": 1}], {"made_up": {"count": 1, "total_seconds": 1}})
+    )
+
+    text = registry.render()
+    assert "made_up" not in text
+    assert "agent_runs_total 1" in text
+
+
+def test_counter_series_and_label_values_are_capped(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_AGENT_SERIES", 3)
+    registry = MetricsRegistry()
+    counters = [{"name": "url_errors", "labels": {"host": f"{index}.example.com" + "x" * 100}, "value": 1} for index in range(5)]
+    registry.record_agent_report(_report(counters))
+
+    series = [line for line in registry.render().splitlines() if line.startswith("agent_url_errors_total{")]
+    assert len(series) == 3
+    assert all(len(line.split('"')[1]) == metrics.MAX_LABEL_LENGTH for line in series)
+
+
+def test_counter_with_too_many_labels_is_rejected():
+    labels = {f"label{index}": "x" for index in range(metrics.MAX_LABELS + 1)}
+
+    with pytest.raises(ValueError):
+        MetricsRegistry().record_agent_report(_report([{"name": "urls", "labels": labels, "value": 1}]))
@@ -0,0 +1,69 @@
+"""Images stored by the backend from inline ``data:`` URIs."""
+import importlib
+import os
+import sys
+import threading
+
+import pytest
+
+
+@pytest.fixture()
+def blobs(tmp_path, monkeypatch):
+    # The store reads its directory from the environment when it is imported.
+    monkeypatch.setenv("POSTS_IMAGES_DIR", str(tmp_path / "images"))
+    sys.modules.pop("backend.blobs", None)
+    return importlib.import_module("backend.blobs")
+
+
+def test_concurrent_writes_of_the_same_image_leave_one_complete_file(blobs, tmp_path):
+    data = os.urandom(256 * 1024)
+    errors = []
+
+    def store():
+        try:
+            blobs.store_image(data, "image/png")
+        except Exception as error:  # noqa: BLE001 - collected for the assertion below
+            errors.append(error)
+
+    threads = [threading.Thread(target=store) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    stored = list((tmp_path / "images").iterdir())
+    assert len(stored) == 1
+    assert stored[0].read_bytes() == data
+
+
+GIF = "data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7"
+
+
+def test_data_uri_is_decoded_when_it_holds_the_declared_image(blobs):
+    image = blobs.decode_data_uri(GIF)
+
+    assert image.mime_type == "image/gif"
+    assert image.data.startswith(b"GIF89a")
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "data:image/png;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7",
+        "data:image/jpeg;base64,PGh0bWw+PC9odG1sPg==",
+        "data:image/svg+xml;base64,PHN2Zy8+",
+        "data:image/gif,GIF89a",
+        "data:image/gif;base64,***",
+    ],
+)
+def test_data_uri_that_is_not_the_declared_image_is_rejected(blobs, value):
+    with pytest.raises(ValueError):
+        blobs.decode_data_uri(value)
+
+
+def test_data_uri_over_the_size_limit_is_rejected(blobs, monkeypatch):
+    monkeypatch.setattr(blobs, "MAX_IMAGE_BYTES", 30)
+
+    with pytest.raises(ValueError, match="exceeds"):
+        blobs.decode_data_uri(GIF)
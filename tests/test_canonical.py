@@ -0,0 +1,36 @@
+"""URL normalisation and the canonical form shared by the agent and the backend."""
+import pytest
+
+from shared.canonical import canonicalise_url, normalise_url
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("example.com/a", "https://example.com/a"),
+        ("HTTPS://Example.COM:443/A?utm_source=tg&id=1#top", "https://example.com/A?id=1"),
+        ("http://example.com:8080", "http://example.com:8080/"),
+        ("https://example.com/a?b=2&a=1", "https://example.com/a?b=2&a=1"),
+    ],
+)
+def test_normalise_url_keeps_the_same_resource(url, expected):
+    assert normalise_url(url) == expected
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://example.com/nota",
+        "http://example.com/nota",
+        "https://www.example.com/nota/",
+        "www.example.com/nota?fbclid=abc",
+        "https://EXAMPLE.com/nota?utm_campaign=x#comentarios",
+    ],
+)
+def test_variants_of_an_article_share_a_canonical_url(url):
+    assert canonicalise_url(url) == "https://example.com/nota"
+
+
+def test_canonical_url_sorts_the_query_and_keeps_the_path_case():
+    assert canonicalise_url("https://example.com/Nota?b=2&a=1") == "https://example.com/Nota?a=1&b=2"
+    assert canonicalise_url("https://example.com/a") != canonicalise_url("https://example.com/b")
@@ -0,0 +1,60 @@
+"""Links found in message text and in Telegram entities."""
+import pytest
+
+from agent.telegram_monitor import entity_urls
+from agent.utils import extract_urls, scan_urls
+
+
+def _utf16_offset(text: str, part: str) -> int:
+    return len(text[: text.index(part)].encode("utf-16-le")) // 2
+
+
+def test_url_entity_offsets_count_emoji_as_two_units():
+    link = "https://example.com/nota"
+    text = f"🚀🔥 Lee esto: {link} 👀"
+    entity = {"type": "url", "offset": _utf16_offset(text, link), "length": len(link)}
+
+    assert entity_urls(text, [entity]) == [link]
+
+
+def test_text_link_entities_are_normalised_in_order():
+    entities = [
+        {"type": "text_link", "offset": 0, "length": 3, "url": "HTTPS://Example.com/a?utm_source=tg"},
+        {"_": "MessageEntityTextUrl", "offset": 4, "length": 3, "url": "http://example.org/b#top"},
+        {"type": {"@type": "textEntityTypeTextUrl", "url": "example.net/c"}, "offset": 8, "length": 3},
+    ]
+
+    assert entity_urls("uno dos tres", entities) == [
+        "https://example.com/a",
+        "http://example.org/b",
+        "https://example.net/c",
+    ]
+
+
+@pytest.mark.parametrize(
+    "url",
+    ["mailto:prensa@example.com", "tel:+34600000000", "javascript:alert(1)", "ftp://example.com/a", "tg://resolve?domain=x"],
+)
+def test_entities_with_other_schemes_are_skipped(url):
+    assert entity_urls("enlace", [{"type": "text_link", "offset": 0, "length": 6, "url": url}]) == []
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Mira https://example.com/nota.", ["https://example.com/nota"]),
+        ("¿Viste https://example.com/a?!", ["https://example.com/a"]),
+        ("(ver https://example.com/nota).", ["https://example.com/nota"]),
+        ("https://es.wikipedia.org/wiki/Python_(desambiguación)", ["https://es.wikipedia.org/wiki/Python_(desambiguación)"]),
+        ("[https://example.com/x] y «www.example.org/y»", ["https://example.com/x", "www.example.org/y"]),
+        ("sin enlaces, solo www.nada y a.b", []),
+    ],
+)
+def test_scan_urls_trims_punctuation_and_unbalanced_brackets(text, expected):
+    assert scan_urls(text) == expected
+
+
+def test_extract_urls_normalises_the_found_links():
+    text = "🚀 www.Example.com/a?fbclid=1 y http://example.org:80/b"
+
+    assert extract_urls(text) == ["https://www.example.com/a", "http://example.org/b"]
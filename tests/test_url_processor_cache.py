@@ -0,0 +1,30 @@
+"""Results served from the processed URL cache."""
+from dataclasses import asdict
+from datetime import datetime
+
+from agent.cache import ProcessedURLCache
+from agent.url_processor import ProcessedURL, URLProcessor
+
+
+def test_cached_result_gets_the_current_release_date(tmp_path):
+    cache = ProcessedURLCache(tmp_path / "cache.db")
+    cached = ProcessedURL(
+        title="Nota",
+        summary="Resumen",
+        source_url="https://example.com/nota",
+        image_url=None,
+        release_date="2020-01-01",
+        provider="example.com",
+        type="article",
+    )
+    cache.put(["https://example.com/nota"], "hash", asdict(cached))
+    processor = URLProcessor(api_key="sk-test", summary_model="model", image_model="model", cache=cache)
+
+    try:
+        result = processor.prepare("https://example.com/nota")
+    finally:
+        cache.close()
+
+    assert isinstance(result, ProcessedURL)
+    assert result.title == "Nota"
+    assert result.release_date == datetime.utcnow().strftime("%Y-%m-%d")